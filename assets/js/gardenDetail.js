@@ -1,4 +1,5 @@
-import {getModalDataAjax, getConfigData, fitText} from './utils/utils.js';
+import $ from 'jquery';
+import {getModalDataAjax, getConfigData, fitText, addEventStreamListeners} from './utils/utils.js';
 import {createAjaxImageFormHandler} from './utils/ajaxFormHandler';
 
 const configs = getConfigData();
@@ -9,3 +10,17 @@ getModalDataAjax(configs).then(() => {
 });
 
 fitText('#name');
+
+addEventStreamListeners(configs.eventsUrl, {
+    garden: (data) => {
+        for (const [id, element] of [
+            ['#connectionStatus', data.is_connected],
+            ['#connectionStrength', data.connection_strength],
+            ['#waterLevel', data.water_level],
+        ]) {
+            $(id).closest('.lead').replaceWith($.parseHTML(element.trim()));
+        }
+        $('#lastConnectionFrom').text(data.last_connection_ip);
+        $('#lastConnectedAt').text(data.last_connection_time);
+    },
+});
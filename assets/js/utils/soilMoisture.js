@@ -1,5 +1,6 @@
 import $ from 'jquery';
 import Chart from 'chart.js';
+import {addEventStreamListeners} from './utils';
 
 $(() => {
     const $soilMoistureChart = $('#soilMoistureChart');
@@ -12,7 +13,7 @@ $(() => {
             const green = 'rgb(32, 201, 151, 1)';
             const transparentGreen = 'rgb(32, 201, 151, 0.2)';
 
-            new Chart(ctx, {
+            const chart = new Chart(ctx, {
                 type: 'line',
                 data: {
                     labels: data.labels,
@@ -86,6 +87,19 @@ $(() => {
                     },
                 },
             });
+
+            const wateringStation = $soilMoistureChart.data('watering-station');
+            addEventStreamListeners($soilMoistureChart.data('events-url'), {
+                records: (records) => {
+                    for (const record of records) {
+                        if (record.watering_station === wateringStation) {
+                            chart.data.labels.push(record.created);
+                            chart.data.datasets[0].data.push(record.moisture_level);
+                        }
+                    }
+                    chart.update();
+                },
+            });
         },
     });
 });
@@ -46,4 +46,15 @@ function getConfigData(id = 'configs') {
     return JSON.parse(document.getElementById(id).textContent);
 }
 
-export {getModalDataAjax, addAjaxFormHandler, goToUrl, getFormData, createAddFormListeners, fitText, getConfigData};
+function addEventStreamListeners(url, listeners) {
+    if (!window.EventSource) {
+        return;
+    }
+
+    const eventSource = new EventSource(url);
+    for (const [event, listener] of Object.entries(listeners)) {
+        eventSource.addEventListener(event, (message) => listener(JSON.parse(message.data)));
+    }
+}
+
+export {getModalDataAjax, addAjaxFormHandler, goToUrl, getFormData, createAddFormListeners, fitText, getConfigData, addEventStreamListeners};
@@ -12,5 +12,11 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'autogarden.settings')
+os.environ.setdefault('DJANGO_ROOT_URLCONF', 'autogarden.asgi_urls')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# imported once the app registry has been populated by get_asgi_application()
+from garden.streams import EventStreamApplication  # noqa: E402
+
+application = EventStreamApplication(django_application)
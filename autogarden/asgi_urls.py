@@ -0,0 +1,18 @@
+"""autogarden URL Configuration for the ASGI deployment
+
+Serves the same URLs as autogarden/urls.py, except that the device API is routed to the async views in
+garden/async_views.py.
+"""
+from django.urls import path
+from garden.async_views import garden_api_view, watering_station_api_view
+
+from autogarden import urls
+from autogarden.urls import API_PREFIX
+
+ASYNC_URL_NAMES = ['api-garden', 'api-watering-stations']
+
+urlpatterns = [
+    path(API_PREFIX + 'gardens/<str:name>/', garden_api_view, name='api-garden'),
+    path(API_PREFIX + 'gardens/<str:name>/watering-stations/', watering_station_api_view,
+         name='api-watering-stations'),
+] + [pattern for pattern in urls.urlpatterns if getattr(pattern, 'name', None) not in ASYNC_URL_NAMES]
@@ -0,0 +1,259 @@
+"""
+Cache configuration from a URL, and a cache backend for servers that speak the Redis protocol (RESP).
+
+This version of Django doesn't include a Redis backend, so RedisCache implements the commands it needs over a plain
+socket. Integers are stored as decimal strings so that incr() can use INCRBY, and everything else is pickled. The
+connection is kept open across requests.
+
+Commands are only retried when they couldn't be sent, since a server that stops replying may already have run them.
+"""
+
+import pickle
+import select
+import socket
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import unquote, urlsplit
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.exceptions import ImproperlyConfigured
+
+# increments a key only if it exists, in a single command so that no other client can change the key in between
+INCR_SCRIPT = "if redis.call('EXISTS', KEYS[1]) == 1 then return redis.call('INCRBY', KEYS[1], ARGV[1]) end"
+
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'dummy': 'django.core.cache.backends.dummy.DummyCache',
+    'redis': 'autogarden.cache.RedisCache',
+}
+
+
+def parse_cache_url(url: str) -> Dict[str, Any]:
+    """
+    Returns the CACHES entry for a URL such as locmem://, file:///var/tmp/autogarden or redis://:password@host:6379/0.
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in CACHE_BACKENDS:
+        raise ImproperlyConfigured(f'Unsupported cache URL scheme: {parts.scheme}')
+
+    if parts.scheme == 'redis':
+        location = url
+    elif parts.scheme == 'file':
+        location = parts.path
+    else:
+        location = parts.netloc
+    return {'BACKEND': CACHE_BACKENDS[parts.scheme], 'LOCATION': location}
+
+
+class RedisError(Exception):
+    pass
+
+
+class RedisConnection:
+    def __init__(self, host: str, port: int, db: int, password: Optional[str], socket_timeout: Optional[float]):
+        self.sock = socket.create_connection((host, port), timeout=socket_timeout)
+        self.file = self.sock.makefile('rb')
+        if password is not None:
+            self.execute('AUTH', password)
+        if db != 0:
+            self.execute('SELECT', db)
+
+    def close(self) -> None:
+        self.file.close()
+        self.sock.close()
+
+    def is_closed(self) -> bool:
+        """
+        Returns whether the connection was closed, e.g. by the server after it was idle. Every reply has been read
+        between commands, so an idle connection is only readable once the server has closed it.
+        """
+        if self.sock.fileno() == -1:
+            return True
+        readable, _, _ = select.select([self.sock], [], [], 0)
+        return bool(readable)
+
+    def execute(self, *args):
+        self.send([args])
+        return self.read_replies(1)[0]
+
+    def send(self, commands: Iterable[Iterable]) -> None:
+        """
+        Sends all of the commands at once, so that pipelined commands only take a single round trip.
+        """
+        self.sock.sendall(b''.join(self._encode(command) for command in commands))
+
+    def read_replies(self, num_replies: int) -> List:
+        replies = [self._read_reply() for _ in range(num_replies)]
+        errors = [reply for reply in replies if isinstance(reply, RedisError)]
+        if errors:
+            raise errors[0]
+        return replies
+
+    def _encode(self, command: Iterable) -> bytes:
+        args = [arg if isinstance(arg, bytes) else str(arg).encode() for arg in command]
+        return b''.join([f'*{len(args)}\r\n'.encode()] + [b'$%d\r\n%s\r\n' % (len(arg), arg) for arg in args])
+
+    def _read_reply(self):
+        line = self.file.readline()
+        if not line.endswith(b'\r\n'):
+            raise ConnectionError('Connection closed by the cache server.')
+        kind, value = line[:1], line[1:-2]
+        if kind == b'+':
+            return value.decode()
+        if kind == b'-':
+            return RedisError(value.decode())
+        if kind == b':':
+            return int(value)
+        if kind == b'$':
+            length = int(value)
+            return None if length == -1 else self.file.read(length + 2)[:-2]
+        if kind == b'*':
+            length = int(value)
+            return None if length == -1 else [self._read_reply() for _ in range(length)]
+        raise RedisError(f'Unexpected reply from the cache server: {line!r}')
+
+
+class RedisCache(BaseCache):
+    def __init__(self, server: str, params: Dict[str, Any]):
+        super().__init__(params)
+        parts = urlsplit(server)
+        self._host = parts.hostname or 'localhost'
+        self._port = parts.port or 6379
+        self._db = int(parts.path.lstrip('/') or 0)
+        self._password = unquote(parts.password) if parts.password else None
+        self._socket_timeout = params.get('OPTIONS', {}).get('SOCKET_TIMEOUT', 5)
+        self._connection = None
+
+    def _connect(self) -> RedisConnection:
+        if self._connection is not None and self._connection.is_closed():
+            self.disconnect()
+        if self._connection is None:
+            self._connection = RedisConnection(self._host, self._port, self._db, self._password, self._socket_timeout)
+        return self._connection
+
+    def _pipeline(self, commands: Iterable[Iterable]) -> List:
+        commands = list(commands)
+        # the server only runs the commands it received in full, and the commands that are pipelined together can all
+        # be run twice, so sending is retried once on a new connection
+        for attempt in range(2):
+            connection = self._connect()
+            try:
+                connection.send(commands)
+                break
+            except OSError:
+                self.disconnect()
+                if attempt == 1:
+                    raise
+        try:
+            return connection.read_replies(len(commands))
+        except OSError:
+            # the server may have run the commands before it stopped replying, so they aren't retried
+            self.disconnect()
+            raise
+
+    def _execute(self, *args):
+        return self._pipeline([args])[0]
+
+    def _encode(self, value: Any) -> bytes:
+        if type(value) is int:
+            return str(value).encode()
+        return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+    def _decode(self, value: Optional[bytes]) -> Any:
+        if value is None:
+            return None
+        if value.lstrip(b'-').isdigit():
+            return int(value)
+        return pickle.loads(value)
+
+    def _expiry_args(self, timeout) -> List:
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        return [] if timeout is None else ['PX', max(1, int(timeout * 1000))]
+
+    def _is_expired(self, timeout) -> bool:
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        # Django's backends treat a timeout of 0 or less as expiring the key immediately
+        return timeout is not None and timeout <= 0
+
+    def _make_key(self, key, version=None) -> str:
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None) -> bool:
+        key = self._make_key(key, version)
+        if self._is_expired(timeout):
+            return not self._execute('EXISTS', key)
+        return self._execute('SET', key, self._encode(value), 'NX', *self._expiry_args(timeout)) is not None
+
+    def get(self, key, default=None, version=None):
+        value = self._execute('GET', self._make_key(key, version))
+        return default if value is None else self._decode(value)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None) -> None:
+        key = self._make_key(key, version)
+        if self._is_expired(timeout):
+            self._execute('DEL', key)
+        else:
+            self._execute('SET', key, self._encode(value), *self._expiry_args(timeout))
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None) -> bool:
+        key = self._make_key(key, version)
+        if self._is_expired(timeout):
+            return bool(self._execute('DEL', key))
+        expiry_args = self._expiry_args(timeout)
+        if expiry_args:
+            return bool(self._execute('PEXPIRE', key, expiry_args[1]))
+        _, exists = self._pipeline([['PERSIST', key], ['EXISTS', key]])
+        return bool(exists)
+
+    def delete(self, key, version=None) -> bool:
+        return bool(self._execute('DEL', self._make_key(key, version)))
+
+    def get_many(self, keys, version=None) -> Dict:
+        keys = list(keys)
+        if not keys:
+            return {}
+        values = self._execute('MGET', *[self._make_key(key, version) for key in keys])
+        return {key: self._decode(value) for key, value in zip(keys, values) if value is not None}
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None) -> List:
+        if not data:
+            return []
+        if self._is_expired(timeout):
+            self.delete_many(data, version)
+            return []
+        expiry_args = self._expiry_args(timeout)
+        self._pipeline(
+            ['SET', self._make_key(key, version), self._encode(value), *expiry_args] for key, value in data.items()
+        )
+        return []
+
+    def delete_many(self, keys, version=None) -> None:
+        keys = list(keys)
+        if keys:
+            self._execute('DEL', *[self._make_key(key, version) for key in keys])
+
+    def has_key(self, key, version=None) -> bool:
+        return bool(self._execute('EXISTS', self._make_key(key, version)))
+
+    def incr(self, key, delta=1, version=None) -> int:
+        key = self._make_key(key, version)
+        value = self._execute('EVAL', INCR_SCRIPT, 1, key, delta)
+        if value is None:
+            raise ValueError(f"Key '{key}' not found")
+        return value
+
+    def clear(self) -> None:
+        self._execute('FLUSHDB')
+
+    def close(self, **kwargs) -> None:
+        # Django closes caches at the end of every request, but the connection is kept open for the next one
+        pass
+
+    def disconnect(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
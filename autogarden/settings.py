@@ -12,8 +12,12 @@ https://docs.djangoproject.com/en/3.1/ref/settings/
 
 from pathlib import Path
 import os
+from datetime import timedelta
+
 from dotenv import load_dotenv
 
+from autogarden.cache import parse_cache_url
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 load_dotenv()
@@ -60,7 +64,8 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
-ROOT_URLCONF = 'autogarden.urls'
+# the ASGI deployment routes the device API to async views (see autogarden/asgi.py)
+ROOT_URLCONF = os.environ.get('DJANGO_ROOT_URLCONF', 'autogarden.urls')
 
 TEMPLATES = [
     {
@@ -104,6 +109,16 @@ else:
     }
 
 
+# Cache
+# https://docs.djangoproject.com/en/3.1/topics/cache/
+# CACHE_URL selects the backend, e.g. locmem://, file:///var/tmp/autogarden or redis://:password@host:6379/0, and
+# falls back to the REDIS_URL set by the Heroku Redis addon. Local memory caches aren't shared between processes.
+
+CACHES = {
+    'default': parse_cache_url(os.environ.get('CACHE_URL', os.environ.get('REDIS_URL', 'locmem://')))
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.1/ref/settings/#auth-password-validators
 
@@ -170,6 +185,44 @@ CRISPY_TEMPLATE_PACK = 'bootstrap4'
 MEDIA_URL = '/images/'
 MEDIA_ROOT = BASE_DIR / 'static' / 'images'
 
+# Watering station records older than the retention period are deleted by the prune_records management command,
+# which should be run periodically (e.g. with the Heroku Scheduler addon).
+WS_RECORDS_RETENTION = timedelta(hours=int(os.environ.get('WS_RECORDS_RETENTION_HOURS', 12)))
+WS_RECORDS_PRUNE_BATCH_SIZE = int(os.environ.get('WS_RECORDS_PRUNE_BATCH_SIZE', 1000))
+
+# On PostgreSQL, watering station records can be stored in daily partitions so that expired records are removed by
+# dropping whole partitions. Partitions are created ahead of time by the partition_records management command.
+WS_RECORDS_PARTITIONED = 'WS_RECORDS_PARTITIONED' in os.environ
+WS_RECORDS_PARTITIONS_AHEAD = int(os.environ.get('WS_RECORDS_PARTITIONS_AHEAD', 7))
+
+# Watering station records sent by devices can be buffered in memory and written in batches by a background thread of
+# each server process instead of during each request (see garden/ingest.py). Requests are rejected with a 503 response
+# while the buffer is full.
+WS_RECORDS_WRITE_BEHIND = 'WS_RECORDS_WRITE_BEHIND' in os.environ
+WS_RECORDS_BUFFER_SIZE = int(os.environ.get('WS_RECORDS_BUFFER_SIZE', 50000))
+WS_RECORDS_FLUSH_SIZE = int(os.environ.get('WS_RECORDS_FLUSH_SIZE', 1000))
+WS_RECORDS_FLUSH_INTERVAL = int(os.environ.get('WS_RECORDS_FLUSH_INTERVAL_MS', 500)) / 1000
+
+# Successful API key verifications are cached so the password hasher only runs once per device per timeout.
+TOKEN_VERIFICATION_CACHE_TIMEOUT = int(os.environ.get('TOKEN_VERIFICATION_CACHE_TIMEOUT', 300))
+
+# The configs sent to devices are cached until they are changed, for at most this many seconds.
+CONFIG_CACHE_TIMEOUT = int(os.environ.get('CONFIG_CACHE_TIMEOUT', 60))
+
+# Rendered garden fragments are cached until the garden changes, for at most this many seconds. Without a shared cache
+# backend each process has its own cache, so this also bounds how long other processes can serve outdated fragments.
+GARDEN_FRAGMENT_CACHE_TIMEOUT = int(os.environ.get('GARDEN_FRAGMENT_CACHE_TIMEOUT', 60))
+
+# Configuration templates applied to more gardens and watering stations than this run as background jobs.
+CONFIG_JOB_BACKGROUND_THRESHOLD = int(os.environ.get('CONFIG_JOB_BACKGROUND_THRESHOLD', 100))
+
+# The progress of a running configuration job is kept in the cache for at most this many seconds after it is reported.
+CONFIG_JOB_PROGRESS_TIMEOUT = int(os.environ.get('CONFIG_JOB_PROGRESS_TIMEOUT', 3600))
+
+# Pending and running configuration jobs created longer ago than this are marked as failed by the
+# fail_stale_config_jobs management command, since the server process running them must have been interrupted.
+CONFIG_JOB_TIMEOUT = timedelta(minutes=int(os.environ.get('CONFIG_JOB_TIMEOUT_MINUTES', 60)))
+
 AUTH_USER_MODEL = 'users.User'
 LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = '/gardens/'
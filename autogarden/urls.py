@@ -16,8 +16,11 @@ Including another URLconf
 from users.forms import CustomChangePasswordForm
 from django.contrib import admin
 from django.urls import path
-from garden.views import (GardenDeleteView, GardenDetailView, GardenListView, GardenUpdateView,
-                          GardenAPIView, WateringStationCreateView, WateringStationDeleteView, WateringStationDetailView,
+from garden.views import (ConfigJobAPIView, ConfigJobListAPIView,
+                          GardenDeleteView, GardenDetailView, GardenEventsView, GardenListView, GardenUpdateView,
+                          GardenAPIView, GardenProvisionAPIView, GardenSyncAPIView, WateringStationCreateView,
+                          WateringStationDeleteView,
+                          WateringStationDetailView,
                           WateringStationUpdateView, WateringStationListView,
                           WateringStationAPIView, WateringStationRecordListView, home, TokenUpdateView)
 from users.views import CreateUserView, LoginView, LogoutView, PasswordResetView, PasswordResetConfirmView, SettingsView
@@ -30,9 +33,13 @@ urlpatterns = [
 
     path('', home, name='home'),
 
+    path(API_PREFIX + 'gardens/', GardenProvisionAPIView.as_view(), name='api-garden-provision'),
     path(API_PREFIX + 'gardens/<str:name>/', GardenAPIView.as_view(), name='api-garden'),
     path(API_PREFIX + 'gardens/<str:name>/watering-stations/',
          WateringStationAPIView.as_view(), name='api-watering-stations'),
+    path(API_PREFIX + 'gardens/<str:name>/sync/', GardenSyncAPIView.as_view(), name='api-garden-sync'),
+    path(API_PREFIX + 'config-jobs/', ConfigJobListAPIView.as_view(), name='api-config-jobs'),
+    path(API_PREFIX + 'config-jobs/<int:pk>/', ConfigJobAPIView.as_view(), name='api-config-job'),
 
     path('login/', LoginView.as_view(), name='login'),
     path('logout/', LogoutView.as_view(), name='logout'),
@@ -54,6 +61,7 @@ urlpatterns = [
     path('gardens/<int:pk>/', GardenDetailView.as_view(), name='garden-detail'),
     path('gardens/<int:pk>/update/', GardenUpdateView.as_view(), name='garden-update'),
     path('gardens/<int:pk>/delete/', GardenDeleteView.as_view(), name='garden-delete'),
+    path('gardens/<int:pk>/events/', GardenEventsView.as_view(), name='garden-events'),
 
     path('gardens/<int:pk>/watering-stations/', WateringStationListView.as_view(), name='watering-station-list'),
     path('gardens/<int:garden_pk>/watering-stations/<int:ws_pk>/',
@@ -1,6 +1,7 @@
 from django.contrib import admin
 
-from .models import Garden, Token, WateringStation, WateringStationRecord
+from .models import (ConfigJob, Garden, Token, WateringStation,
+                     WateringStationRecord, WateringStationRecordRollup)
 
 
 class GardenAdmin(admin.ModelAdmin):
@@ -15,3 +16,5 @@ admin.site.register(Garden, GardenAdmin)
 admin.site.register(WateringStation, WateringStationAdmin)
 admin.site.register(Token)
 admin.site.register(WateringStationRecord)
+admin.site.register(WateringStationRecordRollup)
+admin.site.register(ConfigJob)
@@ -0,0 +1,134 @@
+"""
+Async versions of the device API views. The ASGI deployment routes the device API to these views (see
+autogarden/asgi_urls.py) so that a slow device connection only holds an idle coroutine instead of a worker, and only
+the database work is offloaded to a thread pool. They accept and return the same data as the DRF views in
+garden/views.py.
+"""
+
+from functools import wraps
+from io import BytesIO
+
+from asgiref.sync import sync_to_async
+from django import http
+from django.db import close_old_connections
+from django.http import JsonResponse
+from rest_framework import status
+from rest_framework.exceptions import (AuthenticationFailed, ParseError,
+                                       PermissionDenied, UnsupportedMediaType)
+from rest_framework.parsers import JSONParser
+
+from .authentication import TokenAuthentication, get_device_garden
+from .ingest import IngestBufferFull
+from .models import Garden
+from .parsers import MoistureLevelsParser
+from .permissions import TokenPermission
+from .serializers import GardenPatchSerializer, WateringStationRecordSerializer
+from .views import (get_not_modified_response, load_garden_config,
+                    load_watering_station_configs)
+
+PARSERS = {parser.media_type: parser() for parser in [JSONParser, MoistureLevelsParser]}
+
+
+def database_sync_to_async(func):
+    """
+    Runs func in a thread pool, closing the worker thread's database connection if it has expired or errored, like
+    Django does at the start and end of each request.
+    """
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+
+    return sync_to_async(wrapper, thread_sensitive=False)
+
+
+@database_sync_to_async
+def get_verified_garden(request: http.HttpRequest, name: str) -> Garden:
+    user_auth = TokenAuthentication().authenticate(request)
+    request.auth = None if user_auth is None else user_auth[1]
+    garden = get_device_garden(request, name)
+    if not TokenPermission().has_object_permission(request, None, garden):
+        raise PermissionDenied()
+    return garden
+
+
+def parse_body(request: http.HttpRequest):
+    parser = PARSERS.get(request.content_type)
+    if parser is None:
+        raise UnsupportedMediaType(request.content_type)
+    return parser.parse(BytesIO(request.body))
+
+
+def device_api_view(methods):
+    """
+    Turns an async view taking a request and a garden into an async view taking the garden's name, which handles the
+    method check, token verification and error responses the same way the DRF views do.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request: http.HttpRequest, name: str) -> http.HttpResponse:
+            if request.method not in methods:
+                return http.HttpResponseNotAllowed(methods)
+            try:
+                garden = await get_verified_garden(request, name)
+                return await view(request, garden)
+            except Garden.DoesNotExist:
+                return http.HttpResponse(status=status.HTTP_400_BAD_REQUEST)
+            except (AuthenticationFailed, ParseError, PermissionDenied, UnsupportedMediaType) as exc:
+                return JsonResponse({'detail': exc.detail}, status=exc.status_code)
+            except IngestBufferFull as exc:
+                response = JsonResponse({'detail': exc.detail}, status=exc.status_code)
+                response['Retry-After'] = str(exc.wait)
+                return response
+
+        # set directly since csrf_exempt() would wrap the view in a sync function in this version of Django
+        wrapper.csrf_exempt = True
+        return wrapper
+
+    return decorator
+
+
+@device_api_view(['GET', 'PATCH'])
+async def garden_api_view(request: http.HttpRequest, garden: Garden) -> http.HttpResponse:
+    if request.method == 'GET':
+        etag, data = await database_sync_to_async(load_garden_config)(garden)
+        response = get_not_modified_response(request, etag)
+        if response is None:
+            response = JsonResponse(data)
+            response['ETag'] = etag
+        return response
+
+    serializer = GardenPatchSerializer(data=parse_body(request), instance=garden)
+    if not serializer.is_valid():
+        return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    await database_sync_to_async(serializer.save)(request)
+    return http.HttpResponse(status=status.HTTP_204_NO_CONTENT)
+
+
+@database_sync_to_async
+def get_watering_stations(garden: Garden):
+    return list(garden.watering_stations.all())
+
+
+@device_api_view(['GET', 'POST'])
+async def watering_station_api_view(request: http.HttpRequest, garden: Garden) -> http.HttpResponse:
+    if request.method == 'GET':
+        etag, data = await database_sync_to_async(load_watering_station_configs)(garden)
+        response = get_not_modified_response(request, etag)
+        if response is None:
+            response = JsonResponse(data, safe=False)
+            response['ETag'] = etag
+        return response
+
+    serializer = WateringStationRecordSerializer(data=parse_body(request), many=True, context={
+        'watering_stations': await get_watering_stations(garden)
+    })
+    if not serializer.is_valid():
+        return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST, safe=False)
+    await database_sync_to_async(serializer.save)()
+    return JsonResponse({}, status=status.HTTP_201_CREATED)
@@ -0,0 +1,78 @@
+"""
+Authentication of devices by their garden's API key.
+
+API keys are a public prefix and a secret joined by Token.KEY_SEPARATOR. The prefix is stored unhashed and indexed, so
+the token of a key and its garden are found with a single query before the key is verified, instead of looking the
+garden up by the name in the URL, which is only unique per owner. Keys issued before keys had prefixes are still
+verified against the garden named in the URL.
+"""
+
+from typing import Optional
+
+from django.contrib.auth.models import AnonymousUser
+from rest_framework.authentication import BaseAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+
+from .models import Garden, Token
+
+
+def get_key(auth_header: Optional[str]) -> Optional[str]:
+    if auth_header is None:
+        return None
+    return auth_header.split(' ')[-1]
+
+
+def get_key_token(key: str) -> Optional[Token]:
+    """
+    Returns the token of a prefixed API key with its garden, or None if the key isn't valid.
+
+    Only the verification of the key is cached (see Token.verify). The token and garden are always queried, since the
+    device views save the garden they are given, and saving a cached copy would overwrite changes made since it was
+    cached, e.g. by the garden's owner or by bulk updates that don't send signals.
+    """
+    # prefixes are random, so more than one token only matches in the unlikely case of a collision
+    for token in Token.objects.select_related('garden').filter(prefix=Token.get_key_prefix(key)):
+        if token.verify(key):
+            return token
+    return None
+
+
+class TokenAuthentication(BaseAuthentication):
+    """
+    Sets request.auth to the token of a prefixed API key. Requests with keys that don't have a prefix are left
+    unauthenticated for get_device_garden() to verify.
+    """
+
+    def authenticate(self, request):
+        key = get_key(request.META.get('HTTP_AUTHORIZATION'))
+        if key is None or not Token.get_key_prefix(key):
+            return None
+        token = get_key_token(key)
+        if token is None:
+            raise AuthenticationFailed()
+        return AnonymousUser(), token
+
+
+def get_device_garden(request, name: str) -> Garden:
+    """
+    Returns the garden named in the URL of a device request. The garden of a request authenticated by
+    TokenAuthentication is the garden of its token, otherwise it is looked up by name.
+
+    Raises Garden.DoesNotExist if the request's token belongs to a garden with a different name, or no garden has the
+    name.
+    """
+    token = getattr(request, 'auth', None)
+    if token is not None:
+        if token.garden.name != name:
+            raise Garden.DoesNotExist()
+        return token.garden
+
+    gardens = list(Garden.objects.select_related('token').filter(name=name))
+    if not gardens:
+        raise Garden.DoesNotExist()
+    if len(gardens) > 1:
+        # gardens of different owners can share a name, so pick the one that the key belongs to
+        key = get_key(request.META.get('HTTP_AUTHORIZATION'))
+        return next((garden for garden in gardens if hasattr(garden, 'token') and garden.token.verify(key)),
+                    gardens[0])
+    return gardens[0]
@@ -0,0 +1,137 @@
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+TOKEN_VERIFICATION_KEY = 'garden:token-verification:{garden_pk}'
+TOKEN_VERIFICATION_SALT = 'garden.cache.token-verification'
+GARDEN_CONFIG_KEY = 'garden:config:{garden_pk}'
+WATERING_STATION_CONFIGS_KEY = 'garden:watering-station-configs:{garden_pk}'
+
+# the etag of a config sent to devices and its serialized data
+Config = Tuple[str, Any]
+
+
+def _token_verification_key(token) -> str:
+    return TOKEN_VERIFICATION_KEY.format(garden_pk=token.garden_id)
+
+
+def _token_digest(token, uuid: str) -> str:
+    # The stored hash is mixed into the digest so that entries cached for a previous key can never match once the
+    # token has been rotated, even if the explicit invalidation was missed.
+    return salted_hmac(TOKEN_VERIFICATION_SALT, f'{token.uuid}:{uuid}', algorithm='sha256').hexdigest()
+
+
+def is_token_verified(token, uuid: str) -> bool:
+    digest = cache.get(_token_verification_key(token))
+    return digest is not None and constant_time_compare(digest, _token_digest(token, uuid))
+
+
+def set_token_verified(token, uuid: str) -> None:
+    cache.set(_token_verification_key(token), _token_digest(token, uuid),
+              timeout=settings.TOKEN_VERIFICATION_CACHE_TIMEOUT)
+
+
+def invalidate_token_verification(token) -> None:
+    cache.delete(_token_verification_key(token))
+
+
+def get_garden_config(garden_pk: int) -> Optional[Config]:
+    return cache.get(GARDEN_CONFIG_KEY.format(garden_pk=garden_pk))
+
+
+def set_garden_config(garden_pk: int, config: Config) -> None:
+    cache.set(GARDEN_CONFIG_KEY.format(garden_pk=garden_pk), config, timeout=settings.CONFIG_CACHE_TIMEOUT)
+
+
+def invalidate_garden_config(garden_pk: int) -> None:
+    cache.delete(GARDEN_CONFIG_KEY.format(garden_pk=garden_pk))
+
+
+def get_watering_station_configs(garden_pk: int) -> Optional[Config]:
+    return cache.get(WATERING_STATION_CONFIGS_KEY.format(garden_pk=garden_pk))
+
+
+def set_watering_station_configs(garden_pk: int, configs: Config) -> None:
+    cache.set(WATERING_STATION_CONFIGS_KEY.format(garden_pk=garden_pk), configs, timeout=settings.CONFIG_CACHE_TIMEOUT)
+
+
+def invalidate_watering_station_configs(garden_pk: int) -> None:
+    cache.delete(WATERING_STATION_CONFIGS_KEY.format(garden_pk=garden_pk))
+
+
+GARDEN_VERSION_KEY = 'garden:version:{garden_pk}'
+GARDEN_FRAGMENT_KEY = 'garden:fragment:{name}:{garden_pk}:{version}'
+USER_GARDENS_KEY = 'garden:user-gardens:{user_pk}'
+
+
+def _garden_version_key(garden_pk: int) -> str:
+    return GARDEN_VERSION_KEY.format(garden_pk=garden_pk)
+
+
+def _garden_fragment_key(name: str, garden_pk: int, version: int) -> str:
+    return GARDEN_FRAGMENT_KEY.format(name=name, garden_pk=garden_pk, version=version)
+
+
+def get_garden_versions(garden_pks: Iterable[int]) -> Dict[int, int]:
+    """
+    Returns the current version of each garden's cached fragments. Gardens without a version are given a new one
+    based on the current time, so that a version that expired or was evicted is never reused for a newer state of the
+    garden.
+    """
+    keys = {_garden_version_key(garden_pk): garden_pk for garden_pk in garden_pks}
+    versions = {keys[key]: version for key, version in cache.get_many(keys).items()}
+    new_versions = {key: time.time_ns() for key, garden_pk in keys.items() if garden_pk not in versions}
+    if new_versions:
+        # fragments never outlive their version, so versions only have to be kept as long as fragments
+        cache.set_many(new_versions, timeout=settings.GARDEN_FRAGMENT_CACHE_TIMEOUT)
+        versions.update((keys[key], version) for key, version in new_versions.items())
+    return versions
+
+
+def bump_garden_version(garden_pk: int) -> None:
+    try:
+        cache.incr(_garden_version_key(garden_pk))
+    except ValueError:
+        # there are no fragments to invalidate for a garden without a version
+        pass
+
+
+def get_garden_fragments(name: str, versions: Dict[int, int]) -> Dict[int, Any]:
+    keys = {_garden_fragment_key(name, garden_pk, version): garden_pk for garden_pk, version in versions.items()}
+    return {keys[key]: fragment for key, fragment in cache.get_many(keys).items()}
+
+
+def set_garden_fragment(name: str, garden_pk: int, version: int, fragment: Any, timeout: Optional[int]) -> None:
+    """
+    Caches the fragment for the given version of the garden for timeout seconds, or until the garden's fragments
+    expire if timeout is None.
+    """
+    max_timeout = settings.GARDEN_FRAGMENT_CACHE_TIMEOUT
+    timeout = max_timeout if timeout is None else min(timeout, max_timeout)
+    cache.set(_garden_fragment_key(name, garden_pk, version), fragment, timeout=timeout)
+
+
+def get_user_garden_pks(user_pk: int) -> Optional[List[int]]:
+    return cache.get(USER_GARDENS_KEY.format(user_pk=user_pk))
+
+
+def set_user_garden_pks(user_pk: int, garden_pks: List[int]) -> None:
+    cache.set(USER_GARDENS_KEY.format(user_pk=user_pk), garden_pks, timeout=settings.GARDEN_FRAGMENT_CACHE_TIMEOUT)
+
+
+def invalidate_user_garden_pks(user_pk: int) -> None:
+    cache.delete(USER_GARDENS_KEY.format(user_pk=user_pk))
+
+
+CONFIG_JOB_PROGRESS_KEY = 'garden:config-job-progress:{job_pk}'
+
+
+def get_config_job_progress(job_pk: int) -> Optional[Tuple[int, int]]:
+    return cache.get(CONFIG_JOB_PROGRESS_KEY.format(job_pk=job_pk))
+
+
+def set_config_job_progress(job_pk: int, done: int, total: int) -> None:
+    cache.set(CONFIG_JOB_PROGRESS_KEY.format(job_pk=job_pk), (done, total), timeout=settings.CONFIG_JOB_PROGRESS_TIMEOUT)
@@ -0,0 +1,157 @@
+"""
+Applies a configuration template to many gardens and watering stations at once.
+
+The template's fields are set on every target and written with bulk_update in a single transaction, so either all of
+the targets are configured or none are. Templates applied to many targets run as a ConfigJob in a background thread
+instead of during the request. The job's progress is kept in the cache rather than on the job, since the job's own
+transaction isn't visible to other connections until it commits.
+"""
+
+import logging
+import threading
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Optional
+
+import pytz
+from django.db import connection, transaction
+from django.db.models import Q
+
+from .cache import (bump_garden_version, invalidate_garden_config,
+                    invalidate_watering_station_configs,
+                    set_config_job_progress)
+from .models import ConfigJob, Garden, WateringStation
+from .serializers import ConfigJobSerializer
+
+logger = logging.getLogger(__name__)
+
+GARDEN_TEMPLATE_FIELDS = ['update_frequency']
+WATERING_STATION_TEMPLATE_FIELDS = ['moisture_threshold', 'watering_duration']
+
+# number of rows updated per query
+BATCH_SIZE = 500
+
+UPDATED = 'updated'
+NOT_FOUND = 'not_found'
+
+Results = Dict[str, Dict[str, str]]
+
+
+def _get_results(pks: Iterable[int], found: Iterable[int]) -> Dict[str, str]:
+    found = set(found)
+    return {str(pk): UPDATED if pk in found else NOT_FOUND for pk in pks}
+
+
+def count_config_targets(owner, template: Dict, gardens: Iterable[int], watering_stations: Iterable[int]) -> int:
+    """
+    Returns the number of rows that applying the template would update, counting all of the watering stations of the
+    given gardens.
+    """
+    count = len(gardens) if any(field in template for field in GARDEN_TEMPLATE_FIELDS) else 0
+    if any(field in template for field in WATERING_STATION_TEMPLATE_FIELDS):
+        count += (
+            WateringStation.objects
+            .filter(garden__owner=owner)
+            .filter(Q(garden_id__in=gardens) | Q(pk__in=watering_stations))
+            .count()
+        )
+    return count
+
+
+def _invalidate_gardens(garden_pks: Iterable[int], garden_config: bool, watering_station_configs: bool) -> None:
+    for garden_pk in garden_pks:
+        if garden_config:
+            invalidate_garden_config(garden_pk)
+        if watering_station_configs:
+            invalidate_watering_station_configs(garden_pk)
+        bump_garden_version(garden_pk)
+
+
+@transaction.atomic
+def apply_config_template(owner, template: Dict, gardens: Iterable[int], watering_stations: Iterable[int],
+                          report_progress: Optional[Callable[[int, int], None]] = None) -> Results:
+    """
+    Sets the fields of the template on the owner's gardens with the given pks, on all of the watering stations of
+    those gardens, and on the owner's watering stations with the given pks. Garden fields are only set on gardens and
+    watering station fields only on watering stations.
+
+    Returns whether each given garden and watering station pk was updated, or not found because it doesn't exist or
+    belongs to another user. report_progress is called with the number of rows updated so far and the total after each
+    batch.
+    """
+    garden_fields = [field for field in GARDEN_TEMPLATE_FIELDS if field in template]
+    watering_station_fields = [field for field in WATERING_STATION_TEMPLATE_FIELDS if field in template]
+
+    garden_objs = list(Garden.objects.filter(owner=owner, pk__in=gardens))
+    watering_station_objs = list(
+        WateringStation.objects
+        .filter(garden__owner=owner)
+        .filter(Q(garden_id__in=[garden.pk for garden in garden_objs]) | Q(pk__in=watering_stations))
+    ) if watering_station_fields else []
+
+    updates = []
+    if garden_fields:
+        updates.append((Garden, garden_objs, garden_fields))
+    if watering_station_fields:
+        updates.append((WateringStation, watering_station_objs, watering_station_fields))
+
+    total = sum(len(objs) for _, objs, _ in updates)
+    done = 0
+    for model, objs, fields in updates:
+        for obj in objs:
+            for field in fields:
+                setattr(obj, field, template[field])
+        for start in range(0, len(objs), BATCH_SIZE):
+            batch = objs[start:start + BATCH_SIZE]
+            model.objects.bulk_update(batch, fields)
+            done += len(batch)
+            if report_progress is not None:
+                report_progress(done, total)
+
+    # bulk_update doesn't send the signals that invalidate the cached configs and pages of the gardens. They are
+    # invalidated once the changes are committed, since a request in between would cache the old configs again.
+    garden_pks = {garden.pk for garden in garden_objs} | {ws.garden_id for ws in watering_station_objs}
+    transaction.on_commit(lambda: _invalidate_gardens(garden_pks, bool(garden_fields), bool(watering_station_fields)))
+
+    return {
+        'gardens': _get_results(gardens, [garden.pk for garden in garden_objs]),
+        'watering_stations': _get_results(watering_stations, [ws.pk for ws in watering_station_objs]),
+    }
+
+
+def run_config_job(job_pk: int) -> None:
+    """
+    Applies the template of a pending job, recording its results, or that it failed.
+    """
+    job = ConfigJob.objects.select_related('owner').get(pk=job_pk)
+    job.status = ConfigJob.RUNNING
+    job.save(update_fields=['status'])
+    try:
+        serializer = ConfigJobSerializer(data=job.data)
+        serializer.is_valid(raise_exception=True)
+        job.results = apply_config_template(
+            job.owner, **serializer.validated_data,
+            report_progress=lambda done, total: set_config_job_progress(job.pk, done, total)
+        )
+        job.status = ConfigJob.DONE
+    except Exception:
+        logger.exception('Configuration job %s failed', job.pk)
+        job.status = ConfigJob.FAILED
+    job.finished = datetime.now(pytz.UTC)
+    job.save(update_fields=['status', 'results', 'finished'])
+
+
+def _run_config_job_thread(job_pk: int) -> None:
+    try:
+        run_config_job(job_pk)
+    finally:
+        # the thread's connection isn't closed by the request cycle
+        connection.close()
+
+
+def start_config_job(job: ConfigJob) -> None:
+    """
+    Runs the job in a background thread once the transaction that created it commits.
+    """
+    transaction.on_commit(
+        lambda: threading.Thread(target=_run_config_job_thread, args=(job.pk,), daemon=True).start()
+    )
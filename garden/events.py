@@ -0,0 +1,121 @@
+"""
+In-process publish/subscribe of garden updates for the live dashboards.
+
+Each update is encoded as a server-sent event once, when it is published, and the same encoded message is then handed
+to every dashboard subscribed to the garden, so the cost of an update doesn't grow with the number of viewers. Nothing
+is encoded when no dashboard is subscribed to the garden.
+
+Subscribers live on the event loop of the ASGI server while updates are published from the threads that handle device
+requests, so messages are handed to subscribers with call_soon_threadsafe. Since the broker is in-process, a dashboard
+only receives the updates handled by the server process it is connected to.
+"""
+
+import asyncio
+import json
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterable
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+from .formatters import GardenFormatter
+
+GARDEN_EVENT = 'garden'
+RECORDS_EVENT = 'records'
+
+# messages held for a subscriber that isn't keeping up before the oldest are dropped
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+def encode_event(event: str, data) -> bytes:
+    return f'event: {event}\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n'.encode()
+
+
+def _deliver(queue: asyncio.Queue, message: bytes) -> None:
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(message)
+
+
+class Broker:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def has_subscribers(self, garden_id: int) -> bool:
+        return garden_id in self._subscribers
+
+    @contextmanager
+    def subscribe(self, garden_id: int):
+        """
+        Yields a queue that receives the encoded events published for the garden until the context is exited. Must be
+        called from within a running event loop.
+        """
+        subscriber = (asyncio.get_event_loop(), asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE))
+        with self._lock:
+            self._subscribers.setdefault(garden_id, set()).add(subscriber)
+        try:
+            yield subscriber[1]
+        finally:
+            with self._lock:
+                subscribers = self._subscribers[garden_id]
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[garden_id]
+
+    def publish(self, garden_id: int, event: str, get_data: Callable[[], object]) -> None:
+        """
+        Sends an event to every subscriber of the garden. get_data is only called, and the event only encoded, if the
+        garden has subscribers.
+        """
+        with self._lock:
+            subscribers = list(self._subscribers.get(garden_id, ()))
+        if not subscribers:
+            return
+
+        message = encode_event(event, get_data())
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(_deliver, queue, message)
+
+
+broker = Broker()
+
+
+def publish_garden(garden) -> None:
+    """
+    Publishes the garden's connection status once the current transaction commits, rendered the way the garden detail
+    page displays it.
+    """
+
+    def get_data():
+        formatter = GardenFormatter(garden)
+        return {
+            'is_connected': formatter.get_is_connected_element(),
+            'connection_strength': formatter.get_connection_strength_element(),
+            'water_level': formatter.get_water_level_element(),
+            'last_connection_ip': formatter.last_connection_ip,
+            'last_connection_time': formatter.last_connection_time,
+        }
+
+    if broker.has_subscribers(garden.pk):
+        transaction.on_commit(lambda: broker.publish(garden.pk, GARDEN_EVENT, get_data))
+
+
+def publish_records(garden_id: int, records: Iterable) -> None:
+    """
+    Publishes the given watering station records of the garden once the current transaction commits.
+    """
+
+    def get_data():
+        return [
+            {
+                'watering_station': record.watering_station_id,
+                'created': record.created,
+                'moisture_level': record.moisture_level,
+            }
+            for record in records
+        ]
+
+    if broker.has_subscribers(garden_id):
+        transaction.on_commit(lambda: broker.publish(garden_id, RECORDS_EVENT, get_data))
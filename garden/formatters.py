@@ -1,5 +1,10 @@
 
-from typing import Any
+import math
+import re
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+import pytz
 from django.db.models import Model
 
 
@@ -15,19 +20,35 @@ def format_duration(duration: int) -> str:
     return string.strip()
 
 
+DISPLAY_METHOD_PATTERN = re.compile(r'get_(?P<name>\w+)_display')
+
+
 class ModelFormatter:
+    """
+    Wraps a model instance for display. An attribute of the formatter is the result of its get_<attribute>_display
+    method if it has one, and otherwise the attribute of the instance.
+    """
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        # The display methods are installed as properties when the class is created so that templates, which read
+        # these attributes many times per page, don't resolve the method's name on every access.
+        for attr in dir(cls):
+            match = DISPLAY_METHOD_PATTERN.fullmatch(attr)
+            if match is not None and match['name'] not in cls.__dict__:
+                setattr(cls, match['name'], property(getattr(cls, attr)))
+
     def __init__(self, instance: Model) -> None:
         self.instance = instance
 
-    def __getattribute__(self, name: str) -> Any:
-        try:
-            return super().__getattribute__(name)
-        except AttributeError:
-            format_attr = f'get_{name}_display'
-            try:
-                return super().__getattribute__(format_attr)()
-            except AttributeError:
-                return getattr(super().__getattribute__('instance'), name)
+    def __getattr__(self, name: str) -> Any:
+        # only called for attributes that the formatter and its class don't have
+        if name == 'instance':
+            raise AttributeError(name)
+        display = self.__dict__.get(f'get_{name}_display')
+        if display is not None:
+            return display()
+        return getattr(self.instance, name)
 
     def _create_badge(self, id_: str, klass: str, text: str) -> str:
         return f'''
@@ -71,10 +92,10 @@ class GardenFormatter(ModelFormatter):
     WL_LOW_BADGE = 'badge-danger'
 
     def get_is_connected_display(self) -> str:
-        return self.CONNECTED_STR if self.instance.is_connected else self.DISCONNECTED_STR
+        return self.CONNECTED_STR if self.instance.get_is_connected() else self.DISCONNECTED_STR
 
     def get_is_connected_badge_class(self) -> str:
-        return self.CONNECTED_BADGE if self.instance.is_connected else self.DISCONNECTED_BADGE
+        return self.CONNECTED_BADGE if self.instance.get_is_connected() else self.DISCONNECTED_BADGE
 
     def get_is_connected_element(self) -> str:
         return self._create_badge(
@@ -84,29 +105,31 @@ class GardenFormatter(ModelFormatter):
         )
 
     def get_connection_strength_display(self) -> str:
-        if self.instance.connection_strength is None:
+        connection_strength = self.instance.get_connection_strength()
+        if connection_strength is None:
             return NOT_AVAILABLE_MSG
-        elif self.instance.connection_strength >= self.CONN_EXCELLENT:
+        elif connection_strength >= self.CONN_EXCELLENT:
             return self.CONN_EXCELLENT_MSG
-        elif self.instance.connection_strength >= self.CONN_GOOD:
+        elif connection_strength >= self.CONN_GOOD:
             return self.CONN_GOOD_MSG
-        elif self.instance.connection_strength >= self.CONN_OK:
+        elif connection_strength >= self.CONN_OK:
             return self.CONN_OK_MSG
-        elif self.instance.connection_strength >= self.CONN_POOR:
+        elif connection_strength >= self.CONN_POOR:
             return self.CONN_POOR_MSG
         else:
             return self.CONN_BAD_MSG
 
     def get_connection_strength_badge_class(self) -> str:
-        if self.instance.connection_strength is None:
+        connection_strength = self.instance.get_connection_strength()
+        if connection_strength is None:
             return self.CONN_NOT_AVAILABLE_BADGE
-        elif self.instance.connection_strength >= self.CONN_EXCELLENT:
+        elif connection_strength >= self.CONN_EXCELLENT:
             return self.CONN_EXCELLENT_BADGE
-        elif self.instance.connection_strength >= self.CONN_GOOD:
+        elif connection_strength >= self.CONN_GOOD:
             return self.CONN_GOOD_BADGE
-        elif self.instance.connection_strength >= self.CONN_OK:
+        elif connection_strength >= self.CONN_OK:
             return self.CONN_OK_BADGE
-        elif self.instance.connection_strength >= self.CONN_POOR:
+        elif connection_strength >= self.CONN_POOR:
             return self.CONN_POOR_BADGE
         else:
             return self.CONN_BAD_BADGE
@@ -147,6 +170,21 @@ class GardenFormatter(ModelFormatter):
             return ''
         return f'updated {self.instance.time_since_last_connection.days} days ago'
 
+    def get_cache_timeout(self, now: datetime = None) -> Optional[int]:
+        """
+        Returns the number of seconds until the garden's connection status or the time since its last connection would
+        be displayed differently without the garden changing, or None if they never would.
+        """
+        last_connection_time = self.instance.last_connection_time
+        if last_connection_time is None:
+            return None
+
+        now = now or datetime.now(pytz.UTC)
+        changes = [last_connection_time + timedelta(days=(now - last_connection_time).days + 1)]
+        if not self.instance.is_overdue(now):
+            changes.append(last_connection_time + self.instance.update_frequency)
+        return math.ceil((min(changes) - now).total_seconds())
+
     def get_token_display(self) -> str:
         return ' '.join(['Created', str(self.instance.token), '-', TokenFormatter(self.instance.token).uuid])
 
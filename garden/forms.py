@@ -1,10 +1,13 @@
 import datetime
+from typing import Any, Dict
 
+import pytz
 from crispy_forms.bootstrap import FieldWithButtons, FormActions
 from crispy_forms.helper import FormHelper
 from crispy_forms.layout import (HTML, Button, Column, Field, Layout, Row,
                                  Submit)
 from django import forms
+from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db.models import Q
@@ -16,6 +19,7 @@ REQUIRED_FIELD_ERR_MSG = 'This field is required.'
 INVALID_DURATION_ERR_MSG = 'This field must contain a duration greater than 1 second.'
 MIN_VALUE_ERR_MSG = 'This field must be positve.'
 MAX_VALUE_ERR_MSG = 'This field must be less than or equal to 100.'
+INVALID_RANGE_ERR_MSG = 'The start of the range must be before the end.'
 
 
 def validate_duration(duration):
@@ -235,12 +239,59 @@ class NewWateringStationForm(WateringStationForm):
 
 
 class BulkUpdateWateringStationForm(WateringStationForm):
+    """
+    Validates the fields to set on all of a garden's watering stations at once. Only the submitted fields are set,
+    except for status which, like any checkbox, is unchecked when it isn't submitted.
+    """
+
+    class Meta(WateringStationForm.Meta):
+        # images are uploaded per watering station
+        fields = ['moisture_threshold', 'watering_duration', 'plant_type', 'status']
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         for field in self.fields.values():
             field.required = False
 
+    def get_updates(self) -> Dict[str, Any]:
+        return {
+            name: value for name, value in self.cleaned_data.items()
+            if name == 'status' or not self[name].field.widget.value_omitted_from_data(
+                self.data, self.files, self.add_prefix(name))
+        }
+
 
 class DeleteWateringStationForm(DeleteForm):
     FORM_ID = 'deleteWateringStationForm'
     MESSAGE = '<p>Are you sure you want to delete this watering station?</p>'
+
+
+class WateringStationRecordQueryForm(forms.Form):
+    BUCKET_SIZES = {
+        '1m': datetime.timedelta(minutes=1),
+        '5m': datetime.timedelta(minutes=5),
+        '15m': datetime.timedelta(minutes=15),
+        '1h': datetime.timedelta(hours=1),
+        '1d': datetime.timedelta(days=1),
+    }
+
+    start = forms.DateTimeField(required=False)
+    end = forms.DateTimeField(required=False)
+    bucket = forms.ChoiceField(choices=[(key, key) for key in BUCKET_SIZES], required=False)
+
+    def clean_bucket(self):
+        bucket = self.cleaned_data['bucket']
+        return self.BUCKET_SIZES[bucket] if bucket else None
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if self.errors:
+            return cleaned_data
+
+        if cleaned_data['end'] is None:
+            cleaned_data['end'] = datetime.datetime.now(pytz.UTC)
+        if cleaned_data['start'] is None:
+            cleaned_data['start'] = cleaned_data['end'] - settings.WS_RECORDS_RETENTION
+        if cleaned_data['start'] >= cleaned_data['end']:
+            raise ValidationError(INVALID_RANGE_ERR_MSG)
+        return cleaned_data
@@ -0,0 +1,17 @@
+from django.db.models import Func, IntegerField
+
+
+class Epoch(Func):
+    """Number of whole seconds between the Unix epoch and a datetime expression."""
+
+    output_field = IntegerField()
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        # 2440587.5 is the julian day of the Unix epoch. The intermediate value is rounded to whole milliseconds because
+        # julianday is only accurate to a few microseconds, which would otherwise truncate 12:00:00 to 11:59:59.
+        template = 'CAST(ROUND((julianday(%(expressions)s) - 2440587.5) * 86400000) / 1000 AS INTEGER)'
+        return self.as_sql(compiler, connection, template=template, **extra_context)
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        template = 'CAST(FLOOR(EXTRACT(EPOCH FROM %(expressions)s)) AS BIGINT)'
+        return self.as_sql(compiler, connection, template=template, **extra_context)
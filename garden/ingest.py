@@ -0,0 +1,268 @@
+"""
+Write-behind buffering of the watering station records sent by devices.
+
+By default the records of a device request are inserted during the request. With WS_RECORDS_WRITE_BEHIND set, they are
+instead added to an in-process buffer that a flusher thread writes with bulk_create once it holds
+WS_RECORDS_FLUSH_SIZE records or WS_RECORDS_FLUSH_INTERVAL seconds have passed, so that bursts of requests share a few
+large inserts instead of each making their own.
+
+The buffer holds at most WS_RECORDS_BUFFER_SIZE records, counting those that are being written. Requests whose records
+don't fit are rejected with a 503 response and a Retry-After header, so devices back off instead of the buffer growing
+while the database falls behind. The buffer is flushed when the process exits normally, but records that were accepted
+are lost if the process is killed before they are written.
+
+Records of watering stations that were deleted while they were buffered are dropped. If the buffered records can't be
+written together, the records of each garden are written separately so that one garden's records can't keep the others
+from being written, and those that still fail are put back in the buffer to be retried, up to MAX_WRITE_ATTEMPTS times.
+After a flush that leaves records to retry, the flusher thread backs off exponentially from WS_RECORDS_FLUSH_INTERVAL
+before flushing again, so that the retries of a short database outage aren't used up at once.
+"""
+
+import atexit
+import logging
+import os
+import threading
+from collections import defaultdict
+from typing import List, Optional, Tuple
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from .events import broker, publish_records
+from .models import WateringStation, WateringStationRecord
+
+logger = logging.getLogger(__name__)
+
+# number of seconds devices are asked to wait before retrying when the buffer is full
+RETRY_AFTER = 5
+
+# number of flushes that try to write a record before it is dropped
+MAX_WRITE_ATTEMPTS = 3
+
+
+class IngestBufferFull(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Too many readings are waiting to be saved, try again later.'
+    default_code = 'ingest_buffer_full'
+
+    def __init__(self, detail=None, code=None, wait: Optional[int] = RETRY_AFTER) -> None:
+        super().__init__(detail, code)
+        # DRF's exception handler sets the Retry-After header from wait
+        self.wait = wait
+
+
+def write_records(records: List[WateringStationRecord], batch_size: Optional[int] = None) -> None:
+    """
+    Inserts the records and publishes them to the dashboards of their gardens.
+
+    Readings that were already uploaded, e.g. by a retried request, are skipped by the unique constraint on
+    (watering_station, created). The readings of gardens with open dashboards are looked up first, so that those that
+    were already saved aren't published again and charted twice. Gardens without open dashboards, which under WSGI is
+    all of them, are written with the single insert alone.
+    """
+    records_by_key = {}
+    for record in records:
+        records_by_key.setdefault((record.watering_station_id, record.created), record)
+    if not records_by_key:
+        return
+
+    records_by_garden = defaultdict(list)
+    for record in records_by_key.values():
+        garden_id = record.watering_station.garden_id
+        if broker.has_subscribers(garden_id):
+            records_by_garden[garden_id].append(record)
+
+    with transaction.atomic():
+        if records_by_garden:
+            keys = [(record.watering_station_id, record.created)
+                    for garden_records in records_by_garden.values() for record in garden_records]
+            existing = set(
+                WateringStationRecord.objects
+                .filter(watering_station_id__in={station_id for station_id, _ in keys},
+                        created__gte=min(created for _, created in keys),
+                        created__lte=max(created for _, created in keys))
+                .values_list('watering_station_id', 'created')
+            )
+        # conflicts are still ignored in case another request inserts the same readings concurrently
+        WateringStationRecord.objects.bulk_create(list(records_by_key.values()), batch_size=batch_size,
+                                                  ignore_conflicts=True)
+
+        for garden_id, garden_records in records_by_garden.items():
+            new_records = [record for record in garden_records
+                           if (record.watering_station_id, record.created) not in existing]
+            if new_records:
+                publish_records(garden_id, new_records)
+
+
+class IngestBuffer:
+    """
+    A bounded buffer of watering station records that a flusher thread writes in batches once started.
+    """
+
+    def __init__(self, max_size: int, flush_size: int, flush_interval: float) -> None:
+        self.max_size = max_size
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        # (record, number of failed attempts to write it) pairs
+        self._records = []
+        # the number of records that are buffered or being written, which is what bounds the memory used
+        self._size = 0
+        # the number of records put since the last flush, which trigger a flush once there are flush_size of them
+        self._num_put = 0
+        # seconds the flusher thread waits before the next flush, which is only set while retrying failed records
+        self._retry_delay = None
+        self._stopping = False
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    def put(self, records: List[WateringStationRecord]) -> None:
+        """
+        Adds the records of a request to the buffer. Raises IngestBufferFull without adding any of them if they don't
+        fit.
+        """
+        with self._condition:
+            if self._size + len(records) > self.max_size:
+                raise IngestBufferFull()
+            self._records.extend((record, 0) for record in records)
+            self._size += len(records)
+            self._num_put += len(records)
+            if self._num_put >= self.flush_size:
+                self._condition.notify()
+
+    def flush(self) -> int:
+        """
+        Writes the buffered records, returning how many were written.
+        """
+        with self._flush_lock:
+            with self._condition:
+                entries, self._records = self._records, []
+                self._num_put = 0
+            if not entries:
+                return 0
+
+            num_written, failed = self._write(entries)
+            retries = [(record, attempts + 1) for record, attempts in failed if attempts + 1 < MAX_WRITE_ATTEMPTS]
+            if len(retries) < len(failed):
+                logger.error('Dropped %d buffered watering station records after %d failed attempts to write them',
+                             len(failed) - len(retries), MAX_WRITE_ATTEMPTS)
+            with self._condition:
+                # put back in front of the records buffered since, which were taken later
+                self._records[:0] = retries
+                self._size -= len(entries) - len(retries)
+                self._retry_delay = (
+                    self.flush_interval * 2 ** (max(attempts for _, attempts in retries) - 1) if retries else None
+                )
+            return num_written
+
+    def _write(self, entries: List[Tuple[WateringStationRecord, int]]) -> Tuple[int, List]:
+        """
+        Writes the records of the entries, returning the number of records written and the entries that failed.
+        """
+        try:
+            return self._write_existing([record for record, _ in entries]), []
+        except Exception as e:
+            error = e
+
+        entries_by_garden = defaultdict(list)
+        for entry in entries:
+            entries_by_garden[entry[0].watering_station.garden_id].append(entry)
+
+        num_written = 0
+        failed = []
+        failed_gardens = 0
+        for garden_entries in entries_by_garden.values():
+            try:
+                num_written += self._write_existing([record for record, _ in garden_entries])
+            except Exception as e:
+                error = e
+                failed.extend(garden_entries)
+                failed_gardens += 1
+
+        # logged once per flush, since during an outage the records of every garden fail on every flush
+        if failed:
+            logger.error('Failed to write %d buffered watering station records of %d gardens', len(failed),
+                         failed_gardens, exc_info=error)
+        else:
+            logger.warning('Wrote the buffered watering station records of each garden separately after failing to '
+                           'write them together', exc_info=error)
+        return num_written, failed
+
+    def _write_existing(self, records: List[WateringStationRecord]) -> int:
+        """
+        Writes the records of watering stations that still exist, returning how many there were.
+        """
+        watering_station_pks = set(
+            WateringStation.objects
+            .filter(pk__in={record.watering_station_id for record in records})
+            .values_list('pk', flat=True)
+        )
+        existing = [record for record in records if record.watering_station_id in watering_station_pks]
+        if len(existing) < len(records):
+            logger.warning('Dropped %d buffered records of deleted watering stations', len(records) - len(existing))
+        write_records(existing, batch_size=self.flush_size)
+        return len(existing)
+
+    def start(self) -> None:
+        """
+        Starts the flusher thread, which flushes the buffer once more when the process exits.
+        """
+        self._thread = threading.Thread(target=self._run, name='ingest-buffer-flusher', daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self) -> None:
+        """
+        Stops the flusher thread and writes the records that are still buffered.
+        """
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+            atexit.unregister(self.stop)
+        self.flush()
+
+    def _run(self) -> None:
+        try:
+            while True:
+                with self._condition:
+                    if self._retry_delay is not None:
+                        # records put while backing off wait for the retry instead of triggering a flush
+                        self._condition.wait_for(lambda: self._stopping, timeout=self._retry_delay)
+                    else:
+                        self._condition.wait_for(lambda: self._stopping or self._num_put >= self.flush_size,
+                                                 timeout=self.flush_interval)
+                    if self._stopping:
+                        return
+                # the thread's connection isn't closed by the request cycle, so recover from expired or broken ones
+                close_old_connections()
+                self.flush()
+        finally:
+            connection.close()
+
+
+_buffer = None
+_buffer_pid = None
+_buffer_lock = threading.Lock()
+
+
+def get_record_buffer() -> IngestBuffer:
+    """
+    Returns the process's record buffer, creating it and starting its flusher thread on first use. A process forked
+    after the buffer was created gets a buffer of its own, since threads don't survive a fork.
+    """
+    global _buffer, _buffer_pid
+    with _buffer_lock:
+        if _buffer is None or _buffer_pid != os.getpid():
+            _buffer = IngestBuffer(settings.WS_RECORDS_BUFFER_SIZE, settings.WS_RECORDS_FLUSH_SIZE,
+                                   settings.WS_RECORDS_FLUSH_INTERVAL)
+            _buffer_pid = os.getpid()
+            _buffer.start()
+        return _buffer
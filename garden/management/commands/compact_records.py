@@ -0,0 +1,24 @@
+from datetime import datetime, timedelta
+
+import pytz
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from garden.models import WateringStationRecordRollup
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the hourly and daily rollups of recent watering station records.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=None,
+                            help='Number of hours of records to compact. Defaults to, and is limited to, the '
+                                 'WS_RECORDS_RETENTION setting, since rollups are rebuilt from unpruned records.')
+
+    def handle(self, *args, **options):
+        lookback = settings.WS_RECORDS_RETENTION
+        if options['hours'] is not None:
+            lookback = min(lookback, timedelta(hours=options['hours']))
+        end = datetime.now(pytz.UTC)
+        num_written = WateringStationRecordRollup.objects.compact(end - lookback, end)
+        self.stdout.write(f'Wrote {num_written} watering station record rollups since {end - lookback}.')
@@ -0,0 +1,15 @@
+from datetime import datetime
+
+import pytz
+from django.core.management.base import BaseCommand
+
+from garden.models import Garden
+
+
+class Command(BaseCommand):
+    help = 'Marks gardens that have not sent an update within their update frequency as disconnected.'
+
+    def handle(self, *args, **options):
+        now = datetime.now(pytz.UTC)
+        garden_pks = Garden.objects.disconnect_overdue(now)
+        self.stdout.write(f'Marked {len(garden_pks)} overdue gardens as disconnected.')
@@ -0,0 +1,16 @@
+from datetime import datetime
+
+import pytz
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from garden.models import ConfigJob
+
+
+class Command(BaseCommand):
+    help = 'Marks configuration jobs that have been pending or running for longer than CONFIG_JOB_TIMEOUT as failed.'
+
+    def handle(self, *args, **options):
+        now = datetime.now(pytz.UTC)
+        num_updated = ConfigJob.objects.fail_stale(now, settings.CONFIG_JOB_TIMEOUT)
+        self.stdout.write(f'Marked {num_updated} stale configuration jobs as failed.')
@@ -0,0 +1,29 @@
+from datetime import datetime
+
+import pytz
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from garden import partitioning
+
+
+class Command(BaseCommand):
+    help = 'Creates upcoming daily partitions of the watering station record table when partitioning is enabled.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days-ahead', type=int, default=settings.WS_RECORDS_PARTITIONS_AHEAD,
+                            help='Number of days after today to create partitions for. Defaults to the '
+                                 'WS_RECORDS_PARTITIONS_AHEAD setting.')
+
+    def handle(self, *args, **options):
+        if not partitioning.is_enabled():
+            self.stdout.write('Watering station record partitioning is disabled, so there is nothing to do.')
+            return
+
+        if not partitioning.is_partitioned():
+            self.stderr.write('The watering station record table is not partitioned. See the README to convert it.')
+            return
+
+        today = datetime.now(pytz.UTC).date()
+        num_created = partitioning.ensure_partitions(today, today + options['days_ahead'] * partitioning.PARTITION_SIZE)
+        self.stdout.write(f'Created {num_created} watering station record partitions.')
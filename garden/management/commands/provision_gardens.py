@@ -0,0 +1,67 @@
+import csv
+import json
+import os
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+
+from garden.parsers import CSVParser
+from garden.serializers import GardenProvisionSerializer
+
+PARSERS = {'.csv': CSVParser, '.json': JSONParser}
+
+
+class Command(BaseCommand):
+    help = ('Creates the gardens of a CSV or JSON manifest for a user in bulk, and writes the API key of each garden to '
+            'an output file.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('email', help='Email of the user that will own the gardens.')
+        parser.add_argument('manifest', type=Path,
+                            help='A .csv file with a header row, or a .json file with a list of objects, giving the '
+                                 'name and optionally the update_frequency and num_watering_stations of each garden.')
+        parser.add_argument('--output', type=Path, required=True,
+                            help='New file to write the name and API key of each garden to as CSV. It is only '
+                                 'readable by its owner.')
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Number of threads that hash the API keys.')
+
+    def handle(self, *args, **options):
+        try:
+            owner = get_user_model().objects.get(email__iexact=options['email'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"No user has the email {options['email']}.")
+
+        manifest = options['manifest']
+        parser = PARSERS.get(manifest.suffix.lower())
+        if parser is None:
+            raise CommandError('The manifest must be a .csv or .json file.')
+        try:
+            with manifest.open('rb') as stream:
+                data = parser().parse(stream)
+        except (OSError, ParseError) as exc:
+            raise CommandError(f'Could not read the manifest: {exc}')
+
+        serializer = GardenProvisionSerializer(data=data, many=True, context={
+            'owner': owner,
+            'workers': options['workers'],
+        })
+        if not serializer.is_valid():
+            raise CommandError(f'The manifest is invalid: {json.dumps(serializer.errors)}')
+
+        try:
+            fd = os.open(options['output'], os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except OSError as exc:
+            raise CommandError(f'Could not create the output file: {exc}')
+        # the keys are written before the gardens are committed so that they can't be lost to a failed write
+        with transaction.atomic(), open(fd, 'w', newline='') as output:
+            writer = csv.writer(output)
+            writer.writerow(['name', 'api_key'])
+            gardens = serializer.save()
+            writer.writerows((garden.name, key) for garden, key in gardens)
+
+        self.stdout.write(f"Created {len(gardens)} gardens. Their API keys were written to {options['output']}.")
@@ -0,0 +1,29 @@
+from datetime import datetime, timedelta
+
+import pytz
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from garden import partitioning
+from garden.models import WateringStationRecord
+
+
+class Command(BaseCommand):
+    help = 'Deletes watering station records that are older than the configured retention period.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=None,
+                            help='Retention period in hours. Defaults to the WS_RECORDS_RETENTION setting.')
+        parser.add_argument('--batch-size', type=int, default=settings.WS_RECORDS_PRUNE_BATCH_SIZE,
+                            help='Maximum number of records deleted per DELETE statement.')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('The batch size must be at least 1.')
+        retention = settings.WS_RECORDS_RETENTION if options['hours'] is None else timedelta(hours=options['hours'])
+        cut_off_time = datetime.now(pytz.UTC) - retention
+        if partitioning.is_enabled():
+            num_dropped = partitioning.drop_partitions_before(cut_off_time)
+            self.stdout.write(f'Dropped {num_dropped} watering station record partitions before {cut_off_time}.')
+        num_deleted = WateringStationRecord.objects.prune(cut_off_time, options['batch_size'])
+        self.stdout.write(f'Deleted {num_deleted} watering station records created before {cut_off_time}.')
@@ -1,11 +1,228 @@
-from django.db import models
+from datetime import datetime, timedelta
+from typing import List
 
+import pytz
+from django.apps import apps
 from django.contrib.auth.hashers import make_password
+from django.db import models, transaction
+from django.db.models import (Avg, Count, DateTimeField, ExpressionWrapper, F,
+                              FloatField, Max, Min, Prefetch, Q, Sum, Value,
+                              Window)
+from django.db.models.functions import RowNumber
+
+from .cache import bump_garden_version
+from .events import broker, publish_garden
+from .functions import Epoch
+from .utils import calc_times_till_next_update, ceil_datetime, floor_datetime
 
 
 class TokenManager(models.Manager):
     def create(self, garden, uuid=None):
         hashed_uuid = make_password(uuid)
-        token = self.model(garden=garden, uuid=hashed_uuid)
+        prefix = '' if uuid is None else self.model.get_key_prefix(uuid)
+        token = self.model(garden=garden, prefix=prefix, uuid=hashed_uuid)
         token.save()
         return token
+
+
+class GardenQuerySet(models.QuerySet):
+    def overdue(self, now: datetime) -> models.QuerySet:
+        """
+        Filters for gardens that have connected before but haven't sent an update within their update frequency.
+        """
+        cut_off_time = ExpressionWrapper(
+            Value(now, output_field=DateTimeField()) - F('update_frequency'),
+            output_field=DateTimeField()
+        )
+        return self.filter(last_connection_time__lt=cut_off_time)
+
+    def disconnect_overdue(self, now: datetime) -> List[int]:
+        """
+        Marks every overdue garden that isn't already marked as disconnected as disconnected with a single UPDATE,
+        returning the pks of the gardens that were updated. The UPDATE doesn't send post_save, so the gardens' cached
+        pages are invalidated and their open dashboards updated here once it commits.
+        """
+        with transaction.atomic():
+            garden_pks = list(
+                self.overdue(now)
+                .filter(Q(is_connected=True) | Q(connection_strength__isnull=False))
+                .select_for_update()
+                .values_list('pk', flat=True)
+            )
+            if not garden_pks:
+                return garden_pks
+            self.filter(pk__in=garden_pks).update(is_connected=False, connection_strength=None)
+
+            def bump_garden_versions():
+                for garden_pk in garden_pks:
+                    bump_garden_version(garden_pk)
+
+            transaction.on_commit(bump_garden_versions)
+            # gardens are only loaded to render the updates of those with open dashboards
+            subscribed_pks = [garden_pk for garden_pk in garden_pks if broker.has_subscribers(garden_pk)]
+            for garden in self.filter(pk__in=subscribed_pks):
+                publish_garden(garden)
+        return garden_pks
+
+    def get_times_till_next_update(self, now: datetime) -> dict:
+        """
+        Returns a dict mapping the pk of each garden to the number of seconds until its next expected update, without
+        instantiating any gardens.
+        """
+        return calc_times_till_next_update(self.values_list('pk', 'last_connection_time', 'update_frequency'), now)
+
+    def with_summary(self) -> models.QuerySet:
+        """
+        Loads everything needed to summarize each garden - its token, the number of watering stations, the number of
+        active watering stations and the plant types - in a fixed number of queries regardless of how many gardens or
+        watering stations there are.
+        """
+        watering_station_model = self.model._meta.get_field('watering_stations').related_model
+        planted_watering_stations = (
+            watering_station_model.objects
+            .exclude(plant_type__exact='')
+            .only('garden', 'plant_type')
+        )
+        return (
+            self.select_related('token')
+            .annotate(
+                num_watering_stations=Count('watering_stations'),
+                num_active_watering_stations=Count('watering_stations', filter=Q(watering_stations__status=True))
+            )
+            .prefetch_related(Prefetch('watering_stations', queryset=planted_watering_stations,
+                                       to_attr='planted_watering_stations'))
+        )
+
+
+class WateringStationQuerySet(models.QuerySet):
+    def with_idx(self) -> models.QuerySet:
+        """
+        Annotates each watering station with its idx within its garden. The row number is computed over the filtered
+        rows, so this should only be applied to querysets containing all of a garden's watering stations.
+        """
+        return self.annotate(annotated_idx=Window(
+            expression=RowNumber(),
+            partition_by=[F('garden')],
+            order_by=[F('created').asc(), F('pk').asc()]
+        ) - 1)
+
+
+class WateringStationRecordManager(models.Manager):
+    def prune(self, cut_off_time: datetime, batch_size: int) -> int:
+        """
+        Deletes all records created before cut_off_time, issuing one DELETE per batch of at most batch_size rows so
+        that a large backlog of expired records does not hold a long running lock on the table. Raises ValueError if
+        batch_size is less than 1.
+        """
+        if batch_size < 1:
+            raise ValueError('batch_size must be at least 1')
+        total = 0
+        while True:
+            batch = self.filter(created__lt=cut_off_time).order_by('created').values('pk')[:batch_size]
+            num_deleted, _ = self.filter(pk__in=batch).delete()
+            total += num_deleted
+            if num_deleted < batch_size:
+                return total
+
+    def in_range(self, start: datetime, end: datetime) -> models.QuerySet:
+        return self.filter(created__gte=start, created__lt=end)
+
+    def downsample(self, start: datetime, end: datetime, bucket_size: timedelta) -> models.QuerySet:
+        """
+        Aggregates the moisture levels of the records created between start and end into buckets of bucket_size,
+        returning (bucket start epoch seconds, min, avg, max) tuples ordered by time.
+        """
+        seconds = int(bucket_size.total_seconds())
+        return (
+            self.in_range(start, end)
+            .annotate(bucket=Epoch('created') / seconds * seconds)
+            .values('bucket')
+            .annotate(min=Min('moisture_level'), avg=Avg('moisture_level'), max=Max('moisture_level'))
+            .order_by('bucket')
+            .values_list('bucket', 'min', 'avg', 'max')
+        )
+
+
+class WateringStationRecordRollupManager(models.Manager):
+    def compact(self, start: datetime, end: datetime) -> int:
+        """
+        Recomputes the hourly rollups of every watering station from the records created in the whole hours between
+        start and end, then recomputes the daily rollups of the days overlapping those hours from the hourly rollups.
+        Since rollups are rebuilt from the records, start should not be earlier than the oldest record that hasn't been
+        pruned. Returns the number of rollups written.
+        """
+        hour = self.model.RESOLUTION_INTERVALS[self.model.HOUR]
+        day = self.model.RESOLUTION_INTERVALS[self.model.DAY]
+        hour_start, hour_end = ceil_datetime(start, hour), ceil_datetime(end, hour)
+        day_start, day_end = floor_datetime(hour_start, day), ceil_datetime(hour_end, day)
+        WateringStationRecord = apps.get_model('garden', 'WateringStationRecord')
+
+        with transaction.atomic():
+            hourly = (
+                WateringStationRecord.objects.in_range(hour_start, hour_end)
+                .annotate(bucket=Epoch('created') / int(hour.total_seconds()) * int(hour.total_seconds()))
+                .values('watering_station', 'bucket')
+                .annotate(min=Min('moisture_level'), max=Max('moisture_level'), sum=Sum('moisture_level'),
+                          num=Count('pk'))
+                .order_by()
+            )
+            num_written = self._replace(self.model.HOUR, hour_start, hour_end, hourly)
+
+            daily = (
+                self.filter(resolution=self.model.HOUR, period_start__gte=day_start, period_start__lt=day_end)
+                .annotate(bucket=Epoch('period_start') / int(day.total_seconds()) * int(day.total_seconds()))
+                .values('watering_station', 'bucket')
+                .annotate(min=Min('min_moisture_level'), max=Max('max_moisture_level'), sum=Sum('sum_moisture_level'),
+                          num=Sum('count'))
+                .order_by()
+            )
+            num_written += self._replace(self.model.DAY, day_start, day_end, daily)
+        return num_written
+
+    def _replace(self, resolution: str, start: datetime, end: datetime, rows) -> int:
+        rollups = [
+            self.model(
+                watering_station_id=row['watering_station'],
+                resolution=resolution,
+                period_start=datetime.fromtimestamp(row['bucket'], pytz.UTC),
+                min_moisture_level=row['min'],
+                max_moisture_level=row['max'],
+                sum_moisture_level=row['sum'],
+                count=row['num']
+            )
+            for row in rows
+        ]
+        self.filter(resolution=resolution, period_start__gte=start, period_start__lt=end).delete()
+        return len(self.bulk_create(rollups))
+
+    def downsample(self, start: datetime, end: datetime, bucket_size: timedelta) -> models.QuerySet:
+        """
+        Aggregates the rollups of the coarsest resolution that bucket_size is a multiple of into buckets of bucket_size,
+        returning (bucket start epoch seconds, min, avg, max) tuples ordered by time like
+        WateringStationRecordManager.downsample.
+        """
+        seconds = int(bucket_size.total_seconds())
+        return (
+            self.filter(resolution=self.model.get_resolution(bucket_size), period_start__gte=start,
+                        period_start__lt=end)
+            .annotate(bucket=Epoch('period_start') / seconds * seconds)
+            .values('bucket')
+            .annotate(min=Min('min_moisture_level'),
+                      avg=ExpressionWrapper(Sum('sum_moisture_level') / Sum('count'), output_field=FloatField()),
+                      max=Max('max_moisture_level'))
+            .order_by('bucket')
+            .values_list('bucket', 'min', 'avg', 'max')
+        )
+
+
+class ConfigJobQuerySet(models.QuerySet):
+    def fail_stale(self, now: datetime, timeout: timedelta) -> int:
+        """
+        Marks pending and running jobs that were created more than timeout before now as failed in a single UPDATE,
+        returning the number of jobs that were updated. Jobs only run in the server process that created them, so these
+        were interrupted, e.g. by the process restarting, and won't finish.
+        """
+        return (
+            self.filter(status__in=[self.model.PENDING, self.model.RUNNING], created__lt=now - timeout)
+            .update(status=self.model.FAILED, finished=now)
+        )
@@ -0,0 +1,23 @@
+# Generated by Django 3.1.6 on 2026-10-18 14:17
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('garden', '0008_auto_20210318_2347'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='wateringstationrecord',
+            index=models.Index(fields=['watering_station', 'created'], name='garden_wsr_station_created'),
+        ),
+        migrations.AlterField(
+            model_name='wateringstationrecord',
+            name='watering_station',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='records', to='garden.wateringstation'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.1.6 on 2026-10-18 14:18
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('garden', '0009_auto_20261018_1417'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='wateringstation',
+            options={'ordering': ['created', 'pk']},
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 3.1.6 on 2026-10-18 14:27
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('garden', '0010_auto_20261018_1418'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WateringStationRecordRollup',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resolution', models.CharField(choices=[('h', 'Hour'), ('d', 'Day')], max_length=1)),
+                ('period_start', models.DateTimeField()),
+                ('min_moisture_level', models.FloatField()),
+                ('max_moisture_level', models.FloatField()),
+                ('sum_moisture_level', models.FloatField()),
+                ('count', models.PositiveIntegerField()),
+                ('watering_station', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='rollups', to='garden.wateringstation')),
+            ],
+            options={
+                'ordering': ['period_start'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='wateringstationrecordrollup',
+            constraint=models.UniqueConstraint(fields=('watering_station', 'resolution', 'period_start'), name='garden_wsrr_station_resolution_period'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 3.1.6 on 2026-10-18 14:30
+
+from django.db import migrations, models
+import garden.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('garden', '0011_auto_20261018_1427'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='wateringstationrecord',
+            name='garden_wsr_station_created',
+        ),
+        migrations.AlterField(
+            model_name='wateringstationrecord',
+            name='created',
+            field=models.DateTimeField(default=garden.models._default_record_created),
+        ),
+        migrations.AddConstraint(
+            model_name='wateringstationrecord',
+            constraint=models.UniqueConstraint(fields=('watering_station', 'created'), name='garden_wsr_station_created'),
+        ),
+    ]
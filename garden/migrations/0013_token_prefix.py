@@ -0,0 +1,18 @@
+# Generated by Django 3.1.6 on 2026-10-18 14:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('garden', '0012_auto_20261018_1430'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='token',
+            name='prefix',
+            field=models.CharField(blank=True, db_index=True, max_length=16),
+        ),
+    ]
@@ -1,15 +1,22 @@
+import secrets
 from datetime import datetime, timedelta
 
 import pytz
 from django.conf import settings
 from django.contrib.auth.hashers import check_password
 from django.db import models
+from django.db.models import Q
 from django.urls import reverse
 from rest_framework.request import Request
 
 from garden.formatters import WateringStationFormatter
 
-from .managers import TokenManager
+from .cache import (bump_garden_version, invalidate_watering_station_configs,
+                    is_token_verified, set_token_verified)
+from .managers import (ConfigJobQuerySet, GardenQuerySet, TokenManager,
+                       WateringStationQuerySet, WateringStationRecordManager,
+                       WateringStationRecordRollupManager)
+from .utils import calc_time_till_next_update, floor_datetime, make_etag
 
 
 def _default_moisture_threshold():
@@ -36,6 +43,10 @@ def _default_garden_image():
     return 'default_garden.jpg'
 
 
+def _default_record_created():
+    return datetime.now(pytz.UTC)
+
+
 class Garden(models.Model):
     OK = 'ok'
     LOW = 'lo'
@@ -54,6 +65,8 @@ class Garden(models.Model):
     connection_strength = models.SmallIntegerField(null=True)
     water_level = models.CharField(choices=WATER_LEVEL_CHOICES, max_length=2, null=True)
 
+    objects = GardenQuerySet.as_manager()
+
     class Meta:
         unique_together = ['owner', 'name']
 
@@ -72,15 +85,11 @@ class Garden(models.Model):
     def get_delete_url(self):
         return reverse('garden-delete', kwargs={'pk': self.pk})
 
+    def get_events_url(self):
+        return reverse('garden-events', kwargs={'pk': self.pk})
+
     def calc_time_till_next_update(self):
-        if self.last_connection_time is None:
-            return None
-        factor = 1
-        next_update = self.last_connection_time + factor * self.update_frequency - datetime.now(pytz.UTC)
-        while next_update.total_seconds() < 0:
-            factor += 1
-            next_update = self.last_connection_time + factor * self.update_frequency - datetime.now(pytz.UTC)
-        return int(next_update.total_seconds())
+        return calc_time_till_next_update(self.last_connection_time, self.update_frequency, datetime.now(pytz.UTC))
 
     def update_connection_status(self, request: Request):
         self.is_connected = True
@@ -88,38 +97,70 @@ class Garden(models.Model):
         self.last_connection_time = datetime.now(pytz.UTC)
         self.save()
 
-    def refresh_connection_status(self):
+    def is_overdue(self, now: datetime = None) -> bool:
         if self.last_connection_time is None:
-            return
+            return False
+        now = now or datetime.now(pytz.UTC)
+        return self.last_connection_time + self.update_frequency < now
 
-        time_next_update = self.last_connection_time + self.update_frequency - datetime.now(pytz.UTC)
-        if time_next_update.total_seconds() < 0:
-            self.is_connected = False
-            self.connection_strength = None
-            self.save()
+    def get_is_connected(self) -> bool:
+        return self.is_connected and not self.is_overdue()
+
+    def get_connection_strength(self):
+        return None if self.is_overdue() else self.connection_strength
+
+    def get_config_etag(self) -> str:
+        return make_etag(self.update_frequency)
+
+    def get_watering_station_configs_etag(self) -> str:
+        return make_etag(*self.watering_stations.values_list(*WateringStation.CONFIG_FIELDS))
+
+    def update_watering_stations(self, **fields) -> int:
+        """
+        Sets the fields on all of the garden's watering stations with a single UPDATE, returning the number of watering
+        stations. QuerySet.update() doesn't send signals, so the caches that they would invalidate are invalidated here.
+        """
+        num_updated = self.watering_stations.update(**fields)
+        invalidate_watering_station_configs(self.pk)
+        bump_garden_version(self.pk)
+        return num_updated
 
     def get_watering_station_formatters(self):
-        for watering_station in self.watering_stations.all():
+        for watering_station in self.watering_stations.with_idx():
             yield WateringStationFormatter(watering_station)
 
     def get_watering_station_idx(self, watering_station) -> int:
-        for i, station in enumerate(self.watering_stations.all()):
-            if station == watering_station:
-                return i
+        if watering_station.pk is None or watering_station.garden_id != self.pk:
+            return None
+        return self.watering_stations.filter(
+            Q(created__lt=watering_station.created) | Q(created=watering_station.created, pk__lt=watering_station.pk)
+        ).count()
 
     def get_watering_station_at_idx(self, idx):
-        for i, station in enumerate(self.watering_stations.all()):
-            if i == idx:
-                return station
+        if idx < 0:
+            return None
+        try:
+            return self.watering_stations.all()[idx]
+        except IndexError:
+            return None
 
     def get_active_watering_stations(self):
         return self.watering_stations.filter(status=True)
 
+    def get_num_watering_stations(self):
+        if hasattr(self, 'num_watering_stations'):
+            return self.num_watering_stations
+        return self.watering_stations.count()
+
     def get_num_active_watering_stations(self):
+        if hasattr(self, 'num_active_watering_stations'):
+            return self.num_active_watering_stations
         return self.get_active_watering_stations().count()
 
     @property
     def plant_types(self):
+        if hasattr(self, 'planted_watering_stations'):
+            return [watering_station.plant_type for watering_station in self.planted_watering_stations]
         return self.watering_stations.exclude(plant_type__exact='').values_list('plant_type', flat=True)
 
     @property
@@ -132,8 +173,12 @@ class Garden(models.Model):
 
 class Token(models.Model):
     MAX_HASH_LENGTH = 128
+    PREFIX_LENGTH = 16
+    KEY_SEPARATOR = '.'
 
     garden = models.OneToOneField(Garden, on_delete=models.CASCADE)
+    # public part of the API key for finding its token, empty for keys issued before keys had prefixes
+    prefix = models.CharField(max_length=PREFIX_LENGTH, blank=True, db_index=True)
     uuid = models.CharField(max_length=MAX_HASH_LENGTH)
     created = models.DateTimeField(auto_now_add=True)
 
@@ -142,11 +187,33 @@ class Token(models.Model):
     def __str__(self):
         return self.created.strftime('%B %-d, %Y %-I:%M %p')
 
+    @classmethod
+    def generate_key(cls) -> str:
+        return f'{secrets.token_hex(cls.PREFIX_LENGTH // 2)}{cls.KEY_SEPARATOR}{secrets.token_hex()}'
+
+    @classmethod
+    def get_key_prefix(cls, key: str) -> str:
+        """
+        Returns the public prefix of an API key, or an empty string if the key doesn't have one.
+        """
+        prefix, separator, _ = key.partition(cls.KEY_SEPARATOR)
+        return prefix if separator and len(prefix) == cls.PREFIX_LENGTH else ''
+
     def verify(self, uuid):
-        return check_password(uuid, self.uuid)
+        if uuid is None:
+            return False
+        if is_token_verified(self, uuid):
+            return True
+
+        is_valid = check_password(uuid, self.uuid)
+        if is_valid:
+            set_token_verified(self, uuid)
+        return is_valid
 
 
 class WateringStation(models.Model):
+    CONFIG_FIELDS = ['pk', 'status', 'moisture_threshold', 'watering_duration']
+
     garden = models.ForeignKey(Garden, related_name='watering_stations', on_delete=models.CASCADE)
     image = models.ImageField(null=True, blank=True)
     moisture_threshold = models.IntegerField(default=_default_moisture_threshold)
@@ -155,39 +222,151 @@ class WateringStation(models.Model):
     status = models.BooleanField(default=_default_status)
     created = models.DateTimeField(auto_now_add=True)
 
+    objects = WateringStationQuerySet.as_manager()
+
     class Meta:
-        ordering = ['created']
+        ordering = ['created', 'pk']
 
     def __str__(self):
         return f'{str(self.garden)} - {self.idx}'
 
     def get_absolute_url(self):
-        return reverse('watering-station-detail', kwargs={'garden_pk': self.garden.pk, 'ws_pk': self.pk})
+        return reverse('watering-station-detail', kwargs={'garden_pk': self.garden_id, 'ws_pk': self.pk})
 
     def get_update_url(self):
-        return reverse('watering-station-update', kwargs={'garden_pk': self.garden.pk, 'ws_pk': self.pk})
+        return reverse('watering-station-update', kwargs={'garden_pk': self.garden_id, 'ws_pk': self.pk})
 
     def get_delete_url(self):
-        return reverse('watering-station-delete', kwargs={'garden_pk': self.garden.pk, 'ws_pk': self.pk})
+        return reverse('watering-station-delete', kwargs={'garden_pk': self.garden_id, 'ws_pk': self.pk})
 
     def get_records_url(self):
-        return reverse('watering-station-record-list', kwargs={'garden_pk': self.garden.pk, 'ws_pk': self.pk})
+        return reverse('watering-station-record-list', kwargs={'garden_pk': self.garden_id, 'ws_pk': self.pk})
+
+    def get_events_url(self):
+        return reverse('garden-events', kwargs={'pk': self.garden_id})
 
     @property
     def idx(self):
+        if hasattr(self, 'annotated_idx'):
+            return self.annotated_idx
         return self.garden.get_watering_station_idx(self)
 
     def get_formatter(self):
         return WateringStationFormatter(self)
 
+    def downsample_records(self, start: datetime, end: datetime, bucket_size: timedelta) -> list:
+        """
+        Returns (bucket start epoch seconds, min, avg, max) tuples of the moisture levels recorded between start and
+        end. Buckets that ended before the record retention period are read from the coarsest rollup that divides
+        bucket_size, while newer buckets, including the one that the start of the retention period falls in, are read
+        from the records themselves, since the rollups of a bucket aren't complete until it has been compacted after it
+        ended.
+        """
+        if WateringStationRecordRollup.get_resolution(bucket_size) is None:
+            return list(self.records.downsample(start, end, bucket_size))
+
+        retention_start = floor_datetime(datetime.now(pytz.UTC) - settings.WS_RECORDS_RETENTION, bucket_size)
+        split = min(max(start, retention_start), end)
+        rollup_buckets = self.rollups.downsample(start, split, bucket_size)
+        record_buckets = self.records.downsample(split, end, bucket_size)
+        return list(rollup_buckets) + list(record_buckets)
+
 
 class WateringStationRecord(models.Model):
-    watering_station = models.ForeignKey(WateringStation, related_name='records', on_delete=models.CASCADE)
+    # the unique constraint below covers lookups by watering_station alone, so the foreign key needs no index of its own
+    watering_station = models.ForeignKey(WateringStation, related_name='records', on_delete=models.CASCADE,
+                                         db_index=False)
     moisture_level = models.FloatField()
-    created = models.DateTimeField(auto_now_add=True)
+    # devices that buffer readings while offline send the time each reading was taken
+    created = models.DateTimeField(default=_default_record_created)
+
+    objects = WateringStationRecordManager()
 
     class Meta:
         ordering = ['created']
+        constraints = [
+            models.UniqueConstraint(fields=['watering_station', 'created'], name='garden_wsr_station_created'),
+        ]
 
     def __str__(self):
         return f'{self.watering_station.garden}/{self.watering_station.idx}/{self.created}'
+
+
+class WateringStationRecordRollup(models.Model):
+    HOUR = 'h'
+    DAY = 'd'
+    RESOLUTION_CHOICES = [
+        (HOUR, 'Hour'),
+        (DAY, 'Day'),
+    ]
+    RESOLUTION_INTERVALS = {
+        HOUR: timedelta(hours=1),
+        DAY: timedelta(days=1),
+    }
+
+    watering_station = models.ForeignKey(WateringStation, related_name='rollups', on_delete=models.CASCADE,
+                                         db_index=False)
+    resolution = models.CharField(choices=RESOLUTION_CHOICES, max_length=1)
+    period_start = models.DateTimeField()
+    min_moisture_level = models.FloatField()
+    max_moisture_level = models.FloatField()
+    sum_moisture_level = models.FloatField()
+    count = models.PositiveIntegerField()
+
+    objects = WateringStationRecordRollupManager()
+
+    class Meta:
+        ordering = ['period_start']
+        constraints = [
+            models.UniqueConstraint(fields=['watering_station', 'resolution', 'period_start'],
+                                    name='garden_wsrr_station_resolution_period'),
+        ]
+
+    def __str__(self):
+        return f'{self.watering_station.garden}/{self.watering_station.idx}/{self.resolution}/{self.period_start}'
+
+    @property
+    def avg_moisture_level(self):
+        return self.sum_moisture_level / self.count
+
+    @classmethod
+    def get_resolution(cls, bucket_size: timedelta):
+        """Returns the coarsest resolution that bucket_size is a multiple of, or None if there isn't one."""
+        for resolution, interval in sorted(cls.RESOLUTION_INTERVALS.items(), key=lambda item: item[1], reverse=True):
+            if bucket_size % interval == timedelta(0):
+                return resolution
+        return None
+
+
+class ConfigJob(models.Model):
+    """
+    An operation applying a configuration template to many gardens and watering stations that runs in the background.
+    See garden/configuration.py.
+    """
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    owner = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='config_jobs', on_delete=models.CASCADE)
+    # the template and targets, as serialized by ConfigJobSerializer
+    data = models.JSONField()
+    status = models.CharField(choices=STATUS_CHOICES, max_length=7, default=PENDING)
+    results = models.JSONField(null=True)
+    created = models.DateTimeField(auto_now_add=True)
+    finished = models.DateTimeField(null=True)
+
+    objects = ConfigJobQuerySet.as_manager()
+
+    def __str__(self):
+        return f'{self.owner} - {self.created} - {self.status}'
+
+    def get_absolute_url(self):
+        return reverse('api-config-job', kwargs={'pk': self.pk})
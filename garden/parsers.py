@@ -0,0 +1,50 @@
+import codecs
+import csv
+import sys
+from array import array
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+MOISTURE_LEVELS_MEDIA_TYPE = 'application/vnd.autogarden.moisture-levels'
+INVALID_MOISTURE_LEVELS_LENGTH_ERR_MSG = 'Body length must be a multiple of 4 bytes.'
+INVALID_CSV_ERR_MSG = 'Body must be UTF-8 encoded CSV.'
+
+
+class MoistureLevelsParser(BaseParser):
+    """
+    Parses a body of packed little endian 32 bit floats, holding one moisture level for each watering station in the
+    order the watering stations were created, into an array of floats. This is 4 bytes per reading compared to the
+    roughly 25 bytes of the equivalent JSON, and is decoded in a single pass without building intermediate objects.
+    """
+
+    media_type = MOISTURE_LEVELS_MEDIA_TYPE
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        body = stream.read() if stream is not None else b''
+        moisture_levels = array('f')
+        if len(body) % moisture_levels.itemsize != 0:
+            raise ParseError(INVALID_MOISTURE_LEVELS_LENGTH_ERR_MSG)
+
+        moisture_levels.frombytes(body)
+        if sys.byteorder == 'big':
+            moisture_levels.byteswap()
+        return moisture_levels
+
+
+class CSVParser(BaseParser):
+    """
+    Parses a CSV body with a header row into a list of dicts of each row's values by column name, leaving out empty
+    values so that they are treated as missing.
+    """
+
+    media_type = 'text/csv'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return [
+                {column: value for column, value in row.items() if column is not None and value}
+                for row in csv.DictReader(codecs.getreader('utf-8')(stream))
+            ]
+        except (UnicodeDecodeError, csv.Error) as exc:
+            raise ParseError(INVALID_CSV_ERR_MSG) from exc
@@ -0,0 +1,136 @@
+"""
+Optional range partitioning of the watering station record table by day on PostgreSQL.
+
+When the WS_RECORDS_PARTITIONED setting is enabled and the database is PostgreSQL, records are stored in one partition
+per day, so range scans over created only touch the partitions they cover and expired records can be removed by
+dropping whole partitions instead of deleting rows. Rows that don't fall within any daily partition are stored in a
+default partition until the daily partition for them is created. On any other database, records are stored in a single
+table and expired records are deleted row by row.
+
+The record table is created unpartitioned by the migrations, and converting it is left to the database administrator
+(see the README), since Django's migration state doesn't know about the partitioning.
+"""
+
+import re
+from datetime import date, datetime, time, timedelta
+from typing import Dict
+
+import pytz
+from django.conf import settings
+from django.db import connection, transaction
+
+from .models import WateringStationRecord
+
+PARTITION_SIZE = timedelta(days=1)
+PARTITION_NAME_FORMAT = '{table}_p{day:%Y%m%d}'
+PARTITION_NAME_PATTERN = re.compile(r'_p(\d{8})$')
+
+
+def is_enabled() -> bool:
+    return settings.WS_RECORDS_PARTITIONED and connection.vendor == 'postgresql'
+
+
+def get_table_name() -> str:
+    return WateringStationRecord._meta.db_table
+
+
+def get_default_partition_name() -> str:
+    return f'{get_table_name()}_default'
+
+
+def get_partition_name(day: date) -> str:
+    return PARTITION_NAME_FORMAT.format(table=get_table_name(), day=day)
+
+
+def get_partition_bounds(day: date):
+    start = datetime.combine(day, time.min, tzinfo=pytz.UTC)
+    return start, start + PARTITION_SIZE
+
+
+def is_partitioned() -> bool:
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid WHERE c.relname = %s',
+            [get_table_name()]
+        )
+        return cursor.fetchone() is not None
+
+
+def get_partitions() -> Dict[date, str]:
+    """
+    Returns a dict mapping the day covered by each daily partition to the name of the partition.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT child.relname FROM pg_inherits i '
+            'JOIN pg_class parent ON parent.oid = i.inhparent '
+            'JOIN pg_class child ON child.oid = i.inhrelid '
+            'WHERE parent.relname = %s',
+            [get_table_name()]
+        )
+        names = [row[0] for row in cursor.fetchall()]
+
+    partitions = {}
+    for name in names:
+        match = PARTITION_NAME_PATTERN.search(name)
+        if match is not None:
+            partitions[datetime.strptime(match.group(1), '%Y%m%d').date()] = name
+    return partitions
+
+
+def _format_bound(value: datetime) -> str:
+    # partition bounds must be literals on PostgreSQL < 12, so they can't be passed as query parameters
+    return f"'{value.isoformat()}'"
+
+
+def create_partition(day: date) -> None:
+    """
+    Creates the partition for the given day, moving any rows for that day out of the default partition first since a
+    partition can't be attached while the default partition holds rows that belong to it.
+    """
+    table = connection.ops.quote_name(get_table_name())
+    default_partition = connection.ops.quote_name(get_default_partition_name())
+    partition = connection.ops.quote_name(get_partition_name(day))
+    start, end = get_partition_bounds(day)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'CREATE TABLE {partition} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+        cursor.execute(
+            f'WITH moved AS (DELETE FROM {default_partition} WHERE created >= %s AND created < %s RETURNING *) '
+            f'INSERT INTO {partition} SELECT * FROM moved',
+            [start, end]
+        )
+        cursor.execute(
+            f'ALTER TABLE {table} ATTACH PARTITION {partition} '
+            f'FOR VALUES FROM ({_format_bound(start)}) TO ({_format_bound(end)})'
+        )
+
+
+def ensure_partitions(start: date, end: date) -> int:
+    """
+    Creates any missing partitions for the days from start to end inclusive, returning the number created.
+    """
+    existing = get_partitions()
+    num_created = 0
+    day = start
+    while day <= end:
+        if day not in existing:
+            create_partition(day)
+            num_created += 1
+        day += PARTITION_SIZE
+    return num_created
+
+
+def drop_partitions_before(cut_off_time: datetime) -> int:
+    """
+    Drops every partition whose rows were all created before cut_off_time, returning the number dropped. Rows in the
+    partition that contains cut_off_time are left for row level pruning.
+    """
+    num_dropped = 0
+    for day, name in sorted(get_partitions().items()):
+        _, end = get_partition_bounds(day)
+        if end > cut_off_time:
+            break
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE {connection.ops.quote_name(name)}')
+        num_dropped += 1
+    return num_dropped
@@ -1,8 +1,14 @@
 from rest_framework.permissions import BasePermission
 
+from .models import Token
+
 
 class TokenPermission(BasePermission):
     def has_object_permission(self, request, view, obj):
+        auth = getattr(request, 'auth', None)
+        if isinstance(auth, Token):
+            # the key was already verified by TokenAuthentication
+            return auth.garden_id == obj.pk
         token = self._get_token(request.META.get('HTTP_AUTHORIZATION'))
         if obj.token.verify(token):
             return True
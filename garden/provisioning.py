@@ -0,0 +1,60 @@
+"""
+Creates gardens in bulk for fleet rollouts.
+
+Creating gardens one at a time sends post_save for each, whose add_token receiver runs the password hasher, and then
+creates each watering station with its own INSERT. Here the gardens, their tokens and their watering stations are each
+created with bulk_create instead, without sending signals, and the API keys are hashed in a thread pool, which runs
+the hashes in parallel since hashlib releases the GIL while hashing.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+
+from .cache import invalidate_user_garden_pks
+from .models import Garden, Token, WateringStation
+
+# number of rows inserted per query
+BATCH_SIZE = 500
+
+
+def hash_keys(keys: Iterable[str], workers: Optional[int] = None) -> List[str]:
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(make_password, keys))
+
+
+@transaction.atomic
+def provision_gardens(owner, gardens: List[Dict], workers: Optional[int] = None) -> List[Tuple[Garden, str]]:
+    """
+    Creates a garden for the owner from each dict of Garden field values, along with its token and the number of
+    watering stations given by its num_watering_stations item. Returns each garden with its API key, in the order
+    they were given.
+
+    The names must not be used by any of the owner's gardens already. workers is the number of threads that hash the
+    API keys, which defaults to the ThreadPoolExecutor default.
+    """
+    garden_fields = [{key: value for key, value in data.items() if key != 'num_watering_stations'} for data in gardens]
+    created = Garden.objects.bulk_create([Garden(owner=owner, **fields) for fields in garden_fields],
+                                         batch_size=BATCH_SIZE)
+    if not connection.features.can_return_rows_from_bulk_insert:
+        # the primary keys of the created gardens are only set on databases that return them from bulk inserts
+        gardens_by_name = {garden.name: garden for garden in owner.gardens.all()}
+        created = [gardens_by_name[fields['name']] for fields in garden_fields]
+
+    keys = [Token.generate_key() for _ in created]
+    Token.objects.bulk_create([
+        Token(garden=garden, prefix=Token.get_key_prefix(key), uuid=hashed_key)
+        for garden, key, hashed_key in zip(created, keys, hash_keys(keys, workers))
+    ], batch_size=BATCH_SIZE)
+    WateringStation.objects.bulk_create([
+        WateringStation(garden=garden)
+        for garden, data in zip(created, gardens)
+        for _ in range(data.get('num_watering_stations', 0))
+    ], batch_size=BATCH_SIZE)
+
+    # bulk_create doesn't send the signals that invalidate the owner's cached gardens, and a request made before the
+    # gardens are committed would cache the old gardens again
+    transaction.on_commit(lambda: invalidate_user_garden_pks(owner.pk))
+    return list(zip(created, keys))
@@ -1,7 +1,32 @@
+import math
+from array import array
+from collections import Counter
+from datetime import datetime, timedelta
+
+import pytz
+from django.conf import settings
+from django.db import transaction
 from rest_framework import serializers
+from rest_framework.settings import api_settings
 from rest_framework.request import Request
 
-from .models import Garden, WateringStation
+from .forms import validate_duration
+from .ingest import get_record_buffer, write_records
+from .models import Garden, WateringStation, WateringStationRecord
+from .provisioning import provision_gardens
+
+NUM_RECORDS_MISMATCH_ERR_MSG = 'Expected one record for each watering station.'
+INVALID_MOISTURE_LEVEL_ERR_MSG = 'Moisture levels must be finite numbers.'
+TOO_MANY_READINGS_ERR_MSG = 'Too many readings for a single watering station.'
+FUTURE_READING_ERR_MSG = 'Readings cannot be from the future.'
+DUPLICATE_GARDEN_NAMES_ERR_MSG = 'Garden names must be unique, but these names are repeated: {names}'
+EXISTING_GARDEN_NAMES_ERR_MSG = 'You already have gardens with these names: {names}'
+EMPTY_TEMPLATE_ERR_MSG = 'The template must set at least one field.'
+NO_TARGETS_ERR_MSG = 'At least one garden or watering station is required.'
+
+MAX_READINGS_PER_WATERING_STATION = 1000
+# tolerated difference between the device's and the server's clocks
+MAX_CLOCK_SKEW = timedelta(minutes=5)
 
 
 class GardenGetSerializer(serializers.ModelSerializer):
@@ -38,3 +63,143 @@ class WateringStationSerializer(serializers.ModelSerializer):
 
     def get_watering_duration(self, obj):
         return obj.watering_duration.total_seconds()
+
+
+class WateringStationRecordListSerializer(serializers.ListSerializer):
+    """
+    Validates one item for each of the garden's watering stations, in the order they were created. Each item is either
+    a single reading or a list of readings buffered by the device while it couldn't reach the server. The validated
+    data holds the list of readings of each watering station under the readings key.
+    """
+
+    def to_internal_value(self, data):
+        # moisture levels parsed from the compact binary format are already floats, so skip per item validation
+        if isinstance(data, array):
+            if not all(math.isfinite(moisture_level) for moisture_level in data):
+                raise serializers.ValidationError(INVALID_MOISTURE_LEVEL_ERR_MSG)
+            return [{'readings': [{'moisture_level': moisture_level}]} for moisture_level in data]
+
+        if not isinstance(data, list):
+            return super().to_internal_value(data)
+
+        readings = []
+        errors = []
+        for item in data:
+            batch = item if isinstance(item, list) else [item]
+            if len(batch) > MAX_READINGS_PER_WATERING_STATION:
+                errors.append({api_settings.NON_FIELD_ERRORS_KEY: [TOO_MANY_READINGS_ERR_MSG]})
+                continue
+            try:
+                readings.append({'readings': [self.child.run_validation(reading) for reading in batch]})
+            except serializers.ValidationError as exc:
+                errors.append(exc.detail)
+            else:
+                errors.append({})
+
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return readings
+
+    def validate(self, attrs):
+        if len(attrs) != len(self.context['watering_stations']):
+            raise serializers.ValidationError(NUM_RECORDS_MISMATCH_ERR_MSG)
+        return attrs
+
+    def create(self, validated_data):
+        records = [
+            WateringStationRecord(watering_station=station, **reading)
+            for station, attrs in zip(self.context['watering_stations'], validated_data)
+            for reading in attrs['readings']
+        ]
+        if settings.WS_RECORDS_WRITE_BEHIND:
+            # raises IngestBufferFull if the buffer doesn't have room for the records
+            get_record_buffer().put(records)
+        else:
+            write_records(records)
+        return records
+
+
+class WateringStationRecordSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = WateringStationRecord
+        fields = ['moisture_level', 'created']
+        extra_kwargs = {
+            'created': {'required': False}
+        }
+        list_serializer_class = WateringStationRecordListSerializer
+
+    def validate_created(self, value):
+        if value > datetime.now(pytz.UTC) + MAX_CLOCK_SKEW:
+            raise serializers.ValidationError(FUTURE_READING_ERR_MSG)
+        return value
+
+
+class GardenSyncSerializer(serializers.Serializer):
+    garden = GardenPatchSerializer()
+    watering_stations = WateringStationRecordSerializer(many=True)
+
+    def save(self, request: Request, **kwargs):
+        with transaction.atomic():
+            for attr, value in self.validated_data['garden'].items():
+                setattr(self.instance, attr, value)
+            self.instance.update_connection_status(request)
+            self.fields['watering_stations'].create(self.validated_data['watering_stations'])
+        return self.instance
+
+
+class GardenProvisionListSerializer(serializers.ListSerializer):
+    def validate(self, attrs):
+        names = [garden['name'] for garden in attrs]
+        duplicate_names = sorted(name for name, count in Counter(names).items() if count > 1)
+        if duplicate_names:
+            raise serializers.ValidationError(DUPLICATE_GARDEN_NAMES_ERR_MSG.format(names=', '.join(duplicate_names)))
+        existing_names = sorted(set(names) & set(self.context['owner'].gardens.values_list('name', flat=True)))
+        if existing_names:
+            raise serializers.ValidationError(EXISTING_GARDEN_NAMES_ERR_MSG.format(names=', '.join(existing_names)))
+        return attrs
+
+    def create(self, validated_data):
+        return provision_gardens(self.context['owner'], validated_data, workers=self.context.get('workers'))
+
+
+class GardenProvisionSerializer(serializers.ModelSerializer):
+    """
+    Validates the gardens of a provisioning manifest. Must be used with many=True and the owner of the gardens in the
+    context. Saving creates the gardens and returns each garden with its API key.
+    """
+
+    num_watering_stations = serializers.IntegerField(min_value=0, default=0)
+
+    class Meta:
+        model = Garden
+        fields = ['name', 'update_frequency', 'num_watering_stations']
+        extra_kwargs = {
+            'update_frequency': {'validators': [validate_duration]}
+        }
+        list_serializer_class = GardenProvisionListSerializer
+
+
+class ConfigTemplateSerializer(serializers.Serializer):
+    update_frequency = serializers.DurationField(required=False, validators=[validate_duration])
+    moisture_threshold = serializers.IntegerField(required=False, min_value=0, max_value=100)
+    watering_duration = serializers.DurationField(required=False, validators=[validate_duration])
+
+    def validate(self, attrs):
+        if not attrs:
+            raise serializers.ValidationError(EMPTY_TEMPLATE_ERR_MSG)
+        return attrs
+
+
+class ConfigJobSerializer(serializers.Serializer):
+    """
+    Validates a configuration template and the pks of the gardens and watering stations to apply it to.
+    """
+
+    template = ConfigTemplateSerializer()
+    gardens = serializers.ListField(child=serializers.IntegerField(), default=list)
+    watering_stations = serializers.ListField(child=serializers.IntegerField(), default=list)
+
+    def validate(self, attrs):
+        if not attrs['gardens'] and not attrs['watering_stations']:
+            raise serializers.ValidationError(NO_TARGETS_ERR_MSG)
+        return attrs
@@ -1,10 +1,51 @@
-from .models import Garden, Token
-
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
+from .cache import (bump_garden_version, invalidate_garden_config,
+                    invalidate_token_verification, invalidate_user_garden_pks,
+                    invalidate_watering_station_configs)
+from .events import publish_garden
+from .models import Garden, Token, WateringStation
+
 
 @receiver(post_save, sender=Garden)
 def add_token(sender, instance, created=False, **kwargs):
     if created:
         Token.objects.create(garden=instance)
+
+
+@receiver(post_save, sender=Garden)
+def publish_garden_update(sender, instance, **kwargs):
+    publish_garden(instance)
+
+
+@receiver(post_delete, sender=Token)
+def remove_token_verification(sender, instance, **kwargs):
+    invalidate_token_verification(instance)
+
+
+@receiver(post_save, sender=Garden)
+def remove_garden_config(sender, instance, **kwargs):
+    invalidate_garden_config(instance.pk)
+
+
+@receiver(post_save, sender=WateringStation)
+@receiver(post_delete, sender=WateringStation)
+def remove_watering_station_configs(sender, instance, **kwargs):
+    invalidate_watering_station_configs(instance.garden_id)
+
+
+@receiver(post_save, sender=Garden)
+@receiver(post_delete, sender=Garden)
+def invalidate_garden_fragments(sender, instance, created=False, **kwargs):
+    bump_garden_version(instance.pk)
+    if created or kwargs['signal'] is post_delete:
+        invalidate_user_garden_pks(instance.owner_id)
+
+
+@receiver(post_save, sender=WateringStation)
+@receiver(post_delete, sender=WateringStation)
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+def invalidate_parent_garden_fragments(sender, instance, **kwargs):
+    bump_garden_version(instance.garden_id)
@@ -0,0 +1,94 @@
+"""
+Streams a garden's live updates to its dashboards as server-sent events.
+
+Django can't stream a response from async code in this version, so the stream is served by a plain ASGI application
+that wraps Django's (see autogarden/asgi.py) and handles the requests for the garden-events URL itself, relaying the
+events published to garden.events.broker. Every other request is passed through to Django.
+"""
+
+import asyncio
+from importlib import import_module
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.auth import get_user
+from django.core.handlers.asgi import ASGIRequest
+from django.urls import Resolver404, resolve
+from rest_framework import status
+
+from .async_views import database_sync_to_async
+from .events import broker
+
+EVENTS_URL_NAME = 'garden-events'
+
+# a comment is sent on idle streams at this interval in seconds so that proxies don't close them
+KEEP_ALIVE_INTERVAL = 15
+KEEP_ALIVE_MESSAGE = b': keep-alive\n\n'
+
+EVENT_STREAM_HEADERS = [
+    (b'content-type', b'text/event-stream'),
+    (b'cache-control', b'no-cache'),
+    (b'x-accel-buffering', b'no'),
+]
+
+
+@database_sync_to_async
+def get_response_status(scope, garden_pk: int) -> int:
+    """
+    Returns 200 if the user of the request's session owns the garden, otherwise the status to reject the request with.
+    """
+    request = ASGIRequest(scope, BytesIO())
+    session_store = import_module(settings.SESSION_ENGINE).SessionStore
+    request.session = session_store(request.COOKIES.get(settings.SESSION_COOKIE_NAME))
+    user = get_user(request)
+    if not user.is_authenticated:
+        return status.HTTP_403_FORBIDDEN
+    if not user.gardens.filter(pk=garden_pk).exists():
+        return status.HTTP_404_NOT_FOUND
+    return status.HTTP_200_OK
+
+
+async def wait_for_disconnect(receive) -> None:
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def stream_garden_events(scope, receive, send, garden_pk: int) -> None:
+    response_status = await get_response_status(scope, garden_pk)
+    if response_status != status.HTTP_200_OK:
+        await send({'type': 'http.response.start', 'status': response_status, 'headers': []})
+        await send({'type': 'http.response.body', 'body': b''})
+        return
+
+    await send({'type': 'http.response.start', 'status': response_status, 'headers': EVENT_STREAM_HEADERS})
+    with broker.subscribe(garden_pk) as queue:
+        disconnected = asyncio.ensure_future(wait_for_disconnect(receive))
+        try:
+            while True:
+                message = asyncio.ensure_future(queue.get())
+                done, _ = await asyncio.wait([message, disconnected], timeout=KEEP_ALIVE_INTERVAL,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if message not in done:
+                    message.cancel()
+                if disconnected in done:
+                    return
+                body = message.result() if message in done else KEEP_ALIVE_MESSAGE
+                await send({'type': 'http.response.body', 'body': body, 'more_body': True})
+        finally:
+            disconnected.cancel()
+
+
+class EventStreamApplication:
+    def __init__(self, application) -> None:
+        self.application = application
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope['type'] == 'http':
+            try:
+                match = resolve(scope['path'])
+            except Resolver404:
+                pass
+            else:
+                if match.url_name == EVENTS_URL_NAME:
+                    return await stream_garden_events(scope, receive, send, match.kwargs['pk'])
+        await self.application(scope, receive, send)
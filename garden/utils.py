@@ -1,7 +1,12 @@
-from datetime import timedelta
+import hashlib
+from datetime import datetime, timedelta
 from uuid import uuid4
 
+import pytz
 from django.apps import apps
+from django.utils.http import quote_etag
+
+EPOCH = datetime(1970, 1, 1, tzinfo=pytz.UTC)
 
 
 def set_num_watering_stations(garden, num_watering_stations):
@@ -25,3 +30,41 @@ def derive_duration_string(duration):
 
 def build_duration_string(minutes, seconds):
     return derive_duration_string(timedelta(minutes=minutes, seconds=seconds))
+
+
+def make_etag(*values):
+    return quote_etag(hashlib.md5(repr(values).encode()).hexdigest())
+
+
+def calc_time_till_next_update(last_connection_time, update_frequency, now):
+    """
+    Returns the number of seconds from now until the next update that is expected to occur on the schedule set by
+    last_connection_time and update_frequency, skipping over any updates that have been missed.
+    """
+    if last_connection_time is None:
+        return None
+    elapsed = now - last_connection_time
+    num_updates = max(1, -(-elapsed // update_frequency))
+    return int((last_connection_time + num_updates * update_frequency - now).total_seconds())
+
+
+def calc_times_till_next_update(rows, now):
+    """
+    Applies calc_time_till_next_update to an iterable of (pk, last_connection_time, update_frequency) rows using the
+    same value of now for all of them, returning a dict keyed by pk.
+    """
+    return {
+        pk: calc_time_till_next_update(last_connection_time, update_frequency, now)
+        for pk, last_connection_time, update_frequency in rows
+    }
+
+
+def floor_datetime(value, interval):
+    """Rounds value down to a multiple of interval since the Unix epoch."""
+    return value - (value - EPOCH) % interval
+
+
+def ceil_datetime(value, interval):
+    """Rounds value up to a multiple of interval since the Unix epoch."""
+    floored = floor_datetime(value, interval)
+    return floored if floored == value else floored + interval
@@ -1,17 +1,20 @@
-import secrets
-from datetime import datetime, timedelta
-from typing import Any
+from datetime import datetime
+from typing import Any, Dict, List, Optional
 
 import pytz
 from crispy_forms.utils import render_crispy_form
 from django import http
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.http.response import Http404, JsonResponse
 from django.shortcuts import redirect, render
+from django.template.loader import render_to_string
 from django.template.context_processors import csrf
 from django.urls import reverse
+from django.utils.cache import get_conditional_response
 from django.views import View
 from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
 from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.views import APIView
@@ -21,37 +24,79 @@ from garden.formatters import (GardenFormatter, TokenFormatter,
 from garden.forms import (BulkUpdateWateringStationForm, DeleteGardenForm,
                           DeleteWateringStationForm, GardenForm, NewGardenForm,
                           NewWateringStationForm, TokenForm,
-                          WateringStationForm)
+                          WateringStationForm, WateringStationRecordQueryForm)
 from garden.permissions import TokenPermission
 
-from .models import Garden, Token, WateringStation
+from .authentication import TokenAuthentication, get_device_garden
+from .cache import (Config, get_config_job_progress, get_garden_config,
+                    get_garden_fragments,
+                    get_garden_versions, get_user_garden_pks,
+                    get_watering_station_configs, set_garden_config,
+                    set_garden_fragment, set_user_garden_pks,
+                    set_watering_station_configs)
+from .configuration import (apply_config_template, count_config_targets,
+                            start_config_job)
+from .models import ConfigJob, Garden, Token, WateringStation
+from .parsers import CSVParser, MoistureLevelsParser
 from .permissions import TokenPermission
-from .serializers import (GardenGetSerializer, GardenPatchSerializer,
+from .serializers import (ConfigJobSerializer, GardenGetSerializer, GardenPatchSerializer,
+                          GardenProvisionSerializer, GardenSyncSerializer,
+                          WateringStationRecordSerializer,
                           WateringStationSerializer)
 
-WS_RECORDS_NUM_HOURS = 12
+GARDEN_CARD_FRAGMENT = 'card'
+GARDEN_DETAIL_FRAGMENT = 'detail'
 
 
 def home(request: http.HttpRequest) -> http.HttpResponse:
     return redirect(reverse('garden-list'))
 
 
+def get_not_modified_response(request: Request, etag: str) -> Optional[http.HttpResponse]:
+    response = get_conditional_response(request, etag=etag)
+    if response is not None:
+        response['ETag'] = etag
+    return response
+
+
+def load_garden_config(garden: Garden) -> Config:
+    config = get_garden_config(garden.pk)
+    if config is None:
+        config = (garden.get_config_etag(), GardenGetSerializer(instance=garden).data)
+        set_garden_config(garden.pk, config)
+    return config
+
+
+def load_watering_station_configs(garden: Garden) -> Config:
+    configs = get_watering_station_configs(garden.pk)
+    if configs is None:
+        watering_stations = garden.watering_stations.all()
+        configs = (garden.get_watering_station_configs_etag(),
+                   WateringStationSerializer(watering_stations, many=True).data)
+        set_watering_station_configs(garden.pk, configs)
+    return configs
+
+
 class GardenAPIView(APIView):
+    authentication_classes = [TokenAuthentication]
     permission_classes = [TokenPermission]
 
     def get(self, request: Request, name: str) -> Response:
         try:
-            garden = Garden.objects.get(name=name)
+            garden = get_device_garden(request, name)
         except Garden.DoesNotExist:
             return Response(status=status.HTTP_400_BAD_REQUEST)
         else:
             self.check_object_permissions(request, garden)
-            serializer = GardenGetSerializer(instance=garden)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            etag, data = load_garden_config(garden)
+            not_modified = get_not_modified_response(request, etag)
+            if not_modified is not None:
+                return not_modified
+            return Response(data, status=status.HTTP_200_OK, headers={'ETag': etag})
 
     def patch(self, request: Request, name: str) -> Response:
         try:
-            garden = Garden.objects.get(name=name)
+            garden = get_device_garden(request, name)
         except Garden.DoesNotExist:
             return Response(status=status.HTTP_400_BAD_REQUEST)
         else:
@@ -64,45 +109,163 @@ class GardenAPIView(APIView):
 
 
 class WateringStationAPIView(APIView):
+    authentication_classes = [TokenAuthentication]
     permission_classes = [TokenPermission]
+    parser_classes = APIView.parser_classes + [MoistureLevelsParser]
 
     def get(self, request: Request, name: str) -> Response:
         try:
-            garden = Garden.objects.get(name=name)
+            garden = get_device_garden(request, name)
         except Garden.DoesNotExist:
             return Response(status=status.HTTP_400_BAD_REQUEST)
         else:
             self.check_object_permissions(request, garden)
-            watering_stations = garden.watering_stations.all()
-            serializer = WateringStationSerializer(watering_stations, many=True)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            etag, data = load_watering_station_configs(garden)
+            not_modified = get_not_modified_response(request, etag)
+            if not_modified is not None:
+                return not_modified
+            return Response(data, status=status.HTTP_200_OK, headers={'ETag': etag})
 
     def post(self, request: Request, name: str) -> Response:
         try:
-            garden = Garden.objects.get(name=name)
+            garden = get_device_garden(request, name)
         except Garden.DoesNotExist:
             return Response(status=status.HTTP_400_BAD_REQUEST)
         else:
             self.check_object_permissions(request, garden)
-            self.prune_records(garden)
-            for i, station in enumerate(garden.watering_stations.all()):
-                station.records.create(**request.data[i])
-            return Response({}, status=status.HTTP_201_CREATED)
+            serializer = WateringStationRecordSerializer(data=request.data, many=True, context={
+                'watering_stations': list(garden.watering_stations.all())
+            })
+            if serializer.is_valid():
+                serializer.save()
+                return Response({}, status=status.HTTP_201_CREATED)
+            return Response(data=serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-    def prune_records(self, garden: Garden) -> None:
-        """
-        This method is purely for keeping the number of database rows below 1000 for free deployment on heroku.
-        """
-        cut_off_time = datetime.now(pytz.UTC) - timedelta(hours=WS_RECORDS_NUM_HOURS)
-        for watering_station in garden.watering_stations.all():
-            watering_station.records.filter(created__lt=cut_off_time).delete()
+
+class GardenSyncAPIView(APIView):
+    """
+    Combines the garden and watering station endpoints so that a device can report its status and readings and receive
+    its configs in a single request.
+    """
+
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [TokenPermission]
+
+    def post(self, request: Request, name: str) -> Response:
+        try:
+            garden = get_device_garden(request, name)
+        except Garden.DoesNotExist:
+            return Response(status=status.HTTP_400_BAD_REQUEST)
+        else:
+            self.check_object_permissions(request, garden)
+            watering_stations = list(garden.watering_stations.all())
+            serializer = GardenSyncSerializer(data=request.data, instance=garden, context={
+                'watering_stations': watering_stations
+            })
+            if serializer.is_valid():
+                serializer.save(request)
+                return Response({
+                    'garden': load_garden_config(garden)[1],
+                    'watering_stations': load_watering_station_configs(garden)[1]
+                }, status=status.HTTP_200_OK)
+            return Response(data=serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class GardenProvisionAPIView(APIView):
+    """
+    Creates the gardens of a JSON or CSV manifest for the logged in user in bulk, responding with the API key of each
+    garden. Each garden has a name, and optionally an update_frequency and num_watering_stations.
+    """
+
+    permission_classes = [IsAuthenticated]
+    parser_classes = APIView.parser_classes + [CSVParser]
+
+    def post(self, request: Request) -> Response:
+        serializer = GardenProvisionSerializer(data=request.data, many=True, context={'owner': request.user})
+        if serializer.is_valid():
+            gardens = serializer.save()
+            return Response([{'name': garden.name, 'api_key': key} for garden, key in gardens],
+                            status=status.HTTP_201_CREATED)
+        return Response(data=serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class ConfigJobListAPIView(APIView):
+    """
+    Applies a configuration template to the logged in user's gardens and watering stations. Templates that update up to
+    CONFIG_JOB_BACKGROUND_THRESHOLD gardens and watering stations, including all of the watering stations of the given
+    gardens, are applied during the request, responding with the results, and otherwise run as a background job,
+    responding with the job's URL.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request: Request) -> Response:
+        serializer = ConfigJobSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(data=serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        data = serializer.validated_data
+        if count_config_targets(request.user, **data) <= settings.CONFIG_JOB_BACKGROUND_THRESHOLD:
+            results = apply_config_template(request.user, **data)
+            return Response({'status': ConfigJob.DONE, 'results': results}, status=status.HTTP_200_OK)
+
+        job = ConfigJob.objects.create(owner=request.user, data=serializer.data)
+        start_config_job(job)
+        return Response({'status': job.status, 'url': job.get_absolute_url()}, status=status.HTTP_202_ACCEPTED)
+
+
+class ConfigJobAPIView(APIView):
+    """
+    Responds with the status of one of the logged in user's configuration jobs, the number of rows updated so far and
+    the total while it is running, and its results once it is done.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request: Request, pk: int) -> Response:
+        try:
+            job = request.user.config_jobs.get(pk=pk)
+        except ConfigJob.DoesNotExist:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+
+        progress = get_config_job_progress(job.pk)
+        return Response({
+            'status': job.status,
+            'progress': {'done': progress[0], 'total': progress[1]} if progress is not None else None,
+            'results': job.results,
+            'created': job.created,
+            'finished': job.finished,
+        }, status=status.HTTP_200_OK)
 
 
 class GardenListView(LoginRequiredMixin, View):
     def get(self, request: http.HttpRequest) -> http.HttpResponse:
         form = NewGardenForm()
-        gardens = [GardenFormatter(garden) for garden in request.user.gardens.all()]
-        return render(request, 'garden_list.html', context={'gardens': gardens, 'form': form})
+        return render(request, 'garden_list.html', context={
+            'garden_cards': self.render_garden_cards(request.user),
+            'form': form
+        })
+
+    def render_garden_cards(self, user) -> List[str]:
+        """
+        Returns the rendered card of each of the user's gardens, only querying and rendering the gardens whose cards
+        aren't cached for their current version.
+        """
+        garden_pks = get_user_garden_pks(user.pk)
+        if garden_pks is None:
+            garden_pks = list(user.gardens.values_list('pk', flat=True))
+            set_user_garden_pks(user.pk, garden_pks)
+
+        versions = get_garden_versions(garden_pks)
+        cards = get_garden_fragments(GARDEN_CARD_FRAGMENT, versions)
+        missing_pks = [garden_pk for garden_pk in garden_pks if garden_pk not in cards]
+        if missing_pks:
+            for garden in user.gardens.with_summary().filter(pk__in=missing_pks):
+                formatter = GardenFormatter(garden)
+                cards[garden.pk] = render_to_string('components/garden_card.html', context={'garden': formatter})
+                set_garden_fragment(GARDEN_CARD_FRAGMENT, garden.pk, versions[garden.pk], cards[garden.pk],
+                                    formatter.get_cache_timeout())
+        return [cards[garden_pk] for garden_pk in garden_pks if garden_pk in cards]
 
     def post(self, request: http.HttpRequest) -> http.JsonResponse:
         form = NewGardenForm(owner=request.user, data=request.POST, files=request.FILES)
@@ -119,20 +282,60 @@ class GardenListView(LoginRequiredMixin, View):
 
 class GardenDetailView(LoginRequiredMixin, View):
     def get(self, request: http.HttpRequest, pk: int) -> http.HttpResponse:
+        configs = {
+            'formSelector': f'#{NewWateringStationForm.FORM_ID}',
+            'url': reverse('watering-station-create', kwargs={'pk': pk}),
+            'eventsUrl': reverse('garden-events', kwargs={'pk': pk}),
+        }
+        return render(request, 'garden_detail.html', context={
+            'garden_detail': self.render_garden_detail(request.user, pk),
+            'watering_stations_url': reverse('watering-station-list', kwargs={'pk': pk}),
+            'configs': configs
+        })
+
+    def render_garden_detail(self, user, pk: int) -> Dict[str, Any]:
+        """
+        Returns the rendered fragments of the garden's detail page, only querying and rendering the garden if they
+        aren't cached for its current version. Fragments that contain a CSRF token aren't cached.
+        """
+        version = get_garden_versions([pk])[pk]
+        garden_detail = get_garden_fragments(GARDEN_DETAIL_FRAGMENT, {pk: version}).get(pk)
+        if garden_detail is not None:
+            if garden_detail['owner'] != user.pk:
+                raise Http404()
+            return garden_detail
+
         try:
-            garden = request.user.gardens.get(pk=pk)
+            garden = user.gardens.select_related('token').get(pk=pk)
         except Garden.DoesNotExist:
             raise Http404()
         else:
-            garden.refresh_connection_status()
-            configs = {
-                'formSelector': f'#{NewWateringStationForm.FORM_ID}',
-                'url': reverse('watering-station-create', kwargs={'pk': pk}),
+            formatter = GardenFormatter(garden)
+            garden_detail = {
+                'owner': garden.owner_id,
+                'nav': render_to_string('garden_detail_nav.html', context={'garden': formatter, 'state': 'active'}),
+                'config': render_to_string('components/model_display.html', context={
+                    'instance': formatter,
+                    'component': 'components/garden_config.html'
+                }),
+                'watering_stations': render_to_string('components/watering_station_rows.html', context={
+                    'garden': formatter
+                }),
             }
-            return render(request, 'garden_detail.html', context={
-                'garden': GardenFormatter(garden),
-                'configs': configs
-            })
+            set_garden_fragment(GARDEN_DETAIL_FRAGMENT, pk, version, garden_detail, formatter.get_cache_timeout())
+            return garden_detail
+
+
+class GardenEventsView(LoginRequiredMixin, View):
+    """
+    The garden's live updates are streamed by garden.streams.EventStreamApplication, which only runs under ASGI. When
+    served by WSGI, responds with 204 so that the dashboard's EventSource stops trying to reconnect.
+    """
+
+    def get(self, request: http.HttpRequest, pk: int) -> http.HttpResponse:
+        if not request.user.gardens.filter(pk=pk).exists():
+            raise Http404()
+        return http.HttpResponse(status=status.HTTP_204_NO_CONTENT)
 
 
 class GardenUpdateView(LoginRequiredMixin, View):
@@ -182,9 +385,9 @@ class TokenUpdateView(LoginRequiredMixin, View):
             raise Http404()
         else:
             garden.token.delete()
-            uuid = secrets.token_hex()
-            Token.objects.create(garden=garden, uuid=uuid)
-            return JsonResponse({'success': True, 'html': uuid})
+            key = Token.generate_key()
+            Token.objects.create(garden=garden, uuid=key)
+            return JsonResponse({'success': True, 'html': key})
 
 
 class GardenDeleteView(LoginRequiredMixin, View):
@@ -231,10 +434,9 @@ class WateringStationListView(LoginRequiredMixin, View):
         except:
             raise Http404()
         else:
-            for station in garden.watering_stations.all():
-                form = BulkUpdateWateringStationForm(instance=station, data=request.POST)
-                if form.is_valid():
-                    form.save()
+            form = BulkUpdateWateringStationForm(data=request.POST)
+            if form.is_valid():
+                garden.update_watering_stations(**form.get_updates())
             return redirect('garden-detail', pk=pk)
 
 
@@ -341,13 +543,24 @@ class WateringStationRecordListView(LoginRequiredMixin, View):
         except (Garden.DoesNotExist, WateringStation.DoesNotExist):
             raise Http404()
         else:
-            labels = []
-            data = []
-            cut_off_time = datetime.now(pytz.UTC) - timedelta(hours=WS_RECORDS_NUM_HOURS)
-            for record in watering_station.records.filter(created__gte=cut_off_time).order_by('created'):
-                labels.append(record.created)
-                data.append(record.moisture_level)
+            form = WateringStationRecordQueryForm(data=request.GET)
+            if not form.is_valid():
+                return JsonResponse({'errors': form.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+            start, end, bucket = (form.cleaned_data[field] for field in ['start', 'end', 'bucket'])
+            if bucket is None:
+                records = watering_station.records.in_range(start, end).values_list('created', 'moisture_level')
+                labels, data = zip(*records) if records else ((), ())
+                return JsonResponse({
+                    'labels': labels,
+                    'data': data
+                })
+
+            buckets = watering_station.downsample_records(start, end, bucket)
+            labels, mins, avgs, maxes = zip(*buckets) if buckets else ((), (), (), ())
             return JsonResponse({
-                'labels': labels,
-                'data': data
+                'labels': [datetime.fromtimestamp(label, pytz.UTC) for label in labels],
+                'data': avgs,
+                'min': mins,
+                'max': maxes
             })
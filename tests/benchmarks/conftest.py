@@ -0,0 +1,17 @@
+import pytest
+from rest_framework.test import APIClient
+
+
+@pytest.fixture(autouse=True)
+def fast_hasher(settings):
+    settings.PASSWORD_HASHERS = [
+        'django.contrib.auth.hashers.MD5PasswordHasher',
+    ]
+
+
+@pytest.fixture
+def benchmark_api_client_garden(db, garden_factory, token_uuid):
+    api_client = APIClient()
+    garden = garden_factory(watering_stations=16, watering_stations__defaults=True, token__uuid=token_uuid)
+    api_client.credentials(HTTP_AUTHORIZATION='Token ' + token_uuid)
+    yield api_client, garden
@@ -0,0 +1,94 @@
+"""
+Load test for the device API that simulates many devices on slow connections, for comparing the WSGI and ASGI
+deployments. Each simulated device keeps polling its garden's config and posting readings, trickling every request out
+in chunks to mimic a device on a weak WiFi signal.
+
+Start the server under test, e.g.
+
+    gunicorn autogarden.wsgi -w 4
+    gunicorn autogarden.asgi:application -w 4 -k uvicorn.workers.UvicornWorker
+
+then run
+
+    python -m tests.benchmarks.load_test http://localhost:8000 <garden name> <token> --devices 200 --duration 30
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from urllib.parse import urlsplit
+
+
+async def send_request(host, port, method, path, token, body=b'', chunk_size=64, chunk_delay=0.0):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        request = (
+            f'{method} {path} HTTP/1.1\r\n'
+            f'Host: {host}\r\n'
+            f'Authorization: Token {token}\r\n'
+            f'Content-Type: application/json\r\n'
+            f'Content-Length: {len(body)}\r\n'
+            f'Connection: close\r\n\r\n'
+        ).encode() + body
+        for i in range(0, len(request), chunk_size):
+            writer.write(request[i:i + chunk_size])
+            await writer.drain()
+            await asyncio.sleep(chunk_delay)
+        status_line = await reader.readline()
+        await reader.read()
+        return int(status_line.split()[1])
+    finally:
+        writer.close()
+
+
+async def run_device(args, host, port, num_watering_stations, deadline, latencies, errors):
+    garden_path = f'/api/gardens/{args.garden}/'
+    records_path = f'{garden_path}watering-stations/'
+    body = json.dumps([{'moisture_level': 50.0}] * num_watering_stations).encode()
+    requests = [('GET', garden_path, b''), ('POST', records_path, body)]
+    i = 0
+    while time.monotonic() < deadline:
+        method, path, data = requests[i % len(requests)]
+        start = time.perf_counter()
+        try:
+            status = await send_request(host, port, method, path, args.token, data, chunk_delay=args.chunk_delay)
+        except OSError:
+            status = None
+        latencies.append(time.perf_counter() - start)
+        if status is None or status >= 400:
+            errors.append(status)
+        i += 1
+
+
+async def main(args):
+    url = urlsplit(args.url)
+    host, port = url.hostname, url.port or 80
+    deadline = time.monotonic() + args.duration
+    latencies, errors = [], []
+    await asyncio.gather(*(
+        run_device(args, host, port, args.watering_stations, deadline, latencies, errors)
+        for _ in range(args.devices)
+    ))
+
+    print(f'requests:      {len(latencies):>10,}')
+    print(f'errors:        {len(errors):>10,}')
+    print(f'requests/sec:  {len(latencies) / args.duration:>10,.1f}')
+    if latencies:
+        latencies.sort()
+        print(f'median (ms):   {statistics.median(latencies) * 1000:>10,.1f}')
+        print(f'p99 (ms):      {latencies[min(int(len(latencies) * 0.99), len(latencies) - 1)] * 1000:>10,.1f}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('url')
+    parser.add_argument('garden')
+    parser.add_argument('token')
+    parser.add_argument('--devices', type=int, default=100, help='number of concurrent simulated devices')
+    parser.add_argument('--duration', type=float, default=30, help='seconds to run for')
+    parser.add_argument('--watering-stations', type=int, default=4, help="number of the garden's watering stations")
+    parser.add_argument('--chunk-delay', type=float, default=0.05,
+                        help='seconds to wait between each 64 byte chunk of a request')
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,88 @@
+import random
+from array import array
+from unittest.mock import patch
+
+import pytest
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+from garden.ingest import IngestBuffer
+from garden.parsers import MOISTURE_LEVELS_MEDIA_TYPE
+from garden.serializers import WateringStationRecordSerializer
+
+from .utils import measure_rate, num_iterations, report
+
+
+@pytest.mark.benchmark
+@pytest.mark.django_db
+def test_watering_station_record_ingest_throughput(benchmark_api_client_garden):
+    api_client, garden = benchmark_api_client_garden
+    url = reverse('api-watering-stations', kwargs={'name': garden.name})
+    stations = list(garden.watering_stations.all())
+    iterations = num_iterations(200)
+
+    def make_data():
+        return [{'moisture_level': random.uniform(0, 100)} for _ in stations]
+
+    def per_row_create():
+        for station, data in zip(stations, make_data()):
+            station.records.create(**data)
+
+    def bulk_create():
+        serializer = WateringStationRecordSerializer(data=make_data(), many=True, context={
+            'watering_stations': stations
+        })
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+
+    def post_to_endpoint():
+        resp = api_client.post(url, data=make_data(), format='json')
+        assert resp.status_code == status.HTTP_201_CREATED
+
+    def post_binary_to_endpoint():
+        data = array('f', [random.uniform(0, 100) for _ in stations]).tobytes()
+        resp = api_client.post(url, data=data, content_type=MOISTURE_LEVELS_MEDIA_TYPE)
+        assert resp.status_code == status.HTTP_201_CREATED
+
+    report(f'Watering station record inserts/sec ({len(stations)} stations per report)',
+           per_row_create=measure_rate(per_row_create, iterations, len(stations)),
+           serializer_bulk_create=measure_rate(bulk_create, iterations, len(stations)),
+           ingest_endpoint=measure_rate(post_to_endpoint, iterations, len(stations)),
+           ingest_endpoint_binary=measure_rate(post_binary_to_endpoint, iterations, len(stations)))
+
+
+@pytest.mark.benchmark
+@pytest.mark.django_db
+def test_watering_station_record_write_behind_burst_throughput(benchmark_api_client_garden, settings):
+    api_client, garden = benchmark_api_client_garden
+    url = reverse('api-watering-stations', kwargs={'name': garden.name})
+    num_stations = garden.watering_stations.count()
+    burst_size = num_iterations(500)
+    buffer = IngestBuffer(max_size=burst_size * num_stations, flush_size=1000, flush_interval=1)
+
+    def post_to_endpoint():
+        data = [{'moisture_level': random.uniform(0, 100)} for _ in range(num_stations)]
+        resp = api_client.post(url, data=data, format='json')
+        assert resp.status_code == status.HTTP_201_CREATED
+
+    def burst():
+        for _ in range(burst_size):
+            post_to_endpoint()
+
+    def burst_and_flush():
+        burst()
+        buffer.flush()
+
+    settings.WS_RECORDS_WRITE_BEHIND = False
+    direct = measure_rate(burst, 1, burst_size * num_stations)
+
+    settings.WS_RECORDS_WRITE_BEHIND = True
+    with patch('garden.serializers.get_record_buffer', return_value=buffer):
+        accepted = measure_rate(burst, 1, burst_size * num_stations)
+        buffer.flush()
+        written = measure_rate(burst_and_flush, 1, burst_size * num_stations)
+
+    report(f'Watering station records/sec in a burst of {burst_size} reports ({num_stations} stations per report)',
+           direct_inserts=direct,
+           write_behind_accepted=accepted,
+           write_behind_accepted_and_flushed=written)
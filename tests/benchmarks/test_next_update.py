@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta
+
+import pytest
+import pytz
+
+from garden.models import Garden
+from garden.utils import calc_time_till_next_update
+
+from .utils import measure_rate, num_iterations, report
+
+
+def loop_calc_time_till_next_update(last_connection_time, update_frequency):
+    """The previous implementation, which stepped through every missed update."""
+
+    factor = 1
+    next_update = last_connection_time + factor * update_frequency - datetime.now(pytz.UTC)
+    while next_update.total_seconds() < 0:
+        factor += 1
+        next_update = last_connection_time + factor * update_frequency - datetime.now(pytz.UTC)
+    return int(next_update.total_seconds())
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize('offline_for', [timedelta(minutes=1), timedelta(days=1), timedelta(days=30)],
+                         ids=['1_minute', '1_day', '30_days'])
+def test_calc_time_till_next_update_calls_per_second_for_long_offline_gardens(offline_for):
+    update_frequency = timedelta(seconds=5)
+    last_connection_time = datetime.now(pytz.UTC) - offline_for
+    # the loop is linear in the number of missed updates, so keep its run short for long offline periods
+    loop_iterations = max(1, num_iterations(10000) * 12 // int(offline_for.total_seconds()))
+
+    def loop():
+        loop_calc_time_till_next_update(last_connection_time, update_frequency)
+
+    def closed_form():
+        calc_time_till_next_update(last_connection_time, update_frequency, datetime.now(pytz.UTC))
+
+    report(f'calc_time_till_next_update calls/sec, offline for {offline_for}',
+           loop=measure_rate(loop, loop_iterations),
+           closed_form=measure_rate(closed_form, num_iterations(10000)))
+
+
+@pytest.mark.benchmark
+@pytest.mark.django_db
+def test_get_times_till_next_update_gardens_per_second(garden_factory):
+    num_gardens = num_iterations(200)
+    garden_factory.create_batch(num_gardens, last_connection_time=datetime.now(pytz.UTC) - timedelta(days=1))
+
+    def per_garden():
+        for garden in Garden.objects.all():
+            garden.calc_time_till_next_update()
+
+    def batched():
+        Garden.objects.get_times_till_next_update(datetime.now(pytz.UTC))
+
+    report('time till next update gardens/sec',
+           per_garden=measure_rate(per_garden, 5, num_gardens),
+           batched=measure_rate(batched, 5, num_gardens))
@@ -0,0 +1,65 @@
+import pytest
+from django.core.cache import cache
+from django.test import Client
+from rest_framework.reverse import reverse
+
+from .utils import measure_rate, num_iterations, report
+
+
+@pytest.fixture
+def benchmark_client_user(db, user_factory):
+    user = user_factory()
+    client = Client()
+    client.force_login(user)
+    yield client, user
+
+
+@pytest.mark.benchmark
+@pytest.mark.django_db
+def test_garden_page_requests_per_second(benchmark_client_user, garden_factory):
+    client, user = benchmark_client_user
+    gardens = garden_factory.create_batch(10, owner=user, watering_stations=16)
+    list_url = reverse('garden-list')
+    detail_url = reverse('garden-detail', kwargs={'pk': gardens[0].pk})
+    iterations = num_iterations(100)
+
+    def uncached(url):
+        def get():
+            cache.clear()
+            client.get(url)
+        return get
+
+    def cached(url):
+        def get():
+            client.get(url)
+        return get
+
+    report('garden page requests/sec',
+           list_uncached=measure_rate(uncached(list_url), iterations),
+           list_cached=measure_rate(cached(list_url), iterations),
+           detail_uncached=measure_rate(uncached(detail_url), iterations),
+           detail_cached=measure_rate(cached(detail_url), iterations))
+
+
+@pytest.mark.benchmark
+@pytest.mark.django_db
+def test_garden_detail_with_many_watering_stations_renders_per_second(benchmark_client_user, garden_factory):
+    client, user = benchmark_client_user
+    garden = garden_factory(owner=user, watering_stations=50)
+    detail_url = reverse('garden-detail', kwargs={'pk': garden.pk})
+    formatters = list(garden.get_watering_station_formatters())
+    iterations = num_iterations(100)
+
+    def render():
+        cache.clear()
+        client.get(detail_url)
+
+    def read_formatter_attributes():
+        for formatter in formatters:
+            formatter.name, formatter.plant_type, formatter.moisture_threshold, formatter.watering_duration
+            formatter.status, formatter.pk, formatter.get_absolute_url
+
+    report('garden with 50 watering stations',
+           detail_renders_per_sec=measure_rate(render, iterations),
+           formatter_attribute_reads_per_sec=measure_rate(read_formatter_attributes, iterations * 10,
+                                                          units_per_iteration=len(formatters) * 7))
@@ -0,0 +1,41 @@
+import pytest
+
+from garden.models import Token
+from garden.provisioning import provision_gardens
+from garden.utils import set_num_watering_stations
+
+from .utils import measure_rate, num_iterations, report
+
+NUM_WATERING_STATIONS = 4
+
+
+@pytest.fixture
+def pbkdf2_hasher(settings):
+    settings.PASSWORD_HASHERS = [
+        'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    ]
+
+
+@pytest.mark.benchmark
+@pytest.mark.django_db
+@pytest.mark.usefixtures('pbkdf2_hasher')
+def test_gardens_provisioned_per_second(user_factory):
+    owner = user_factory()
+    num_gardens = num_iterations(50)
+
+    def create_one_at_a_time():
+        # the way gardens get a usable API key through the web interface: created, then their key is reset
+        for i in range(num_gardens):
+            garden = owner.gardens.create(name=f'Sequential{i}')
+            set_num_watering_stations(garden, NUM_WATERING_STATIONS)
+            garden.token.delete()
+            Token.objects.create(garden=garden, uuid=Token.generate_key())
+
+    def create_in_bulk():
+        provision_gardens(owner, [
+            {'name': f'Bulk{i}', 'num_watering_stations': NUM_WATERING_STATIONS} for i in range(num_gardens)
+        ])
+
+    report(f'gardens with {NUM_WATERING_STATIONS} watering stations created/sec',
+           one_at_a_time=measure_rate(create_one_at_a_time, 1, units_per_iteration=num_gardens),
+           provision_gardens=measure_rate(create_in_bulk, 1, units_per_iteration=num_gardens))
@@ -0,0 +1,62 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+import pytz
+from django.db import connection
+
+from garden.models import WateringStationRecord
+
+from .utils import measure_rate, num_iterations, report
+
+NUM_STATIONS = 20
+RECORD_INTERVAL = timedelta(seconds=30)
+
+
+def insert_records(watering_stations, num_records, start):
+    table = WateringStationRecord._meta.db_table
+    sql = f'INSERT INTO {table} (watering_station_id, moisture_level, created) VALUES (%s, %s, %s)'
+    rows = (
+        (watering_stations[i % len(watering_stations)].pk, random.uniform(0, 100),
+         start + (i // len(watering_stations)) * RECORD_INTERVAL)
+        for i in range(num_records)
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, rows)
+
+
+def use_foreign_key_index_only():
+    """Rebuilds the record table with only a foreign key index, as it was before the composite index was added."""
+
+    table = WateringStationRecord._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(f'CREATE TABLE benchmark_wsr AS SELECT * FROM {table}')
+        cursor.execute(f'DROP TABLE {table}')
+        cursor.execute(f'ALTER TABLE benchmark_wsr RENAME TO {table}')
+        cursor.execute(f'CREATE INDEX benchmark_wsr_station ON {table} (watering_station_id)')
+
+
+@pytest.mark.benchmark
+@pytest.mark.django_db
+def test_record_range_query_latency_with_and_without_composite_index(garden_factory):
+    garden = garden_factory(watering_stations=NUM_STATIONS, watering_stations__defaults=True)
+    watering_stations = list(garden.watering_stations.all())
+    num_records = num_iterations(200_000)
+    start = datetime(2021, 1, 1, tzinfo=pytz.UTC)
+    insert_records(watering_stations, num_records, start)
+    end_of_data = start + (num_records // NUM_STATIONS) * RECORD_INTERVAL
+    iterations = num_iterations(50)
+
+    def range_query():
+        station = random.choice(watering_stations)
+        range_start = start + random.random() * (end_of_data - start - timedelta(hours=1))
+        list(station.records.in_range(range_start, range_start + timedelta(hours=1))
+             .values_list('created', 'moisture_level'))
+
+    with_composite_index = measure_rate(range_query, iterations)
+    use_foreign_key_index_only()
+    with_foreign_key_index = measure_rate(range_query, iterations)
+
+    report(f'1 hour range queries/sec over {num_records:,} records',
+           foreign_key_index=with_foreign_key_index,
+           composite_index=with_composite_index)
@@ -0,0 +1,69 @@
+import pytest
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from garden.models import Garden, Token
+
+from .utils import measure_rate, num_iterations, report
+
+
+@pytest.fixture
+def pbkdf2_hasher(settings):
+    settings.PASSWORD_HASHERS = [
+        'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    ]
+
+
+@pytest.mark.benchmark
+@pytest.mark.django_db
+@pytest.mark.usefixtures('pbkdf2_hasher')
+def test_garden_api_requests_per_second_with_and_without_cached_token_verification(benchmark_api_client_garden):
+    api_client, garden = benchmark_api_client_garden
+    url = reverse('api-garden', kwargs={'name': garden.name})
+    iterations = num_iterations(20)
+
+    def uncached_get():
+        cache.clear()
+        assert api_client.get(url).status_code == status.HTTP_200_OK
+
+    def cached_get():
+        assert api_client.get(url).status_code == status.HTTP_200_OK
+
+    report('GET api-garden requests/sec',
+           uncached_token_verification=measure_rate(uncached_get, iterations),
+           cached_token_verification=measure_rate(cached_get, iterations * 10))
+
+
+@pytest.mark.benchmark
+@pytest.mark.django_db
+def test_garden_api_requests_per_second_by_api_key_format_with_10k_gardens(user_factory, token_uuid,
+                                                                           legacy_token_uuid):
+    owner = user_factory()
+    num_gardens = num_iterations(10000)
+    Garden.objects.bulk_create(Garden(owner=owner, name=f'Garden{i}') for i in range(num_gardens))
+    # bulk_create only sets primary keys on PostgreSQL
+    gardens = list(owner.gardens.order_by('pk'))
+    hashed_uuid = make_password(Token.generate_key())
+    Token.objects.bulk_create(
+        Token(garden=garden, prefix=Token.get_key_prefix(Token.generate_key()), uuid=hashed_uuid)
+        for garden in gardens[2:]
+    )
+    Token.objects.create(garden=gardens[0], uuid=token_uuid)
+    Token.objects.create(garden=gardens[1], uuid=legacy_token_uuid)
+    iterations = num_iterations(200)
+
+    def get(garden, key):
+        api_client = APIClient()
+        api_client.credentials(HTTP_AUTHORIZATION='Token ' + key)
+        url = reverse('api-garden', kwargs={'name': garden.name})
+
+        def get():
+            assert api_client.get(url).status_code == status.HTTP_200_OK
+        return get
+
+    report(f'GET api-garden requests/sec with {num_gardens:,} gardens',
+           prefixed_key=measure_rate(get(gardens[0], token_uuid), iterations),
+           legacy_key=measure_rate(get(gardens[1], legacy_token_uuid), iterations))
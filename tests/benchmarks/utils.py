@@ -0,0 +1,23 @@
+import os
+import time
+from typing import Callable
+
+
+def num_iterations(default: int) -> int:
+    """Allow larger runs with `BENCHMARK_SCALE=<factor> pytest -s -m benchmark`."""
+
+    return int(default * float(os.environ.get('BENCHMARK_SCALE', 1)))
+
+
+def measure_rate(func: Callable[[], None], iterations: int, units_per_iteration: int = 1) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    elapsed = time.perf_counter() - start
+    return iterations * units_per_iteration / elapsed
+
+
+def report(title: str, **results: float) -> None:
+    print(f'\n{title}')
+    for label, value in results.items():
+        print(f'    {label:<40}{value:>14,.1f}')
@@ -3,7 +3,8 @@ import shutil
 
 import pytest
 from django.conf import settings
-from garden.models import _default_garden_image
+from django.core.cache import cache
+from garden.models import Token, _default_garden_image
 from pytest_factoryboy import register
 from rest_framework.test import APIClient
 from selenium import webdriver
@@ -28,6 +29,12 @@ def pytest_addoption(parser):
     parser.addoption('--headless', action='store_true', default=False)
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    yield
+    cache.clear()
+
+
 @pytest.fixture(scope='session')
 def faker_seed():
     return 12345
@@ -56,6 +63,12 @@ def test_password():
 
 @pytest.fixture
 def token_uuid():
+    return Token.generate_key()
+
+
+@pytest.fixture
+def legacy_token_uuid():
+    """An API key in the format issued before keys had prefixes"""
     return secrets.token_hex()
 
 
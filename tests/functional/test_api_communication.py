@@ -72,13 +72,13 @@ class TestAPICommunication(Base):
         self.send_post_request_to_watering_station_api(self.garden, data)
 
         # the microcontroller then crashes and misses an update. The user refreshes the page and sees the updated
-        # connection info, where the connection status is not disconnected
+        # connection info, where the connection status is now disconnected
         sleep(self.update_frequency)
         self.driver.get(self.url)
         self.wait_for_page_to_be_loaded(detail_gpage)
         self.garden.refresh_from_db()
         assert detail_gpage.is_displaying_info_for_garden(self.garden)
-        assert self.garden.is_connected == False
+        assert self.garden.get_is_connected() == False
 
         # the user then change the garden configs
         detail_gpage.edit_button.click()
@@ -0,0 +1,142 @@
+import socket
+import time
+from unittest.mock import patch
+
+import pytest
+
+from autogarden.cache import RedisCache, RedisConnection, RedisError
+from tests.redis_stand_in import RedisStandIn
+
+
+@pytest.fixture
+def redis_server():
+    server = RedisStandIn(password='secret')
+    server.start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def redis_cache(redis_server):
+    cache = RedisCache(redis_server.url, {})
+    yield cache
+    cache.disconnect()
+
+
+@pytest.mark.integration
+class TestRedisCache:
+    @pytest.mark.parametrize('value', [1, -5, 'text', b'bytes', 1.5, [1, 'a'], {'a': (1, 2)}, None, True],
+                             ids=['int', 'negative-int', 'str', 'bytes', 'float', 'list', 'dict', 'none', 'bool'])
+    def test_get_returns_the_value_that_was_set(self, redis_cache, value):
+        redis_cache.set('key', value)
+
+        assert redis_cache.get('key', default='missing') == value
+
+    def test_get_returns_default_when_key_is_missing(self, redis_cache):
+        assert redis_cache.get('key', default='missing') == 'missing'
+
+    def test_keys_are_stored_in_the_database_of_the_url(self, redis_server, redis_cache):
+        redis_cache.set('key', 1)
+
+        assert list(redis_server.dbs[1]) == [redis_cache.make_key('key').encode()]
+
+    def test_set_expires_key_after_timeout(self, redis_cache):
+        redis_cache.set('key', 1, timeout=0.01)
+        time.sleep(0.02)
+
+        assert redis_cache.get('key') is None
+
+    def test_set_deletes_key_when_timeout_is_not_positive(self, redis_cache):
+        redis_cache.set('key', 1)
+        redis_cache.set('key', 2, timeout=0)
+
+        assert not redis_cache.has_key('key')
+
+    def test_add_only_sets_missing_keys(self, redis_cache):
+        assert redis_cache.add('key', 1)
+        assert not redis_cache.add('key', 2)
+        assert redis_cache.get('key') == 1
+
+    def test_get_many_and_set_many(self, redis_cache):
+        redis_cache.set_many({'a': 1, 'b': 'two'})
+
+        assert redis_cache.get_many(['a', 'b', 'c']) == {'a': 1, 'b': 'two'}
+
+    def test_delete_and_delete_many(self, redis_cache):
+        redis_cache.set_many({'a': 1, 'b': 2, 'c': 3})
+
+        assert redis_cache.delete('a')
+        assert not redis_cache.delete('a')
+        redis_cache.delete_many(['b', 'c'])
+        assert redis_cache.get_many(['a', 'b', 'c']) == {}
+
+    def test_incr_increments_the_stored_integer(self, redis_cache):
+        redis_cache.set('key', 1)
+
+        assert redis_cache.incr('key', 5) == 6
+        assert redis_cache.get('key') == 6
+
+    def test_incr_raises_value_error_without_creating_missing_key(self, redis_cache):
+        with pytest.raises(ValueError):
+            redis_cache.incr('key')
+
+        assert not redis_cache.has_key('key')
+
+    def test_incr_raises_error_when_value_is_not_an_integer(self, redis_cache):
+        redis_cache.set('key', 'text')
+
+        with pytest.raises(RedisError):
+            redis_cache.incr('key')
+
+    def test_touch_updates_the_timeout_of_existing_keys(self, redis_cache):
+        redis_cache.set('key', 1, timeout=0.01)
+
+        assert redis_cache.touch('key', timeout=None)
+        assert not redis_cache.touch('missing', timeout=None)
+        time.sleep(0.02)
+        assert redis_cache.get('key') == 1
+
+    def test_clear_removes_all_keys(self, redis_cache):
+        redis_cache.set_many({'a': 1, 'b': 2})
+
+        redis_cache.clear()
+
+        assert redis_cache.get_many(['a', 'b']) == {}
+
+    def test_close_keeps_the_connection_open(self, redis_cache):
+        redis_cache.set('key', 1)
+        connection = redis_cache._connection
+
+        redis_cache.close()
+
+        assert redis_cache.get('key') == 1
+        assert redis_cache._connection is connection
+
+    def test_reconnects_when_the_connection_was_closed(self, redis_cache):
+        redis_cache.set('key', 1)
+        redis_cache._connection.sock.close()
+
+        assert redis_cache.get('key') == 1
+
+    def test_reconnects_when_the_server_closed_the_idle_connection(self, redis_cache):
+        redis_cache.set('key', 1)
+        connection = redis_cache._connection
+        connection.sock.shutdown(socket.SHUT_RD)
+
+        assert redis_cache.get('key') == 1
+        assert redis_cache._connection is not connection
+
+    def test_doesnt_retry_commands_when_reading_the_reply_fails(self, redis_cache):
+        redis_cache.set('key', 1)
+
+        with patch.object(RedisConnection, 'read_replies', side_effect=socket.timeout):
+            with pytest.raises(socket.timeout):
+                redis_cache.incr('key')
+
+        assert redis_cache.get('key') == 2
+
+    def test_raises_error_when_password_is_wrong(self, redis_server):
+        cache = RedisCache(redis_server.url.replace('secret', 'wrong'), {})
+
+        with pytest.raises(RedisError):
+            cache.get('key')
@@ -0,0 +1,150 @@
+import json
+import struct
+from unittest.mock import patch
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+from garden.ingest import RETRY_AFTER, IngestBuffer
+from garden.models import Garden, WateringStationRecord
+from garden.parsers import MOISTURE_LEVELS_MEDIA_TYPE
+from garden.serializers import GardenGetSerializer, WateringStationSerializer
+
+
+@pytest.fixture(autouse=True)
+def asgi_urls(settings):
+    settings.ROOT_URLCONF = 'autogarden.asgi_urls'
+
+
+@pytest.mark.integration
+class TestAsyncDeviceAPIViews:
+    @pytest.fixture(autouse=True)
+    def setup(self, auth_api_garden, token_uuid):
+        self.garden = auth_api_garden
+        self.client = AsyncClient(enforce_csrf_checks=True)
+        self.token = token_uuid
+        self.garden_url = reverse('api-garden', kwargs={'name': self.garden.name})
+        self.watering_station_url = reverse('api-watering-stations', kwargs={'name': self.garden.name})
+
+    def request(self, method, url, token=None, **kwargs):
+        # the async test client in this version of Django takes headers by their name instead of their META key
+        kwargs.setdefault('authorization', 'Token ' + (token or self.token))
+        return async_to_sync(getattr(self.client, method))(url, **kwargs)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_garden_GET_returns_garden_config_data_and_etag(self):
+        resp = self.request('get', self.garden_url)
+
+        assert resp.status_code == status.HTTP_200_OK
+        assert resp.json() == GardenGetSerializer(instance=self.garden).data
+        assert resp['ETag'] == self.garden.get_config_etag()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_garden_GET_returns_304_status_code_when_if_none_match_matches_etag(self):
+        etag = self.request('get', self.garden_url)['ETag']
+
+        resp = self.request('get', self.garden_url, if_none_match=etag)
+
+        assert resp.status_code == status.HTTP_304_NOT_MODIFIED
+        assert resp.content == b''
+
+    @pytest.mark.django_db(transaction=True)
+    def test_garden_PATCH_updates_the_garden_and_returns_204_status_code(self, garden_patch_serializer_data):
+        self.garden.is_connected = False
+        self.garden.save()
+
+        resp = self.request('patch', self.garden_url, data=json.dumps(garden_patch_serializer_data),
+                            content_type='application/json')
+
+        self.garden.refresh_from_db()
+        assert resp.status_code == status.HTTP_204_NO_CONTENT
+        assert self.garden.is_connected
+        assert self.garden.water_level == garden_patch_serializer_data['water_level']
+
+    @pytest.mark.django_db(transaction=True)
+    def test_garden_PATCH_with_invalid_data_returns_400_status_code(self, garden_invalid_patch_serializer_data):
+        resp = self.request('patch', self.garden_url, data=json.dumps(garden_invalid_patch_serializer_data),
+                            content_type='application/json')
+
+        assert resp.status_code == status.HTTP_400_BAD_REQUEST
+
+    @pytest.mark.django_db(transaction=True)
+    def test_garden_PATCH_with_unsupported_media_type_returns_415_status_code(self):
+        resp = self.request('patch', self.garden_url, data='water_level=ok', content_type='text/plain')
+
+        assert resp.status_code == status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+
+    @pytest.mark.django_db(transaction=True)
+    def test_garden_DELETE_returns_405_status_code(self):
+        resp = self.request('delete', self.garden_url)
+
+        assert resp.status_code == status.HTTP_405_METHOD_NOT_ALLOWED
+        assert Garden.objects.filter(pk=self.garden.pk).exists()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_request_without_valid_token_returns_403_status_code(self):
+        resp = self.request('get', self.garden_url, token='invalid')
+
+        assert resp.status_code == status.HTTP_403_FORBIDDEN
+
+    @pytest.mark.django_db(transaction=True)
+    def test_request_for_nonexistent_garden_returns_400_status_code(self):
+        url = reverse('api-garden', kwargs={'name': self.garden.name + 'a'})
+
+        resp = self.request('get', url)
+
+        assert resp.status_code == status.HTTP_400_BAD_REQUEST
+
+    @pytest.mark.django_db(transaction=True)
+    def test_watering_stations_GET_returns_watering_station_configs_and_etag(self):
+        resp = self.request('get', self.watering_station_url)
+
+        watering_stations = self.garden.watering_stations.all()
+        assert resp.status_code == status.HTTP_200_OK
+        assert resp.json() == WateringStationSerializer(watering_stations, many=True).data
+        assert resp['ETag'] == self.garden.get_watering_station_configs_etag()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_watering_stations_POST_creates_records_and_returns_201_status_code(self):
+        moisture_levels = [10.5, 20.0, 30.5]
+        data = [{'moisture_level': moisture_level} for moisture_level in moisture_levels]
+
+        resp = self.request('post', self.watering_station_url, data=json.dumps(data), content_type='application/json')
+
+        assert resp.status_code == status.HTTP_201_CREATED
+        assert sorted(WateringStationRecord.objects.values_list('moisture_level', flat=True)) == moisture_levels
+
+    @pytest.mark.django_db(transaction=True)
+    def test_watering_stations_POST_accepts_packed_moisture_levels(self):
+        moisture_levels = [10.5, 20.0, 30.5]
+
+        resp = self.request('post', self.watering_station_url, data=struct.pack('<3f', *moisture_levels),
+                            content_type=MOISTURE_LEVELS_MEDIA_TYPE)
+
+        assert resp.status_code == status.HTTP_201_CREATED
+        assert sorted(WateringStationRecord.objects.values_list('moisture_level', flat=True)) == moisture_levels
+
+    @pytest.mark.django_db(transaction=True)
+    def test_watering_stations_POST_returns_503_status_code_when_write_behind_buffer_is_full(self, settings):
+        settings.WS_RECORDS_WRITE_BEHIND = True
+        data = [{'moisture_level': moisture_level} for moisture_level in [10.5, 20.0, 30.5]]
+
+        with patch('garden.serializers.get_record_buffer', return_value=IngestBuffer(0, 100, 1)):
+            resp = self.request('post', self.watering_station_url, data=json.dumps(data),
+                                content_type='application/json')
+
+        assert resp.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert resp['Retry-After'] == str(RETRY_AFTER)
+        assert not WateringStationRecord.objects.exists()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_watering_stations_POST_with_wrong_number_of_readings_returns_400_status_code(self):
+        data = [{'moisture_level': 10}]
+
+        resp = self.request('post', self.watering_station_url, data=json.dumps(data), content_type='application/json')
+
+        assert resp.status_code == status.HTTP_400_BAD_REQUEST
+        assert not WateringStationRecord.objects.exists()
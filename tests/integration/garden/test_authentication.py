@@ -0,0 +1,78 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+from garden.models import Token
+
+
+@pytest.mark.integration
+class TestTokenAuthentication:
+    def create_url(self, garden):
+        return reverse('api-garden', kwargs={'name': garden.name})
+
+    def create_garden(self, garden_factory, key, **kwargs):
+        garden = garden_factory(token=None, **kwargs)
+        Token.objects.create(garden=garden, uuid=key)
+        return garden
+
+    @pytest.mark.django_db
+    def test_request_with_prefixed_key_finds_garden_in_a_single_query_once_key_is_verified(
+            self, api_client, garden_factory, token_uuid):
+        garden = self.create_garden(garden_factory, token_uuid)
+        api_client.credentials(HTTP_AUTHORIZATION='Token ' + token_uuid)
+        api_client.get(self.create_url(garden))
+
+        with CaptureQueriesContext(connection) as queries:
+            resp = api_client.get(self.create_url(garden))
+
+        assert resp.status_code == status.HTTP_200_OK
+        assert len(queries) == 1
+
+    @pytest.mark.django_db
+    @pytest.mark.parametrize('key_fixture', ['token_uuid', 'legacy_token_uuid'], ids=['prefixed', 'legacy'])
+    def test_request_authenticates_garden_of_key_when_another_users_garden_has_the_same_name(
+            self, request, api_client, garden_factory, key_fixture):
+        key = request.getfixturevalue(key_fixture)
+        self.create_garden(garden_factory, Token.generate_key(), name='Backyard')
+        garden = self.create_garden(garden_factory, key, name='Backyard', update_frequency=timedelta(seconds=42))
+        api_client.credentials(HTTP_AUTHORIZATION='Token ' + key)
+
+        resp = api_client.get(self.create_url(garden))
+
+        assert resp.status_code == status.HTTP_200_OK
+        assert resp.data['update_frequency'] == 42
+
+    @pytest.mark.django_db
+    def test_request_with_legacy_key_is_authenticated(self, api_client, garden_factory, legacy_token_uuid):
+        garden = self.create_garden(garden_factory, legacy_token_uuid)
+        api_client.credentials(HTTP_AUTHORIZATION='Token ' + legacy_token_uuid)
+
+        resp = api_client.get(self.create_url(garden))
+
+        assert resp.status_code == status.HTTP_200_OK
+
+    @pytest.mark.django_db
+    def test_request_with_prefixed_key_that_doesnt_match_its_token_returns_403_status_code(
+            self, api_client, garden_factory, token_uuid):
+        garden = self.create_garden(garden_factory, token_uuid)
+        prefix = Token.get_key_prefix(token_uuid)
+        api_client.credentials(HTTP_AUTHORIZATION=f'Token {prefix}{Token.KEY_SEPARATOR}wrong')
+
+        resp = api_client.get(self.create_url(garden))
+
+        assert resp.status_code == status.HTTP_403_FORBIDDEN
+
+    @pytest.mark.django_db
+    def test_request_for_garden_the_key_doesnt_belong_to_returns_400_status_code(self, api_client, garden_factory,
+                                                                                 token_uuid):
+        self.create_garden(garden_factory, token_uuid)
+        other_garden = self.create_garden(garden_factory, Token.generate_key())
+        api_client.credentials(HTTP_AUTHORIZATION='Token ' + token_uuid)
+
+        resp = api_client.get(self.create_url(other_garden))
+
+        assert resp.status_code == status.HTTP_400_BAD_REQUEST
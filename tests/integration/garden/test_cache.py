@@ -0,0 +1,51 @@
+import pytest
+
+from garden import cache
+
+
+@pytest.mark.integration
+class TestTokenVerificationCache:
+    @pytest.fixture(autouse=True)
+    def setup(self, token_factory):
+        self.uuid = 'random uuid'
+        self.token = token_factory(uuid=self.uuid)
+
+    @pytest.mark.django_db
+    def test_is_token_verified_returns_false_when_nothing_is_cached(self):
+        assert cache.is_token_verified(self.token, self.uuid) == False
+
+    @pytest.mark.django_db
+    def test_is_token_verified_returns_true_after_set_token_verified(self):
+        cache.set_token_verified(self.token, self.uuid)
+
+        assert cache.is_token_verified(self.token, self.uuid) == True
+
+    @pytest.mark.django_db
+    def test_is_token_verified_returns_false_for_a_different_uuid(self):
+        cache.set_token_verified(self.token, self.uuid)
+
+        assert cache.is_token_verified(self.token, self.uuid + 'extra chars') == False
+
+    @pytest.mark.django_db
+    def test_is_token_verified_returns_false_when_the_stored_hash_changes(self):
+        cache.set_token_verified(self.token, self.uuid)
+
+        self.token.uuid = 'rotated hash'
+
+        assert cache.is_token_verified(self.token, self.uuid) == False
+
+    @pytest.mark.django_db
+    def test_invalidate_token_verification_removes_cached_verification(self):
+        cache.set_token_verified(self.token, self.uuid)
+
+        cache.invalidate_token_verification(self.token)
+
+        assert cache.is_token_verified(self.token, self.uuid) == False
+
+    @pytest.mark.django_db
+    def test_deleting_token_invalidates_cached_verification(self):
+        cache.set_token_verified(self.token, self.uuid)
+
+        self.token.delete()
+
+        assert cache.is_token_verified(self.token, self.uuid) == False
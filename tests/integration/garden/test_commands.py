@@ -0,0 +1,207 @@
+import csv
+import json
+import os
+import stat
+from datetime import datetime, timedelta
+from io import StringIO
+
+import pytest
+import pytz
+from django.core.management import CommandError, call_command
+
+from garden.models import (ConfigJob, Garden, Token, WateringStationRecord,
+                           WateringStationRecordRollup)
+
+
+@pytest.mark.integration
+class TestPruneRecordsCommand:
+    @pytest.fixture(autouse=True)
+    def setup(self, watering_station, watering_station_record_factory):
+        self.records = watering_station_record_factory.create_batch(3, watering_station=watering_station)
+        for i, record in enumerate(self.records):
+            record.created = datetime.now(pytz.UTC) - timedelta(hours=i * 10, minutes=1)
+            record.save()
+
+    @pytest.mark.django_db
+    def test_command_deletes_records_older_than_WS_RECORDS_RETENTION_setting(self, settings):
+        settings.WS_RECORDS_RETENTION = timedelta(hours=15)
+
+        call_command('prune_records', stdout=StringIO())
+
+        assert set(WateringStationRecord.objects.all()) == set(self.records[:2])
+
+    @pytest.mark.django_db
+    def test_command_deletes_records_older_than_hours_argument(self):
+        call_command('prune_records', '--hours=5', '--batch-size=1', stdout=StringIO())
+
+        assert set(WateringStationRecord.objects.all()) == set(self.records[:1])
+
+    @pytest.mark.django_db
+    def test_command_raises_command_error_when_batch_size_is_less_than_1(self, settings):
+        settings.WS_RECORDS_PRUNE_BATCH_SIZE = 0
+
+        with pytest.raises(CommandError):
+            call_command('prune_records', stdout=StringIO())
+
+        assert WateringStationRecord.objects.count() == len(self.records)
+
+    @pytest.mark.django_db
+    def test_command_falls_back_to_deleting_records_when_partitioning_is_unavailable(self, settings):
+        settings.WS_RECORDS_PARTITIONED = True
+
+        call_command('prune_records', '--hours=5', stdout=StringIO())
+
+        assert set(WateringStationRecord.objects.all()) == set(self.records[:1])
+
+
+@pytest.mark.integration
+class TestPartitionRecordsCommand:
+    @pytest.mark.django_db
+    def test_command_does_nothing_when_partitioning_is_unavailable(self, settings):
+        settings.WS_RECORDS_PARTITIONED = True
+        stdout = StringIO()
+
+        call_command('partition_records', stdout=stdout)
+
+        assert 'disabled' in stdout.getvalue()
+
+
+@pytest.mark.integration
+class TestDisconnectOverdueGardensCommand:
+    @pytest.mark.django_db
+    def test_command_marks_overdue_gardens_as_disconnected(self, garden_factory):
+        garden = garden_factory(is_connected=True, update_frequency=timedelta(minutes=5),
+                                last_connection_time=datetime.now(pytz.UTC) - timedelta(minutes=10))
+
+        call_command('disconnect_overdue_gardens', stdout=StringIO())
+
+        garden.refresh_from_db()
+        assert garden.is_connected == False
+
+
+@pytest.mark.integration
+class TestFailStaleConfigJobsCommand:
+    def create_job(self, user, status, age):
+        job = ConfigJob.objects.create(owner=user, data={}, status=status)
+        ConfigJob.objects.filter(pk=job.pk).update(created=datetime.now(pytz.UTC) - age)
+        return job
+
+    @pytest.mark.django_db
+    @pytest.mark.parametrize('status', [ConfigJob.PENDING, ConfigJob.RUNNING])
+    def test_command_marks_unfinished_jobs_older_than_the_timeout_as_failed(self, settings, user, status):
+        settings.CONFIG_JOB_TIMEOUT = timedelta(minutes=30)
+        job = self.create_job(user, status, timedelta(minutes=31))
+
+        call_command('fail_stale_config_jobs', stdout=StringIO())
+
+        job.refresh_from_db()
+        assert job.status == ConfigJob.FAILED
+        assert job.finished is not None
+
+    @pytest.mark.django_db
+    def test_command_doesnt_modify_recent_or_finished_jobs(self, settings, user):
+        settings.CONFIG_JOB_TIMEOUT = timedelta(minutes=30)
+        recent = self.create_job(user, ConfigJob.RUNNING, timedelta(minutes=29))
+        done = self.create_job(user, ConfigJob.DONE, timedelta(minutes=31))
+
+        call_command('fail_stale_config_jobs', stdout=StringIO())
+
+        recent.refresh_from_db()
+        done.refresh_from_db()
+        assert recent.status == ConfigJob.RUNNING
+        assert done.status == ConfigJob.DONE
+
+
+@pytest.mark.integration
+class TestCompactRecordsCommand:
+    @pytest.mark.django_db
+    def test_command_creates_rollups_of_records_within_the_retention_period(self, settings, watering_station,
+                                                                            watering_station_record_factory):
+        settings.WS_RECORDS_RETENTION = timedelta(hours=2)
+        for hours_ago in [1, 5]:
+            record = watering_station_record_factory(watering_station=watering_station)
+            record.created = datetime.now(pytz.UTC) - timedelta(hours=hours_ago)
+            record.save()
+
+        call_command('compact_records', stdout=StringIO())
+
+        hourly = WateringStationRecordRollup.objects.filter(resolution=WateringStationRecordRollup.HOUR)
+        assert sum(rollup.count for rollup in hourly) == 1
+
+
+@pytest.mark.integration
+class TestProvisionGardensCommand:
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path, user_factory):
+        self.owner = user_factory(gardens=0)
+        self.output = tmp_path / 'keys.csv'
+        self.csv_manifest = tmp_path / 'manifest.csv'
+        self.csv_manifest.write_text('name,update_frequency,num_watering_stations\nFront,0:05:00,2\nBack,,\n')
+
+    def call_command(self, manifest, *args):
+        call_command('provision_gardens', self.owner.email, str(manifest), '--output', str(self.output), *args,
+                     stdout=StringIO())
+
+    def read_keys(self):
+        with self.output.open() as f:
+            return {row['name']: row['api_key'] for row in csv.DictReader(f)}
+
+    @pytest.mark.django_db
+    def test_command_creates_gardens_of_csv_manifest_with_their_watering_stations(self):
+        self.call_command(self.csv_manifest, '--workers=2')
+
+        gardens = {garden.name: garden for garden in self.owner.gardens.all()}
+        assert set(gardens) == {'Front', 'Back'}
+        assert gardens['Front'].update_frequency == timedelta(minutes=5)
+        assert gardens['Front'].watering_stations.count() == 2
+        assert gardens['Back'].watering_stations.count() == 0
+
+    @pytest.mark.django_db
+    def test_command_creates_gardens_of_json_manifest(self, tmp_path):
+        manifest = tmp_path / 'manifest.json'
+        manifest.write_text(json.dumps([{'name': 'Front', 'num_watering_stations': 3}]))
+
+        self.call_command(manifest)
+
+        assert self.owner.gardens.get(name='Front').watering_stations.count() == 3
+
+    @pytest.mark.django_db
+    def test_command_writes_api_key_of_each_garden_to_output_file_only_readable_by_its_owner(self):
+        self.call_command(self.csv_manifest)
+
+        keys = self.read_keys()
+        assert set(keys) == {'Front', 'Back'}
+        for name, key in keys.items():
+            assert Token.objects.get(garden__name=name, garden__owner=self.owner).verify(key)
+        assert stat.S_IMODE(os.stat(self.output).st_mode) == 0o600
+
+    @pytest.mark.django_db
+    def test_command_doesnt_create_gardens_or_overwrite_output_file_when_it_exists(self):
+        self.output.write_text('existing keys')
+
+        with pytest.raises(CommandError):
+            self.call_command(self.csv_manifest)
+
+        assert self.output.read_text() == 'existing keys'
+        assert not self.owner.gardens.exists()
+
+    @pytest.mark.django_db
+    @pytest.mark.parametrize('manifest', [
+        'name,num_watering_stations\nFront,1\nFront,2\n',
+        'name,num_watering_stations\nFront,-1\n',
+        'num_watering_stations\n1\n',
+    ], ids=['duplicate_name', 'negative_watering_stations', 'missing_name'])
+    def test_command_raises_command_error_and_creates_nothing_when_manifest_is_invalid(self, manifest):
+        self.csv_manifest.write_text(manifest)
+
+        with pytest.raises(CommandError):
+            self.call_command(self.csv_manifest)
+
+        assert not self.owner.gardens.exists()
+        assert not self.output.exists()
+
+    @pytest.mark.django_db
+    def test_command_raises_command_error_when_no_user_has_the_email(self):
+        with pytest.raises(CommandError):
+            call_command('provision_gardens', 'nobody@example.com', str(self.csv_manifest), '--output',
+                         str(self.output), stdout=StringIO())
@@ -0,0 +1,159 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+from django.db import transaction
+
+from garden.cache import (get_config_job_progress, get_garden_config,
+                          get_garden_versions, get_watering_station_configs,
+                          set_garden_config, set_watering_station_configs)
+from garden.configuration import (NOT_FOUND, UPDATED, apply_config_template,
+                                  run_config_job)
+from garden.models import ConfigJob
+
+
+@pytest.mark.integration
+class TestApplyConfigTemplate:
+    @pytest.mark.django_db
+    def test_sets_template_fields_on_gardens_and_all_of_their_watering_stations(self, user_factory, garden_factory):
+        user = user_factory()
+        garden_factory.create_batch(2, owner=user, watering_stations=3)
+        garden, other_garden = user.gardens.all()
+        other_thresholds = list(other_garden.watering_stations.values_list('moisture_threshold', flat=True))
+        template = {'update_frequency': timedelta(minutes=10), 'moisture_threshold': 42}
+
+        apply_config_template(user, template, gardens=[garden.pk], watering_stations=[])
+
+        garden.refresh_from_db()
+        assert garden.update_frequency == timedelta(minutes=10)
+        assert all(ws.moisture_threshold == 42 for ws in garden.watering_stations.all())
+        assert list(other_garden.watering_stations.values_list('moisture_threshold', flat=True)) == other_thresholds
+
+    @pytest.mark.django_db
+    def test_sets_only_watering_station_fields_on_watering_stations_given_by_pk(self, user_factory, garden_factory):
+        user = user_factory()
+        garden_factory.create_batch(1, owner=user, watering_stations=2)
+        garden = user.gardens.first()
+        update_frequency = garden.update_frequency
+        ws, other_ws = garden.watering_stations.all()
+        other_watering_duration = other_ws.watering_duration
+        template = {'update_frequency': timedelta(minutes=10), 'watering_duration': timedelta(minutes=3)}
+
+        apply_config_template(user, template, gardens=[], watering_stations=[ws.pk])
+
+        garden.refresh_from_db()
+        ws.refresh_from_db()
+        other_ws.refresh_from_db()
+        assert garden.update_frequency == update_frequency
+        assert ws.watering_duration == timedelta(minutes=3)
+        assert other_ws.watering_duration == other_watering_duration
+
+    @pytest.mark.django_db
+    def test_returns_results_that_mark_other_users_and_missing_targets_as_not_found(self, user_factory, garden_factory):
+        user, other_user = user_factory(), user_factory(gardens=1)
+        garden = garden_factory(owner=user, watering_stations=1)
+        ws = garden.watering_stations.first()
+        other_garden = other_user.gardens.first()
+        other_update_frequency = other_garden.update_frequency
+
+        results = apply_config_template(user, {'update_frequency': timedelta(minutes=10), 'moisture_threshold': 42},
+                                        gardens=[garden.pk, other_garden.pk], watering_stations=[ws.pk, 0])
+
+        assert results == {
+            'gardens': {str(garden.pk): UPDATED, str(other_garden.pk): NOT_FOUND},
+            'watering_stations': {str(ws.pk): UPDATED, '0': NOT_FOUND},
+        }
+        other_garden.refresh_from_db()
+        assert other_garden.update_frequency == other_update_frequency
+
+    @pytest.mark.django_db
+    def test_reports_progress_after_each_batch(self, user_factory, garden_factory):
+        user = user_factory()
+        garden_factory.create_batch(2, owner=user, watering_stations=3)
+        progress = []
+
+        with patch('garden.configuration.BATCH_SIZE', 2):
+            apply_config_template(user, {'update_frequency': timedelta(minutes=10), 'moisture_threshold': 42},
+                                  gardens=[garden.pk for garden in user.gardens.all()], watering_stations=[],
+                                  report_progress=lambda done, total: progress.append((done, total)))
+
+        assert progress == [(2, 8), (4, 8), (6, 8), (8, 8)]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_invalidates_cached_configs_and_pages_of_updated_gardens(self, user_factory, garden_factory):
+        user = user_factory()
+        garden_factory.create_batch(2, owner=user, watering_stations=1)
+        garden, other_garden = user.gardens.all()
+        for pk in [garden.pk, other_garden.pk]:
+            set_garden_config(pk, ('etag', {}))
+            set_watering_station_configs(pk, ('etag', []))
+        versions = get_garden_versions([garden.pk, other_garden.pk])
+
+        apply_config_template(user, {'update_frequency': timedelta(minutes=10), 'moisture_threshold': 42},
+                              gardens=[garden.pk], watering_stations=[])
+
+        assert get_garden_config(garden.pk) is None
+        assert get_watering_station_configs(garden.pk) is None
+        assert get_garden_config(other_garden.pk) is not None
+        assert get_watering_station_configs(other_garden.pk) is not None
+        new_versions = get_garden_versions([garden.pk, other_garden.pk])
+        assert new_versions[garden.pk] != versions[garden.pk]
+        assert new_versions[other_garden.pk] == versions[other_garden.pk]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_doesnt_invalidate_cached_configs_until_the_changes_are_committed(self, user_factory, garden_factory):
+        user = user_factory()
+        garden = garden_factory(owner=user, watering_stations=1)
+        set_garden_config(garden.pk, ('etag', {}))
+        set_watering_station_configs(garden.pk, ('etag', []))
+
+        with transaction.atomic():
+            apply_config_template(user, {'update_frequency': timedelta(minutes=10), 'moisture_threshold': 42},
+                                  gardens=[garden.pk], watering_stations=[])
+
+            assert get_garden_config(garden.pk) is not None
+            assert get_watering_station_configs(garden.pk) is not None
+
+        assert get_garden_config(garden.pk) is None
+        assert get_watering_station_configs(garden.pk) is None
+
+
+@pytest.mark.integration
+class TestRunConfigJob:
+    @pytest.mark.django_db
+    def test_applies_template_and_records_results_and_progress(self, user_factory, garden_factory):
+        user = user_factory()
+        garden_factory.create_batch(1, owner=user, watering_stations=2)
+        garden = user.gardens.first()
+        job = ConfigJob.objects.create(owner=user, data={
+            'template': {'moisture_threshold': 42}, 'gardens': [garden.pk], 'watering_stations': []
+        })
+
+        run_config_job(job.pk)
+
+        job.refresh_from_db()
+        assert job.status == ConfigJob.DONE
+        assert job.results == {'gardens': {str(garden.pk): UPDATED}, 'watering_stations': {}}
+        assert job.finished is not None
+        assert get_config_job_progress(job.pk) == (2, 2)
+        assert all(ws.moisture_threshold == 42 for ws in garden.watering_stations.all())
+
+    @pytest.mark.django_db
+    def test_marks_job_as_failed_and_updates_nothing_when_applying_the_template_fails(self, user_factory, garden_factory):
+        user = user_factory()
+        garden_factory.create_batch(1, owner=user, watering_stations=2)
+        garden = user.gardens.first()
+        thresholds = list(garden.watering_stations.values_list('moisture_threshold', flat=True))
+        job = ConfigJob.objects.create(owner=user, data={
+            'template': {'moisture_threshold': 42}, 'gardens': [garden.pk], 'watering_stations': []
+        })
+
+        with patch('garden.configuration.BATCH_SIZE', 1), \
+                patch('garden.configuration.set_config_job_progress', side_effect=[None, RuntimeError]):
+            run_config_job(job.pk)
+
+        job.refresh_from_db()
+        assert job.status == ConfigJob.FAILED
+        assert job.results is None
+        assert job.finished is not None
+        assert list(garden.watering_stations.values_list('moisture_threshold', flat=True)) == thresholds
@@ -3,7 +3,7 @@ from datetime import timedelta
 import pytest
 from django.core.exceptions import ValidationError
 
-from garden.forms import (GardenForm, INVALID_DURATION_ERR_MSG, MAX_VALUE_ERR_MSG,
+from garden.forms import (BulkUpdateWateringStationForm, GardenForm, INVALID_DURATION_ERR_MSG, MAX_VALUE_ERR_MSG,
                           MIN_VALUE_ERR_MSG, REQUIRED_FIELD_ERR_MSG,
                           NewGardenForm, WateringStationForm)
 from garden.models import Garden
@@ -161,3 +161,24 @@ class TestWateringStationForm:
 
         assert ret_val == False
         assert INVALID_DURATION_ERR_MSG in form.errors['watering_duration']
+
+
+@pytest.mark.integration
+class TestBulkUpdateWateringStationForm:
+    @pytest.mark.django_db
+    def test_get_updates_returns_submitted_fields(self):
+        form = BulkUpdateWateringStationForm(data={'moisture_threshold': '20', 'plant_type': 'Basil', 'status': 'on'})
+        form.is_valid()
+
+        ret_val = form.get_updates()
+
+        assert ret_val == {'moisture_threshold': 20, 'plant_type': 'Basil', 'status': True}
+
+    @pytest.mark.django_db
+    def test_get_updates_returns_unchecked_status_when_no_fields_are_submitted(self):
+        form = BulkUpdateWateringStationForm(data={})
+        form.is_valid()
+
+        ret_val = form.get_updates()
+
+        assert ret_val == {'status': False}
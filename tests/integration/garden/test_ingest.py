@@ -0,0 +1,255 @@
+import time
+from unittest.mock import patch
+
+import pytest
+
+from garden import ingest
+from garden.events import broker
+from garden.ingest import (MAX_WRITE_ATTEMPTS, IngestBuffer, IngestBufferFull,
+                           get_record_buffer)
+from garden.models import WateringStation, WateringStationRecord
+
+
+@pytest.mark.integration
+class TestIngestBuffer:
+    @pytest.fixture(autouse=True)
+    def setup(self, garden_factory):
+        self.garden = garden_factory(watering_stations=4)
+        self.watering_stations = list(self.garden.watering_stations.all())
+
+    def create_records(self, moisture_level=50.0):
+        return [WateringStationRecord(watering_station=station, moisture_level=moisture_level)
+                for station in self.watering_stations]
+
+    @pytest.mark.django_db
+    def test_put_doesnt_write_records_until_flushed(self):
+        buffer = IngestBuffer(max_size=100, flush_size=10, flush_interval=1)
+
+        buffer.put(self.create_records())
+
+        assert len(buffer) == len(self.watering_stations)
+        assert WateringStationRecord.objects.count() == 0
+
+    @pytest.mark.django_db
+    def test_flush_writes_buffered_records_and_empties_buffer(self):
+        buffer = IngestBuffer(max_size=100, flush_size=10, flush_interval=1)
+        buffer.put(self.create_records(1.0))
+        buffer.put(self.create_records(2.0))
+
+        count = buffer.flush()
+
+        assert count == 2 * len(self.watering_stations)
+        assert len(buffer) == 0
+        for station in self.watering_stations:
+            assert sorted(station.records.values_list('moisture_level', flat=True)) == [1.0, 2.0]
+
+    @pytest.mark.django_db
+    def test_flush_publishes_records_to_the_gardens_dashboards(self):
+        buffer = IngestBuffer(max_size=100, flush_size=10, flush_interval=1)
+        records = self.create_records()
+        buffer.put(records)
+
+        with patch.object(broker, 'has_subscribers', return_value=True), \
+                patch('garden.ingest.publish_records') as mock_publish:
+            buffer.flush()
+
+        mock_publish.assert_called_once_with(self.garden.pk, records)
+
+    @pytest.mark.django_db
+    def test_put_raises_buffer_full_without_adding_records_that_dont_fit(self):
+        buffer = IngestBuffer(max_size=len(self.watering_stations) + 1, flush_size=10, flush_interval=1)
+        buffer.put(self.create_records(1.0))
+
+        with pytest.raises(IngestBufferFull):
+            buffer.put(self.create_records(2.0))
+
+        assert len(buffer) == len(self.watering_stations)
+        buffer.flush()
+        assert set(WateringStationRecord.objects.values_list('moisture_level', flat=True)) == {1.0}
+
+    @pytest.mark.django_db
+    def test_records_being_written_count_towards_the_buffer_size(self):
+        buffer = IngestBuffer(max_size=len(self.watering_stations), flush_size=10, flush_interval=1)
+        buffer.put(self.create_records(1.0))
+
+        def write_records(records, batch_size):
+            with pytest.raises(IngestBufferFull):
+                buffer.put(self.create_records(2.0))
+
+        with patch('garden.ingest.write_records', side_effect=write_records) as mock_write:
+            buffer.flush()
+
+        mock_write.assert_called_once()
+        buffer.put(self.create_records(2.0))
+
+    @pytest.mark.django_db
+    def test_flush_drops_records_of_deleted_watering_stations_and_writes_the_rest(self, garden_factory):
+        other_station = garden_factory(watering_stations=1).watering_stations.get()
+        buffer = IngestBuffer(max_size=100, flush_size=10, flush_interval=1)
+        buffer.put(self.create_records())
+        buffer.put([WateringStationRecord(watering_station=other_station, moisture_level=50.0)])
+        other_station.delete()
+
+        count = buffer.flush()
+
+        assert count == len(self.watering_stations)
+        assert len(buffer) == 0
+        assert WateringStationRecord.objects.count() == len(self.watering_stations)
+
+    @pytest.mark.django_db
+    def test_flush_writes_the_records_of_each_garden_separately_when_they_cant_be_written_together(self,
+                                                                                                   garden_factory):
+        other_station = garden_factory(watering_stations=1).watering_stations.get()
+        buffer = IngestBuffer(max_size=100, flush_size=10, flush_interval=1)
+        buffer.put(self.create_records())
+        other_record = WateringStationRecord(watering_station=other_station, moisture_level=50.0)
+        buffer.put([other_record])
+        original_write_records = ingest.write_records
+
+        def write_records(records, batch_size):
+            if other_record in records:
+                raise RuntimeError()
+            return original_write_records(records, batch_size)
+
+        with patch('garden.ingest.write_records', side_effect=write_records):
+            count = buffer.flush()
+
+        assert count == len(self.watering_stations)
+        assert WateringStationRecord.objects.count() == len(self.watering_stations)
+        assert len(buffer) == 1
+        buffer.flush()
+        assert other_station.records.count() == 1
+        assert len(buffer) == 0
+
+    @pytest.mark.django_db
+    def test_flush_keeps_records_that_fail_to_be_written_for_the_next_flush(self):
+        buffer = IngestBuffer(max_size=100, flush_size=10, flush_interval=1)
+        buffer.put(self.create_records())
+
+        with patch('garden.ingest.write_records', side_effect=RuntimeError):
+            count = buffer.flush()
+
+        assert count == 0
+        assert len(buffer) == len(self.watering_stations)
+        buffer.flush()
+        assert WateringStationRecord.objects.count() == len(self.watering_stations)
+        assert len(buffer) == 0
+
+    @pytest.mark.django_db
+    def test_flush_drops_records_that_fail_to_be_written_too_many_times(self):
+        buffer = IngestBuffer(max_size=100, flush_size=10, flush_interval=1)
+        buffer.put(self.create_records())
+
+        with patch('garden.ingest.write_records', side_effect=RuntimeError):
+            for _ in range(MAX_WRITE_ATTEMPTS - 1):
+                buffer.flush()
+                assert len(buffer) == len(self.watering_stations)
+            buffer.flush()
+
+        assert len(buffer) == 0
+
+    @pytest.mark.django_db(transaction=True)
+    def test_flusher_thread_writes_records_once_flush_size_is_reached(self):
+        buffer = IngestBuffer(max_size=100, flush_size=len(self.watering_stations), flush_interval=60)
+        buffer.start()
+        try:
+            buffer.put(self.create_records())
+
+            deadline = time.monotonic() + 5
+            while len(buffer) > 0 and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            buffer.stop()
+
+        assert WateringStationRecord.objects.count() == len(self.watering_stations)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_flusher_thread_retries_records_that_fail_to_be_written_after_backing_off(self):
+        buffer = IngestBuffer(max_size=100, flush_size=len(self.watering_stations), flush_interval=0.2)
+        original_write_records = ingest.write_records
+        write_times = []
+
+        def write_records(records, batch_size):
+            write_times.append(time.monotonic())
+            # fails both the write of all of the records and the write of the garden's records of the first flush
+            if len(write_times) <= 2:
+                raise RuntimeError()
+            return original_write_records(records, batch_size)
+
+        with patch('garden.ingest.write_records', side_effect=write_records):
+            buffer.start()
+            try:
+                buffer.put(self.create_records())
+
+                deadline = time.monotonic() + 5
+                while len(buffer) > 0 and time.monotonic() < deadline:
+                    time.sleep(0.01)
+            finally:
+                buffer.stop()
+
+        assert WateringStationRecord.objects.count() == len(self.watering_stations)
+        assert len(write_times) == 3
+        assert write_times[2] - write_times[1] >= buffer.flush_interval
+
+    @pytest.mark.django_db
+    def test_flush_backs_off_exponentially_while_records_fail_to_be_written(self):
+        buffer = IngestBuffer(max_size=100, flush_size=10, flush_interval=1)
+        buffer.put(self.create_records())
+        delays = []
+
+        with patch('garden.ingest.write_records', side_effect=RuntimeError):
+            for _ in range(MAX_WRITE_ATTEMPTS):
+                buffer.flush()
+                delays.append(buffer._retry_delay)
+
+        assert delays == [1, 2, None]
+
+    @pytest.mark.django_db
+    def test_retried_records_dont_count_towards_the_flush_size(self):
+        buffer = IngestBuffer(max_size=100, flush_size=len(self.watering_stations), flush_interval=1)
+        buffer.put(self.create_records())
+
+        with patch('garden.ingest.write_records', side_effect=RuntimeError):
+            buffer.flush()
+
+        assert len(buffer) == len(self.watering_stations)
+        assert buffer._num_put == 0
+
+    @pytest.mark.django_db
+    def test_flush_logs_once_when_the_records_of_every_garden_fail_to_be_written(self, garden_factory):
+        garden_factory(watering_stations=1)
+        buffer = IngestBuffer(max_size=100, flush_size=10, flush_interval=1)
+        buffer.put(self.create_records())
+        buffer.put([WateringStationRecord(watering_station=station, moisture_level=50.0)
+                    for station in WateringStation.objects.exclude(garden=self.garden)])
+
+        with patch('garden.ingest.write_records', side_effect=RuntimeError), \
+                patch('garden.ingest.logger') as mock_logger:
+            buffer.flush()
+
+        mock_logger.error.assert_called_once()
+        mock_logger.exception.assert_not_called()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_stop_writes_records_that_are_still_buffered(self):
+        buffer = IngestBuffer(max_size=100, flush_size=100, flush_interval=60)
+        buffer.start()
+        buffer.put(self.create_records())
+
+        buffer.stop()
+
+        assert len(buffer) == 0
+        assert WateringStationRecord.objects.count() == len(self.watering_stations)
+
+
+@pytest.mark.integration
+class TestGetRecordBuffer:
+    def test_returns_the_same_started_buffer_to_each_caller(self, settings):
+        with patch('garden.ingest._buffer', None), patch.object(IngestBuffer, 'start') as mock_start:
+            buffer = get_record_buffer()
+
+            assert get_record_buffer() is buffer
+            mock_start.assert_called_once_with()
+            assert buffer.max_size == settings.WS_RECORDS_BUFFER_SIZE
+            assert buffer.flush_size == settings.WS_RECORDS_FLUSH_SIZE
+            assert buffer.flush_interval == settings.WS_RECORDS_FLUSH_INTERVAL
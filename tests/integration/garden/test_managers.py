@@ -1,7 +1,14 @@
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
 import pytest
+import pytz
 from django.contrib.auth.hashers import check_password
 
-from garden.models import Token
+from garden.cache import get_garden_versions
+from garden.events import broker
+from garden.models import (Garden, Token, WateringStationRecord,
+                           WateringStationRecordRollup)
 
 
 @pytest.mark.integration
@@ -24,3 +31,218 @@ class TestTokenManager:
 
         assert token.uuid != uuid
         assert check_password(uuid, token.uuid)
+
+
+@pytest.mark.integration
+class TestGardenQuerySet:
+    @pytest.fixture(autouse=True)
+    def setup(self, garden_factory):
+        self.now = datetime.now(pytz.UTC)
+        update_frequency = timedelta(minutes=5)
+        self.overdue_garden = garden_factory(is_connected=True, connection_strength=-50, update_frequency=update_frequency,
+                                             last_connection_time=self.now - timedelta(minutes=6))
+        self.connected_garden = garden_factory(is_connected=True, connection_strength=-50, update_frequency=update_frequency,
+                                               last_connection_time=self.now - timedelta(minutes=4))
+        self.new_garden = garden_factory(is_connected=False, connection_strength=None, last_connection_time=None)
+
+    @pytest.mark.django_db
+    def test_overdue_returns_gardens_that_havent_updated_within_their_update_frequency(self):
+        ret_val = Garden.objects.overdue(self.now)
+
+        assert list(ret_val) == [self.overdue_garden]
+
+    @pytest.mark.django_db
+    def test_get_times_till_next_update_returns_time_till_next_update_of_each_garden_in_a_single_query(self, django_assert_num_queries):
+        with django_assert_num_queries(1):
+            ret_val = Garden.objects.get_times_till_next_update(self.now)
+
+        assert ret_val == {
+            self.overdue_garden.pk: 4 * 60,
+            self.connected_garden.pk: 60,
+            self.new_garden.pk: None,
+        }
+
+    @pytest.mark.django_db
+    def test_disconnect_overdue_marks_overdue_gardens_as_disconnected_in_a_fixed_number_of_queries(
+            self, garden_factory, django_assert_num_queries):
+        other_overdue_garden = garden_factory(is_connected=True, update_frequency=timedelta(minutes=5),
+                                              last_connection_time=self.now - timedelta(minutes=6))
+
+        # the savepoint, the SELECT of the overdue gardens, the UPDATE and the release of the savepoint
+        with django_assert_num_queries(4):
+            garden_pks = Garden.objects.disconnect_overdue(self.now)
+
+        self.overdue_garden.refresh_from_db()
+        assert sorted(garden_pks) == sorted([self.overdue_garden.pk, other_overdue_garden.pk])
+        assert self.overdue_garden.is_connected == False
+        assert self.overdue_garden.connection_strength is None
+
+    @pytest.mark.django_db
+    def test_disconnect_overdue_doesnt_modify_gardens_that_arent_overdue(self):
+        Garden.objects.disconnect_overdue(self.now)
+
+        self.connected_garden.refresh_from_db()
+        self.new_garden.refresh_from_db()
+        assert self.connected_garden.is_connected == True
+        assert self.connected_garden.connection_strength == -50
+        assert self.new_garden.is_connected == False
+
+    @pytest.mark.django_db
+    def test_disconnect_overdue_skips_gardens_already_marked_as_disconnected(self):
+        Garden.objects.disconnect_overdue(self.now)
+
+        garden_pks = Garden.objects.disconnect_overdue(self.now)
+
+        assert garden_pks == []
+
+    @pytest.mark.django_db(transaction=True)
+    def test_disconnect_overdue_invalidates_the_cached_pages_of_the_updated_gardens(self):
+        versions = get_garden_versions([self.overdue_garden.pk, self.connected_garden.pk])
+
+        Garden.objects.disconnect_overdue(self.now)
+
+        new_versions = get_garden_versions([self.overdue_garden.pk, self.connected_garden.pk])
+        assert new_versions[self.overdue_garden.pk] != versions[self.overdue_garden.pk]
+        assert new_versions[self.connected_garden.pk] == versions[self.connected_garden.pk]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_disconnect_overdue_publishes_the_updated_gardens_to_their_dashboards(self):
+        with patch.object(broker, 'has_subscribers', return_value=True), \
+                patch('garden.managers.publish_garden') as mock_publish:
+            Garden.objects.disconnect_overdue(self.now)
+
+        mock_publish.assert_called_once_with(self.overdue_garden)
+        assert mock_publish.call_args[0][0].is_connected == False
+
+
+@pytest.mark.integration
+class TestWateringStationRecordManager:
+    @pytest.fixture(autouse=True)
+    def setup(self, watering_station, watering_station_record_factory):
+        self.cut_off_time = datetime.now(pytz.UTC) - timedelta(hours=1)
+        self.new_records = watering_station_record_factory.create_batch(2, watering_station=watering_station)
+        self.old_records = watering_station_record_factory.create_batch(7, watering_station=watering_station)
+        for i, record in enumerate(self.old_records):
+            record.created = self.cut_off_time - timedelta(minutes=1) + timedelta(seconds=i)
+            record.save()
+
+    @pytest.mark.django_db
+    @pytest.mark.parametrize('batch_size', [1, 3, 7, 100], ids=['1', '3', '7', '100'])
+    def test_prune_deletes_all_records_created_before_cut_off_time(self, batch_size):
+        WateringStationRecord.objects.prune(self.cut_off_time, batch_size)
+
+        for record in self.old_records:
+            with pytest.raises(WateringStationRecord.DoesNotExist):
+                record.refresh_from_db()
+
+    @pytest.mark.django_db
+    def test_prune_doesnt_delete_records_created_after_cut_off_time(self):
+        WateringStationRecord.objects.prune(self.cut_off_time, 3)
+
+        for record in self.new_records:
+            record.refresh_from_db()  # should not raise
+
+    @pytest.mark.django_db
+    def test_prune_returns_the_number_of_deleted_records(self):
+        ret_val = WateringStationRecord.objects.prune(self.cut_off_time, 3)
+
+        assert ret_val == len(self.old_records)
+
+    @pytest.mark.django_db
+    @pytest.mark.parametrize('batch_size', [0, -1], ids=['0', '-1'])
+    def test_prune_raises_value_error_when_batch_size_is_less_than_1(self, batch_size):
+        with pytest.raises(ValueError):
+            WateringStationRecord.objects.prune(self.cut_off_time, batch_size)
+
+        assert WateringStationRecord.objects.count() == len(self.old_records) + len(self.new_records)
+
+    @pytest.mark.django_db
+    def test_in_range_returns_records_created_at_or_after_start_and_before_end(self):
+        start = self.cut_off_time - timedelta(minutes=1)
+
+        ret_val = WateringStationRecord.objects.in_range(start, self.cut_off_time)
+
+        assert set(ret_val) == set(self.old_records)
+
+    @pytest.mark.django_db
+    def test_downsample_returns_min_avg_max_of_each_bucket_in_order(self, watering_station):
+        start = datetime(2021, 3, 1, tzinfo=pytz.UTC)
+        for i, moisture_level in enumerate([1, 2, 3, 10, 20, 30]):
+            record = watering_station.records.create(moisture_level=moisture_level)
+            record.created = start + timedelta(minutes=5 * i)
+            record.save()
+
+        ret_val = watering_station.records.downsample(start, start + timedelta(hours=1), timedelta(minutes=15))
+
+        assert list(ret_val) == [
+            (int(start.timestamp()), 1, 2, 3),
+            (int(start.timestamp()) + 15 * 60, 10, 20, 30),
+        ]
+
+
+@pytest.mark.integration
+class TestWateringStationRecordRollupManager:
+    @pytest.fixture(autouse=True)
+    def setup(self, watering_station, watering_station_record_factory):
+        self.watering_station = watering_station
+        self.start = datetime(2021, 3, 1, 23, tzinfo=pytz.UTC)
+        # two records in each of the hours 23:00 and 00:00, which fall on different days
+        for i, moisture_level in enumerate([10, 20, 30, 50]):
+            record = watering_station_record_factory(watering_station=watering_station, moisture_level=moisture_level)
+            record.created = self.start + i * timedelta(minutes=30)
+            record.save()
+
+    def get_rollups(self, resolution):
+        return [
+            (rollup.period_start, rollup.min_moisture_level, rollup.avg_moisture_level, rollup.max_moisture_level,
+             rollup.count)
+            for rollup in self.watering_station.rollups.filter(resolution=resolution)
+        ]
+
+    @pytest.mark.django_db
+    def test_compact_creates_hourly_rollups_from_records(self):
+        WateringStationRecordRollup.objects.compact(self.start, self.start + timedelta(hours=2))
+
+        assert self.get_rollups(WateringStationRecordRollup.HOUR) == [
+            (self.start, 10, 15, 20, 2),
+            (self.start + timedelta(hours=1), 30, 40, 50, 2),
+        ]
+
+    @pytest.mark.django_db
+    def test_compact_creates_daily_rollups_from_hourly_rollups(self):
+        WateringStationRecordRollup.objects.compact(self.start, self.start + timedelta(hours=2))
+
+        assert self.get_rollups(WateringStationRecordRollup.DAY) == [
+            (datetime(2021, 3, 1, tzinfo=pytz.UTC), 10, 15, 20, 2),
+            (datetime(2021, 3, 2, tzinfo=pytz.UTC), 30, 40, 50, 2),
+        ]
+
+    @pytest.mark.django_db
+    def test_compact_keeps_rollups_of_hours_before_start_when_rebuilding_daily_rollups(self):
+        WateringStationRecordRollup.objects.compact(self.start, self.start + timedelta(hours=2))
+        WateringStationRecord.objects.filter(created__lt=self.start + timedelta(hours=1)).delete()
+
+        WateringStationRecordRollup.objects.compact(self.start + timedelta(minutes=30), self.start + timedelta(hours=2))
+
+        assert self.get_rollups(WateringStationRecordRollup.HOUR)[0] == (self.start, 10, 15, 20, 2)
+        assert self.get_rollups(WateringStationRecordRollup.DAY)[0] == (datetime(2021, 3, 1, tzinfo=pytz.UTC), 10, 15, 20, 2)
+
+    @pytest.mark.django_db
+    def test_compact_replaces_existing_rollups_when_run_again(self):
+        WateringStationRecordRollup.objects.compact(self.start, self.start + timedelta(hours=2))
+
+        WateringStationRecordRollup.objects.compact(self.start, self.start + timedelta(hours=2))
+
+        assert WateringStationRecordRollup.objects.count() == 4
+
+    @pytest.mark.django_db
+    def test_downsample_aggregates_rollups_of_coarsest_resolution_into_buckets(self):
+        WateringStationRecordRollup.objects.compact(self.start, self.start + timedelta(hours=2))
+
+        ret_val = list(self.watering_station.rollups.downsample(
+            datetime(2021, 3, 1, tzinfo=pytz.UTC), datetime(2021, 3, 3, tzinfo=pytz.UTC), timedelta(days=1)))
+
+        assert ret_val == [
+            (datetime(2021, 3, 1, tzinfo=pytz.UTC).timestamp(), 10, 15, 20),
+            (datetime(2021, 3, 2, tzinfo=pytz.UTC).timestamp(), 30, 40, 50),
+        ]
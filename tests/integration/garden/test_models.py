@@ -1,10 +1,13 @@
 from datetime import datetime, timedelta
+from unittest.mock import patch
 
 import pytest
 import pytz
 from django.db.utils import IntegrityError
 from tests.assertions import assert_unordered_data_eq
 
+from garden.cache import (get_garden_versions, get_watering_station_configs,
+                          set_watering_station_configs)
 from garden.formatters import WateringStationFormatter
 from garden.models import Garden, Token, WateringStation
 
@@ -81,39 +84,6 @@ class TestGardenModel:
         with pytest.raises(Garden.DoesNotExist):
             garden.refresh_from_db()
 
-    @pytest.mark.django_db
-    def test_refresh_connection_status_updates_is_connected_if_update_hasnt_happened_within_the_update_frequency(self, garden):
-        garden.is_connected = True
-        garden.last_connection_time = datetime.now(pytz.UTC) - timedelta(minutes=10)
-        garden.update_frequency = timedelta(minutes=5)
-        garden.save()
-
-        garden.refresh_connection_status()
-
-        assert garden.is_connected == False
-
-    @pytest.mark.django_db
-    @pytest.mark.parametrize('is_connected', [True, False], ids=['true', 'false'])
-    def test_refresh_connection_status_doesnt_do_anything_if_last_connection_time_is_none(self, garden, is_connected):
-        garden.is_connected = is_connected
-        garden.last_connection_time = None
-        garden.save()
-
-        garden.refresh_connection_status()
-
-        assert garden.is_connected == is_connected
-
-    @pytest.mark.django_db
-    def test_refresh_connection_status_sets_connection_strength_to_none_if_update_hasnt_happened_within_the_update_frequency(self, garden):
-        garden.connection_strength = -1
-        garden.last_connection_time = datetime.now(pytz.UTC) - timedelta(minutes=10)
-        garden.update_frequency = timedelta(minutes=5)
-        garden.save()
-
-        garden.refresh_connection_status()
-
-        assert garden.connection_strength is None
-
     @pytest.mark.django_db
     def test_get_watering_station_formatters_returns_all_watering_stations_wrapped_in_a_formatter(self, garden):
         formatter_ids = set()
@@ -140,6 +110,28 @@ class TestGardenModel:
 
         assert ret_val == list(garden.watering_stations.all())[idx]
 
+    @pytest.mark.django_db
+    def test_get_watering_station_idx_returns_none_for_watering_station_of_another_garden(self, garden, garden1):
+        ret_val = garden.get_watering_station_idx(garden1.watering_stations.first())
+
+        assert ret_val is None
+
+    @pytest.mark.django_db
+    @pytest.mark.parametrize('garden__watering_stations', [2])
+    @pytest.mark.parametrize('idx', [-1, 2], ids=['negative', 'too_large'])
+    def test_get_watering_station_at_idx_returns_none_when_idx_is_out_of_range(self, garden, idx):
+        ret_val = garden.get_watering_station_at_idx(idx)
+
+        assert ret_val is None
+
+    @pytest.mark.django_db
+    @pytest.mark.parametrize('garden__watering_stations', [4])
+    def test_get_watering_station_formatters_annotates_idx_without_additional_queries(self, garden, django_assert_num_queries):
+        with django_assert_num_queries(1):
+            idxs = [formatter.instance.idx for formatter in garden.get_watering_station_formatters()]
+
+        assert idxs == list(range(4))
+
     @pytest.mark.django_db
     def test_get_watering_station_formatters_returns_generator_of_formatters_for_each_watering_station(self, garden2):
         for formatter, station in zip(garden2.get_watering_station_formatters(), garden2.watering_stations.all()):
@@ -192,6 +184,20 @@ class TestGardenModel:
         with pytest.raises(IntegrityError):
             garden_factory(owner=user, name=garden_name)
 
+    @pytest.mark.django_db
+    def test_update_watering_stations_updates_all_watering_stations_and_invalidates_their_cached_configs(self, garden):
+        garden.watering_stations.create(status=True)
+        garden.watering_stations.create(status=True)
+        set_watering_station_configs(garden.pk, ('etag', []))
+        version = get_garden_versions([garden.pk])[garden.pk]
+
+        ret_val = garden.update_watering_stations(status=False)
+
+        assert ret_val == 2
+        assert not garden.watering_stations.filter(status=True).exists()
+        assert get_watering_station_configs(garden.pk) is None
+        assert get_garden_versions([garden.pk])[garden.pk] != version
+
 
 @pytest.mark.integration
 class TestTokenModel:
@@ -222,6 +228,29 @@ class TestTokenModel:
 
         assert ret_val == False
 
+    @pytest.mark.django_db
+    @patch('garden.models.check_password', return_value=True)
+    def test_verify_only_checks_the_password_hash_once_for_repeated_successful_verifications(self, mock_check_password, token_factory):
+        uuid = 'random uuid'
+        token = token_factory(uuid=uuid)
+
+        for _ in range(3):
+            assert token.verify(uuid) == True
+
+        mock_check_password.assert_called_once_with(uuid, token.uuid)
+
+    @pytest.mark.django_db
+    def test_verify_returns_false_for_previously_verified_uuid_after_token_is_replaced(self, garden):
+        uuid = 'random uuid'
+        garden.token.delete()
+        token = Token.objects.create(garden=garden, uuid=uuid)
+        token.verify(uuid)
+        token.delete()
+
+        token = Token.objects.create(garden=garden, uuid='new uuid')
+
+        assert token.verify(uuid) == False
+
 
 @pytest.mark.integration
 class TestWateringStationModel:
@@ -277,6 +306,23 @@ class TestWateringStationModel:
         for i, station in enumerate(watering_stations):
             assert station.idx == i
 
+    @pytest.mark.django_db
+    def test_with_idx_annotates_each_watering_station_with_its_idx_within_its_garden(self, garden_factory):
+        garden_factory(watering_stations=3)
+        garden_factory(watering_stations=2)
+
+        for station in WateringStation.objects.with_idx():
+            assert station.idx == station.garden.get_watering_station_idx(station)
+
+    @pytest.mark.django_db
+    def test_idx_is_consistent_with_ordering_when_created_times_are_equal(self, garden, watering_station_factory):
+        stations = watering_station_factory.create_batch(3, garden=garden)
+        WateringStation.objects.filter(garden=garden).update(created=stations[0].created)
+
+        ret_val = [station.idx for station in garden.watering_stations.all()]
+
+        assert ret_val == [0, 1, 2]
+
     @pytest.mark.django_db
     def test_watering_stations_are_kept_in_the_order_they_are_created(self, watering_station_factory, garden):
         watering_stations = []
@@ -1,7 +1,20 @@
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
 import pytest
+import pytz
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from tests.assertions import assert_serializer_required_field_error
 
-from garden.serializers import GardenPatchSerializer
+from garden.events import broker
+from garden.models import WateringStationRecord
+from garden.serializers import (FUTURE_READING_ERR_MSG,
+                                MAX_READINGS_PER_WATERING_STATION,
+                                NUM_RECORDS_MISMATCH_ERR_MSG,
+                                TOO_MANY_READINGS_ERR_MSG,
+                                GardenPatchSerializer,
+                                WateringStationRecordSerializer)
 
 
 @pytest.mark.integration
@@ -14,3 +27,150 @@ class TestGardenPatchSerializer:
 
         assert serializer.is_valid() == False
         assert_serializer_required_field_error(serializer.errors[field])
+
+
+@pytest.mark.integration
+class TestWateringStationRecordSerializer:
+    @pytest.fixture(autouse=True)
+    def setup(self, garden_factory):
+        self.garden = garden_factory(watering_stations=4)
+        self.watering_stations = list(self.garden.watering_stations.all())
+
+    @pytest.mark.django_db
+    def test_save_creates_a_record_for_each_watering_station_in_order(self):
+        data = [{'moisture_level': float(i)} for i in range(len(self.watering_stations))]
+        serializer = WateringStationRecordSerializer(data=data, many=True, context={
+            'watering_stations': self.watering_stations
+        })
+
+        assert serializer.is_valid()
+        serializer.save()
+
+        for station, record in zip(self.watering_stations, data):
+            assert list(station.records.values_list('moisture_level', flat=True)) == [record['moisture_level']]
+
+    @pytest.mark.django_db
+    def test_save_publishes_the_created_records_to_the_gardens_dashboards(self):
+        data = [{'moisture_level': float(i)} for i in range(len(self.watering_stations))]
+        serializer = WateringStationRecordSerializer(data=data, many=True, context={
+            'watering_stations': self.watering_stations
+        })
+
+        assert serializer.is_valid()
+        with patch.object(broker, 'has_subscribers', return_value=True), \
+                patch('garden.ingest.publish_records') as mock_publish:
+            records = serializer.save()
+
+        mock_publish.assert_called_once_with(self.garden.pk, records)
+
+    @pytest.mark.django_db
+    def test_save_only_inserts_the_records_when_no_dashboard_is_open(self):
+        data = [{'moisture_level': float(i)} for i in range(len(self.watering_stations))]
+        serializer = WateringStationRecordSerializer(data=data, many=True, context={
+            'watering_stations': self.watering_stations
+        })
+
+        assert serializer.is_valid()
+        with CaptureQueriesContext(connection) as context, patch('garden.ingest.publish_records') as mock_publish:
+            serializer.save()
+
+        assert not any(query['sql'].startswith('SELECT') for query in context.captured_queries)
+        mock_publish.assert_not_called()
+        assert WateringStationRecord.objects.count() == len(self.watering_stations)
+
+    @pytest.mark.django_db
+    def test_is_valid_returns_false_when_number_of_records_doesnt_match_number_of_watering_stations(self):
+        data = [{'moisture_level': 1.0}]
+        serializer = WateringStationRecordSerializer(data=data, many=True, context={
+            'watering_stations': self.watering_stations
+        })
+
+        assert serializer.is_valid() == False
+        assert NUM_RECORDS_MISMATCH_ERR_MSG in serializer.errors['non_field_errors']
+        assert WateringStationRecord.objects.count() == 0
+
+    def create_serializer(self, data):
+        return WateringStationRecordSerializer(data=data, many=True, context={
+            'watering_stations': self.watering_stations
+        })
+
+    def create_readings(self, start, num_readings):
+        return [
+            {'moisture_level': float(i), 'created': (start + i * timedelta(minutes=5)).isoformat()}
+            for i in range(num_readings)
+        ]
+
+    @pytest.mark.django_db
+    def test_save_creates_a_record_for_each_buffered_reading_with_its_timestamp(self):
+        start = datetime.now(pytz.UTC) - timedelta(hours=1)
+        data = [self.create_readings(start, i) for i in range(len(self.watering_stations))]
+        serializer = self.create_serializer(data)
+
+        assert serializer.is_valid()
+        serializer.save()
+
+        for station, readings in zip(self.watering_stations, data):
+            expected = [(datetime.fromisoformat(reading['created']), reading['moisture_level']) for reading in readings]
+            assert list(station.records.values_list('created', 'moisture_level')) == expected
+
+    @pytest.mark.django_db
+    def test_save_accepts_a_mix_of_single_readings_and_lists_of_readings(self):
+        start = datetime.now(pytz.UTC) - timedelta(hours=1)
+        data = [self.create_readings(start, 3)] + [{'moisture_level': 1.0}] * (len(self.watering_stations) - 1)
+        serializer = self.create_serializer(data)
+
+        assert serializer.is_valid()
+        serializer.save()
+
+        assert WateringStationRecord.objects.count() == len(self.watering_stations) + 2
+
+    @pytest.mark.django_db
+    def test_save_skips_readings_that_were_already_saved(self):
+        start = datetime.now(pytz.UTC) - timedelta(hours=1)
+        data = [self.create_readings(start, 3) for _ in self.watering_stations]
+        first_serializer = self.create_serializer(data)
+        first_serializer.is_valid()
+        first_serializer.save()
+        data = [self.create_readings(start, 4) for _ in self.watering_stations]
+        serializer = self.create_serializer(data)
+
+        assert serializer.is_valid()
+        serializer.save()
+
+        assert WateringStationRecord.objects.count() == 4 * len(self.watering_stations)
+
+    @pytest.mark.django_db
+    def test_save_only_publishes_readings_that_werent_already_saved(self):
+        start = datetime.now(pytz.UTC) - timedelta(hours=1)
+        first_serializer = self.create_serializer([self.create_readings(start, 3) for _ in self.watering_stations])
+        first_serializer.is_valid()
+        first_serializer.save()
+        serializer = self.create_serializer([self.create_readings(start, 4) for _ in self.watering_stations])
+
+        assert serializer.is_valid()
+        with patch.object(broker, 'has_subscribers', return_value=True), \
+                patch('garden.ingest.publish_records') as mock_publish:
+            serializer.save()
+
+        published = mock_publish.call_args[0][1]
+        assert [(record.watering_station, record.created) for record in published] == [
+            (station, start + 3 * timedelta(minutes=5)) for station in self.watering_stations
+        ]
+
+    @pytest.mark.django_db
+    def test_is_valid_returns_false_when_a_reading_is_from_the_future(self):
+        data = [self.create_readings(datetime.now(pytz.UTC) + timedelta(hours=1), 1) for _ in self.watering_stations]
+        serializer = self.create_serializer(data)
+
+        assert serializer.is_valid() == False
+        assert FUTURE_READING_ERR_MSG in serializer.errors[0]['created']
+
+    @pytest.mark.django_db
+    def test_is_valid_returns_false_when_a_watering_station_has_too_many_readings(self):
+        start = datetime.now(pytz.UTC) - timedelta(days=7)
+        data = [[{'moisture_level': 1.0}]] * (len(self.watering_stations) - 1)
+        data.append(self.create_readings(start, MAX_READINGS_PER_WATERING_STATION + 1))
+        serializer = self.create_serializer(data)
+
+        assert serializer.is_valid() == False
+        assert TOO_MANY_READINGS_ERR_MSG in serializer.errors[-1]['non_field_errors']
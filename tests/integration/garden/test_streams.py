@@ -0,0 +1,123 @@
+import asyncio
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+from garden.events import GARDEN_EVENT, RECORDS_EVENT, broker, encode_event, publish_garden
+from garden.streams import KEEP_ALIVE_MESSAGE, EventStreamApplication
+
+
+@pytest.mark.integration
+class TestEventStreamApplication:
+    @pytest.fixture(autouse=True)
+    def setup(self, auth_client, auth_user_garden):
+        self.django_application = AsyncMock()
+        self.application = EventStreamApplication(self.django_application)
+        self.garden = auth_user_garden
+        self.session_id = auth_client.cookies[settings.SESSION_COOKIE_NAME].value
+
+    def create_scope(self, path, session_id=None):
+        session_id = session_id or self.session_id
+        return {
+            'type': 'http',
+            'method': 'GET',
+            'path': path,
+            'query_string': b'',
+            'headers': [(b'cookie', f'{settings.SESSION_COOKIE_NAME}={session_id}'.encode())],
+        }
+
+    async def stream(self, scope, until):
+        """Runs the application until it has sent the given number of messages, then disconnects."""
+        received = asyncio.Queue()
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+            if len(sent) == until:
+                await received.put({'type': 'http.disconnect'})
+
+        task = asyncio.ensure_future(self.application(scope, received.get, send))
+        return task, sent
+
+    def run(self, scope, until, action=None):
+        async def run():
+            task, sent = await self.stream(scope, until)
+            if action is not None:
+                while not broker.has_subscribers(self.garden.pk):
+                    await asyncio.sleep(0.01)
+                await action()
+            await asyncio.wait_for(task, timeout=5)
+            return sent
+
+        return asyncio.run(run())
+
+    @pytest.mark.django_db(transaction=True)
+    def test_streams_events_published_for_the_garden(self):
+        garden_message = encode_event(GARDEN_EVENT, {'a': 1})
+        records_message = encode_event(RECORDS_EVENT, [])
+
+        async def publish():
+            await sync_to_async(broker.publish)(self.garden.pk, GARDEN_EVENT, lambda: {'a': 1})
+            await sync_to_async(broker.publish)(self.garden.pk, RECORDS_EVENT, lambda: [])
+
+        sent = self.run(self.create_scope(self.garden.get_events_url()), until=3, action=publish)
+
+        assert sent[0]['status'] == status.HTTP_200_OK
+        assert (b'content-type', b'text/event-stream') in sent[0]['headers']
+        assert [message['body'] for message in sent[1:]] == [garden_message, records_message]
+        assert not broker.has_subscribers(self.garden.pk)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_streams_garden_connection_updates_saved_by_device_requests(self):
+        async def update():
+            self.garden.is_connected = True
+            await sync_to_async(self.garden.save)()
+
+        sent = self.run(self.create_scope(self.garden.get_events_url()), until=2, action=update)
+
+        assert sent[1]['body'].startswith(f'event: {GARDEN_EVENT}\n'.encode())
+
+    @pytest.mark.django_db(transaction=True)
+    def test_sends_keep_alive_message_when_stream_is_idle(self, monkeypatch):
+        monkeypatch.setattr('garden.streams.KEEP_ALIVE_INTERVAL', 0.01)
+
+        sent = self.run(self.create_scope(self.garden.get_events_url()), until=2)
+
+        assert sent[1]['body'] == KEEP_ALIVE_MESSAGE
+
+    @pytest.mark.django_db(transaction=True)
+    def test_returns_403_status_code_when_user_isnt_logged_in(self):
+        sent = self.run(self.create_scope(self.garden.get_events_url(), session_id='invalid'), until=2)
+
+        assert sent[0]['status'] == status.HTTP_403_FORBIDDEN
+
+    @pytest.mark.django_db(transaction=True)
+    def test_returns_404_status_code_when_garden_belongs_to_another_user(self, garden_factory):
+        garden = garden_factory()
+
+        sent = self.run(self.create_scope(garden.get_events_url()), until=2)
+
+        assert sent[0]['status'] == status.HTTP_404_NOT_FOUND
+
+    @pytest.mark.django_db(transaction=True)
+    def test_passes_other_requests_to_django(self):
+        scope = self.create_scope(reverse('garden-detail', kwargs={'pk': self.garden.pk}))
+
+        asyncio.run(self.application(scope, None, None))
+
+        self.django_application.assert_awaited_once_with(scope, None, None)
+
+
+@pytest.mark.integration
+class TestPublishGarden:
+    @pytest.mark.django_db
+    def test_publish_garden_doesnt_publish_when_garden_has_no_subscribers(self, garden, monkeypatch):
+        monkeypatch.setattr(broker, 'publish', Mock())
+
+        publish_garden(garden)
+
+        broker.publish.assert_not_called()
@@ -1,5 +1,6 @@
 import os
 import random
+import struct
 from datetime import datetime, timedelta
 from random import randint
 from unittest.mock import patch
@@ -7,15 +8,21 @@ from unittest.mock import patch
 import pytest
 import pytz
 from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 from rest_framework.reverse import reverse
 from tests import assertions
 
+from garden.cache import set_config_job_progress
+from garden.formatters import GardenFormatter, WateringStationFormatter
 from garden.forms import MIN_VALUE_ERR_MSG, REQUIRED_FIELD_ERR_MSG
-from garden.models import Garden, WateringStation, WateringStationRecord
+from garden.ingest import RETRY_AFTER, IngestBuffer
+from garden.models import (ConfigJob, Garden, Token, WateringStation, WateringStationRecord,
+                           WateringStationRecordRollup)
+from garden.parsers import MOISTURE_LEVELS_MEDIA_TYPE
 from garden.serializers import GardenGetSerializer, WateringStationSerializer
-from garden.utils import derive_duration_string
-from garden.views import WS_RECORDS_NUM_HOURS, WateringStationAPIView
+from garden.utils import derive_duration_string, floor_datetime
 
 
 @pytest.mark.integration
@@ -60,6 +67,53 @@ class TestGardenAPIView:
         assert len(resp.data) == 1  # reminder to update field equality assertions if adding another serializer field
         assert resp.data['update_frequency'] == self.garden.update_frequency.total_seconds()
 
+    @pytest.mark.django_db
+    def test_GET_returns_etag_header(self, auth_api_client):
+        resp = auth_api_client.get(self.url)
+
+        assert resp['ETag'] == self.garden.get_config_etag()
+
+    @pytest.mark.django_db
+    def test_GET_returns_304_status_code_without_data_when_if_none_match_matches_etag(self, auth_api_client):
+        etag = auth_api_client.get(self.url)['ETag']
+
+        resp = auth_api_client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        assert resp.status_code == status.HTTP_304_NOT_MODIFIED
+        assert resp['ETag'] == etag
+        assert resp.content == b''
+
+    @pytest.mark.django_db
+    def test_GET_returns_200_status_code_when_config_has_changed_since_etag_was_issued(self, auth_api_client):
+        etag = auth_api_client.get(self.url)['ETag']
+        self.garden.update_frequency += timedelta(seconds=1)
+        self.garden.save()
+
+        resp = auth_api_client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        assert resp.status_code == status.HTTP_200_OK
+        assert resp.data['update_frequency'] == self.garden.update_frequency.total_seconds()
+
+    @pytest.mark.django_db
+    def test_GET_with_if_none_match_header_still_requires_authorization_token(self, api_client, auth_api_client):
+        etag = auth_api_client.get(self.url)['ETag']
+
+        resp = api_client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        assert resp.status_code == status.HTTP_403_FORBIDDEN
+
+    @pytest.mark.django_db
+    def test_GET_reuses_cached_config_until_the_garden_is_saved(self, auth_api_client):
+        auth_api_client.get(self.url)
+
+        with patch('garden.views.GardenGetSerializer', wraps=GardenGetSerializer) as serializer:
+            resp = auth_api_client.get(self.url)
+            self.garden.save()
+            auth_api_client.get(self.url)
+
+        assert resp.data['update_frequency'] == self.garden.update_frequency.total_seconds()
+        serializer.assert_called_once()
+
     @pytest.mark.django_db
     def test_PATCH_updates_the_garden_with_request_data(self, auth_api_client, garden_patch_serializer_data):
         self.garden.water_level = Garden.OK if garden_patch_serializer_data['water_level'] == Garden.LOW else Garden.LOW
@@ -151,6 +205,47 @@ class TestWateringStationAPIView:
         for i, watering_station in enumerate(resp.data):
             assert watering_station == WateringStationSerializer(watering_stations[i]).data
 
+    @pytest.mark.django_db
+    def test_GET_returns_etag_header(self, auth_api_client):
+        resp = auth_api_client.get(self.url)
+
+        assert resp['ETag'] == self.garden.get_watering_station_configs_etag()
+
+    @pytest.mark.django_db
+    def test_GET_returns_304_status_code_without_data_when_if_none_match_matches_etag(self, auth_api_client):
+        etag = auth_api_client.get(self.url)['ETag']
+
+        resp = auth_api_client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        assert resp.status_code == status.HTTP_304_NOT_MODIFIED
+        assert resp['ETag'] == etag
+        assert resp.content == b''
+
+    @pytest.mark.django_db
+    @pytest.mark.parametrize('modify', [
+        lambda garden: garden.watering_stations.create(),
+        lambda garden: garden.watering_stations.first().delete(),
+        lambda garden: garden.update_watering_stations(moisture_threshold=101),
+    ], ids=['create', 'delete', 'update'])
+    def test_GET_returns_200_status_code_when_configs_have_changed_since_etag_was_issued(self, auth_api_client, modify):
+        etag = auth_api_client.get(self.url)['ETag']
+        modify(self.garden)
+
+        resp = auth_api_client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        assert resp.status_code == status.HTTP_200_OK
+        assert len(resp.data) == self.garden.watering_stations.count()
+
+    @pytest.mark.django_db
+    def test_GET_doesnt_query_watering_stations_when_configs_are_cached(self, auth_api_client):
+        expected = auth_api_client.get(self.url).data
+
+        with CaptureQueriesContext(connection) as queries:
+            resp = auth_api_client.get(self.url)
+
+        assert resp.data == expected
+        assert not any(WateringStation._meta.db_table in query['sql'] for query in queries.captured_queries)
+
     @pytest.mark.django_db
     def test_POST_adds_a_watering_station_record_to_each_watering_station_in_garden(self, auth_api_client):
         data = []
@@ -179,6 +274,109 @@ class TestWateringStationAPIView:
 
         assert resp.status_code == status.HTTP_201_CREATED
 
+    @pytest.mark.django_db
+    def test_POST_creates_all_watering_station_records_with_a_single_insert(self, auth_api_client):
+        data = [{'moisture_level': random.uniform(0, 100)} for _ in range(self.garden.watering_stations.count())]
+
+        with CaptureQueriesContext(connection) as captured:
+            auth_api_client.post(self.url, data=data, format='json')
+
+        inserts = [query for query in captured.captured_queries if query['sql'].startswith('INSERT')]
+        assert len(inserts) == 1
+
+    @pytest.mark.django_db
+    def test_POST_buffers_records_until_they_are_flushed_when_write_behind_is_enabled(self, auth_api_client, settings):
+        settings.WS_RECORDS_WRITE_BEHIND = True
+        buffer = IngestBuffer(max_size=100, flush_size=100, flush_interval=1)
+        data = [{'moisture_level': random.uniform(0, 100)} for _ in range(self.garden.watering_stations.count())]
+
+        with patch('garden.serializers.get_record_buffer', return_value=buffer):
+            resp = auth_api_client.post(self.url, data=data, format='json')
+
+        assert resp.status_code == status.HTTP_201_CREATED
+        assert WateringStationRecord.objects.count() == 0
+        buffer.flush()
+        for record, station in zip(data, self.garden.watering_stations.all()):
+            assert list(station.records.values_list('moisture_level', flat=True)) == [record['moisture_level']]
+
+    @pytest.mark.django_db
+    def test_POST_returns_503_status_code_with_retry_after_header_when_write_behind_buffer_is_full(self,
+                                                                                                 auth_api_client,
+                                                                                                 settings):
+        settings.WS_RECORDS_WRITE_BEHIND = True
+        buffer = IngestBuffer(max_size=0, flush_size=100, flush_interval=1)
+        data = [{'moisture_level': random.uniform(0, 100)} for _ in range(self.garden.watering_stations.count())]
+
+        with patch('garden.serializers.get_record_buffer', return_value=buffer):
+            resp = auth_api_client.post(self.url, data=data, format='json')
+
+        assert resp.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert resp['Retry-After'] == str(RETRY_AFTER)
+        assert len(buffer) == 0
+
+    @pytest.mark.django_db
+    @pytest.mark.parametrize('num_records_offset', [-1, 1], ids=['too_few', 'too_many'])
+    def test_POST_returns_400_status_code_when_number_of_records_doesnt_match_number_of_watering_stations(self, auth_api_client, num_records_offset):
+        num_records = self.garden.watering_stations.count() + num_records_offset
+        data = [{'moisture_level': random.uniform(0, 100)} for _ in range(num_records)]
+
+        resp = auth_api_client.post(self.url, data=data, format='json')
+
+        assert resp.status_code == status.HTTP_400_BAD_REQUEST
+        assert WateringStationRecord.objects.count() == 0
+
+    @pytest.mark.django_db
+    def test_POST_with_invalid_data_returns_400_status_code_and_doesnt_create_any_records(self, auth_api_client):
+        data = [{'moisture_level': random.uniform(0, 100)} for _ in range(self.garden.watering_stations.count())]
+        data[-1]['moisture_level'] = 'not a number'
+
+        resp = auth_api_client.post(self.url, data=data, format='json')
+
+        assert resp.status_code == status.HTTP_400_BAD_REQUEST
+        assert WateringStationRecord.objects.count() == 0
+
+    @pytest.mark.django_db
+    def test_POST_with_buffered_readings_creates_records_with_their_timestamps_once(self, auth_api_client):
+        start = datetime.now(pytz.UTC) - timedelta(hours=1)
+        data = [
+            [{'moisture_level': float(i), 'created': (start + i * timedelta(minutes=5)).isoformat()} for i in range(3)]
+            for _ in range(self.garden.watering_stations.count())
+        ]
+
+        resp = auth_api_client.post(self.url, data=data, format='json')
+        auth_api_client.post(self.url, data=data, format='json')
+
+        assert resp.status_code == status.HTTP_201_CREATED
+        for station in self.garden.watering_stations.all():
+            assert list(station.records.values_list('created', flat=True)) == [
+                start + i * timedelta(minutes=5) for i in range(3)]
+
+    @pytest.mark.django_db
+    def test_POST_with_packed_moisture_levels_adds_a_watering_station_record_to_each_watering_station(self, auth_api_client):
+        moisture_levels = [float(randint(0, 100)) for _ in range(self.garden.watering_stations.count())]
+
+        resp = auth_api_client.post(self.url, data=struct.pack(f'<{len(moisture_levels)}f', *moisture_levels),
+                                    content_type=MOISTURE_LEVELS_MEDIA_TYPE)
+
+        assert resp.status_code == status.HTTP_201_CREATED
+        for moisture_level, station in zip(moisture_levels, self.garden.watering_stations.all()):
+            assert list(station.records.values_list('moisture_level', flat=True)) == [moisture_level]
+
+    @pytest.mark.django_db
+    @pytest.mark.parametrize('moisture_levels, offset', [
+        ([50.0], 1),
+        ([50.0], -1),
+        ([float('nan')], 0),
+    ], ids=['too_many', 'too_few', 'nan'])
+    def test_POST_with_invalid_packed_moisture_levels_returns_400_status_code(self, auth_api_client, moisture_levels, offset):
+        moisture_levels = moisture_levels * (self.garden.watering_stations.count() + offset)
+
+        resp = auth_api_client.post(self.url, data=struct.pack(f'<{len(moisture_levels)}f', *moisture_levels),
+                                    content_type=MOISTURE_LEVELS_MEDIA_TYPE)
+
+        assert resp.status_code == status.HTTP_400_BAD_REQUEST
+        assert WateringStationRecord.objects.count() == 0
+
     @pytest.mark.django_db
     @pytest.mark.parametrize('method', ['get', 'post'], ids=['get', 'post'])
     def test_accessing_api_without_authorization_token_returns_403_response(self, api_client, method):
@@ -195,37 +393,274 @@ class TestWateringStationAPIView:
 
         assert resp.status_code == status.HTTP_400_BAD_REQUEST
 
-    def setup_ws_records(self, watering_station, watering_station_record_factory):
-        new_records = watering_station_record_factory.create_batch(
-            2, watering_station=watering_station)
-        old_records = []
-        for record in watering_station_record_factory.create_batch(20, watering_station=watering_station):
-            record.created = datetime.now(pytz.UTC) - timedelta(hours=WS_RECORDS_NUM_HOURS + 1)
-            record.save()
-            old_records.append(record)
+    @pytest.mark.django_db
+    def test_POST_doesnt_delete_expired_records(self, auth_api_client, watering_station_record_factory):
+        station = self.garden.watering_stations.first()
+        record = watering_station_record_factory(watering_station=station)
+        record.created = datetime.now(pytz.UTC) - settings.WS_RECORDS_RETENTION * 2
+        record.save()
+        data = [{'moisture_level': random.uniform(0, 100)} for _ in range(self.garden.watering_stations.count())]
+
+        auth_api_client.post(self.url, data=data, format='json')
+
+        record.refresh_from_db()  # should not raise
+
+
+@pytest.mark.integration
+class TestGardenSyncAPIView:
+    def create_url(self, name):
+        return reverse('api-garden-sync', kwargs={'name': name})
+
+    @pytest.fixture(autouse=True)
+    def setup(self, auth_api_garden, garden_patch_serializer_data):
+        self.garden = auth_api_garden
+        self.url = self.create_url(self.garden.name)
+        self.data = {
+            'garden': garden_patch_serializer_data,
+            'watering_stations': [
+                {'moisture_level': random.uniform(0, 100)} for _ in range(self.garden.watering_stations.count())
+            ]
+        }
+
+    def test_view_has_correct_url(self):
+        assert self.url == f'/api/gardens/{self.garden.name}/sync/'
+
+    @pytest.mark.django_db
+    def test_POST_returns_garden_and_watering_station_configs(self, auth_api_client):
+        resp = auth_api_client.post(self.url, data=self.data, format='json')
+
+        assert resp.status_code == status.HTTP_200_OK
+        assert resp.data['garden'] == GardenGetSerializer(self.garden).data
+        assert resp.data['watering_stations'] == WateringStationSerializer(
+            self.garden.watering_stations.all(), many=True).data
+
+    @pytest.mark.django_db
+    def test_POST_updates_the_garden_with_request_data(self, auth_api_client):
+        resp = auth_api_client.post(self.url, data=self.data, format='json')
+
+        self.garden.refresh_from_db()
+        assertions.assert_model_fields_have_values(self.data['garden'], self.garden)
+        assertions.assert_garden_connection_fields_are_updated(self.garden, resp)
+
+    @pytest.mark.django_db
+    def test_POST_adds_a_watering_station_record_to_each_watering_station_in_garden(self, auth_api_client):
+        auth_api_client.post(self.url, data=self.data, format='json')
+
+        for record, station in zip(self.data['watering_stations'], self.garden.watering_stations.all()):
+            assert list(station.records.values_list('moisture_level', flat=True)) == [record['moisture_level']]
+
+    @pytest.mark.django_db
+    def test_POST_verifies_the_api_key_once(self, auth_api_client):
+        with patch('garden.models.check_password', return_value=True) as mock_check_password:
+            auth_api_client.post(self.url, data=self.data, format='json')
+
+        mock_check_password.assert_called_once()
+
+    @pytest.mark.django_db
+    @pytest.mark.parametrize('field', ['garden', 'watering_stations'], ids=['garden', 'watering_stations'])
+    def test_POST_with_missing_data_returns_400_status_code_and_doesnt_modify_anything(self, auth_api_client, field):
+        self.data.pop(field)
+        prev_last_connection_time = self.garden.last_connection_time
+
+        resp = auth_api_client.post(self.url, data=self.data, format='json')
+
+        self.garden.refresh_from_db()
+        assert resp.status_code == status.HTTP_400_BAD_REQUEST
+        assertions.assert_serializer_required_field_error(resp.data[field])
+        assert self.garden.last_connection_time == prev_last_connection_time
+        assert WateringStationRecord.objects.count() == 0
+
+    @pytest.mark.django_db
+    def test_accessing_api_without_authorization_token_returns_403_response(self, api_client):
+        resp = api_client.post(self.url, data=self.data, format='json')
+
+        assert resp.status_code == status.HTTP_403_FORBIDDEN
+
+    @pytest.mark.django_db
+    def test_POST_returns_400_status_code_when_no_garden_with_specified_name_exists(self, auth_api_client):
+        url = self.create_url('name-that-doesnt-exist')
+
+        resp = auth_api_client.post(url, data=self.data, format='json')
+
+        assert resp.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.integration
+class TestGardenProvisionAPIView:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.url = reverse('api-garden-provision')
+
+    def test_view_has_correct_url(self):
+        assert self.url == '/api/gardens/'
+
+    @pytest.mark.django_db
+    def test_POST_with_json_manifest_creates_gardens_and_returns_their_api_keys(self, auth_client, auth_user):
+        manifest = [{'name': 'Front', 'num_watering_stations': 2}, {'name': 'Back', 'update_frequency': '60'}]
+
+        resp = auth_client.post(self.url, data=manifest, content_type='application/json')
+
+        assert resp.status_code == status.HTTP_201_CREATED
+        assert [garden['name'] for garden in resp.json()] == ['Front', 'Back']
+        for garden in resp.json():
+            created = auth_user.gardens.get(name=garden['name'])
+            assert created.token.verify(garden['api_key'])
+        assert auth_user.gardens.get(name='Front').watering_stations.count() == 2
+        assert auth_user.gardens.get(name='Back').update_frequency == timedelta(minutes=1)
+
+    @pytest.mark.django_db
+    def test_POST_with_csv_manifest_creates_gardens(self, auth_client, auth_user):
+        resp = auth_client.post(self.url, data='name,num_watering_stations\nFront,2\n', content_type='text/csv')
+
+        assert resp.status_code == status.HTTP_201_CREATED
+        assert auth_user.gardens.get(name='Front').watering_stations.count() == 2
+
+    @pytest.mark.django_db
+    def test_POST_returns_400_status_code_and_creates_nothing_when_a_garden_name_is_already_used(self, auth_client,
+                                                                                                auth_user):
+        existing_name = auth_user.gardens.first().name
+        manifest = [{'name': 'Front'}, {'name': existing_name}]
+
+        resp = auth_client.post(self.url, data=manifest, content_type='application/json')
+
+        assert resp.status_code == status.HTTP_400_BAD_REQUEST
+        assert not auth_user.gardens.filter(name='Front').exists()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_POST_renders_created_gardens_on_garden_list_page_that_was_cached(self, auth_client):
+        auth_client.get(reverse('garden-list'))
+
+        auth_client.post(self.url, data=[{'name': 'Front'}], content_type='application/json')
+
+        assert 'Front' in auth_client.get(reverse('garden-list')).content.decode()
+
+    @pytest.mark.django_db
+    def test_POST_returns_403_status_code_when_user_is_logged_out(self, client):
+        resp = client.post(self.url, data=[{'name': 'Front'}], content_type='application/json')
+
+        assert resp.status_code == status.HTTP_403_FORBIDDEN
+        assert not Garden.objects.exists()
 
-        return old_records, new_records
+
+@pytest.mark.integration
+class TestConfigJobListAPIView:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.url = reverse('api-config-jobs')
+
+    def test_view_has_correct_url(self):
+        assert self.url == '/api/config-jobs/'
+
+    @pytest.mark.django_db
+    def test_POST_applies_template_and_returns_results_when_there_are_few_targets(self, auth_client, auth_user):
+        garden = auth_user.gardens.first()
+        data = {'template': {'update_frequency': '00:10:00'}, 'gardens': [garden.pk]}
+
+        resp = auth_client.post(self.url, data=data, content_type='application/json')
+
+        assert resp.status_code == status.HTTP_200_OK
+        assert resp.json() == {'status': ConfigJob.DONE, 'results': {
+            'gardens': {str(garden.pk): 'updated'}, 'watering_stations': {}
+        }}
+        garden.refresh_from_db()
+        assert garden.update_frequency == timedelta(minutes=10)
+        assert not ConfigJob.objects.exists()
+
+    @pytest.mark.django_db
+    def test_POST_starts_a_job_and_returns_its_url_when_there_are_many_targets(self, auth_client, auth_user, settings):
+        settings.CONFIG_JOB_BACKGROUND_THRESHOLD = 0
+        garden = auth_user.gardens.first()
+        data = {'template': {'update_frequency': '00:10:00', 'moisture_threshold': 42}, 'gardens': [garden.pk]}
+
+        with patch('garden.views.start_config_job') as mock_start:
+            resp = auth_client.post(self.url, data=data, content_type='application/json')
+
+        job = ConfigJob.objects.get()
+        assert resp.status_code == status.HTTP_202_ACCEPTED
+        assert resp.json() == {'status': ConfigJob.PENDING, 'url': job.get_absolute_url()}
+        assert job.owner == auth_user
+        assert job.data == {**data, 'watering_stations': []}
+        mock_start.assert_called_once_with(job)
+
+    @pytest.mark.django_db
+    def test_POST_runs_a_job_when_the_given_gardens_have_more_watering_stations_than_the_threshold(
+            self, auth_client, auth_user, watering_station_factory, settings):
+        settings.CONFIG_JOB_BACKGROUND_THRESHOLD = 2
+        garden = auth_user.gardens.first()
+        watering_station_factory.create_batch(3, garden=garden)
+        data = {'template': {'moisture_threshold': 42}, 'gardens': [garden.pk]}
+
+        with patch('garden.views.start_config_job'):
+            resp = auth_client.post(self.url, data=data, content_type='application/json')
+
+        assert resp.status_code == status.HTTP_202_ACCEPTED
+
+    @pytest.mark.django_db
+    @pytest.mark.parametrize('data', [
+        {'template': {}, 'gardens': [1]},
+        {'template': {'moisture_threshold': 42}},
+        {'template': {'moisture_threshold': 101}, 'gardens': [1]},
+        {'template': {'update_frequency': '0'}, 'gardens': [1]},
+    ], ids=['empty_template', 'no_targets', 'invalid_moisture_threshold', 'invalid_update_frequency'])
+    def test_POST_returns_400_status_code_when_data_is_invalid(self, auth_client, data):
+        resp = auth_client.post(self.url, data=data, content_type='application/json')
+
+        assert resp.status_code == status.HTTP_400_BAD_REQUEST
+
+    @pytest.mark.django_db
+    def test_POST_returns_403_status_code_when_user_is_logged_out(self, client):
+        data = {'template': {'moisture_threshold': 42}, 'gardens': [1]}
+
+        resp = client.post(self.url, data=data, content_type='application/json')
+
+        assert resp.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.integration
+class TestConfigJobAPIView:
+    def create_url(self, pk):
+        return reverse('api-config-job', kwargs={'pk': pk})
+
+    def test_view_has_correct_url(self):
+        assert self.create_url(1) == '/api/config-jobs/1/'
+
+    @pytest.mark.django_db
+    def test_GET_returns_status_and_progress_of_running_job(self, auth_client, auth_user):
+        job = ConfigJob.objects.create(owner=auth_user, data={}, status=ConfigJob.RUNNING)
+        set_config_job_progress(job.pk, 500, 1000)
+
+        resp = auth_client.get(self.create_url(job.pk))
+
+        assert resp.status_code == status.HTTP_200_OK
+        assert resp.json()['status'] == ConfigJob.RUNNING
+        assert resp.json()['progress'] == {'done': 500, 'total': 1000}
+        assert resp.json()['results'] is None
+
+    @pytest.mark.django_db
+    def test_GET_returns_results_of_job_that_is_done(self, auth_client, auth_user):
+        results = {'gardens': {'1': 'updated'}, 'watering_stations': {}}
+        job = ConfigJob.objects.create(owner=auth_user, data={}, status=ConfigJob.DONE, results=results)
+
+        resp = auth_client.get(self.create_url(job.pk))
+
+        assert resp.status_code == status.HTTP_200_OK
+        assert resp.json()['results'] == results
 
     @pytest.mark.django_db
-    def test_prune_records_deletes_all_records_that_are_older_than_WS_RECORDS_NUM_HOURS(self, watering_station, watering_station_record_factory):
-        old_records, _ = self.setup_ws_records(watering_station, watering_station_record_factory)
-        view = WateringStationAPIView()
+    def test_GET_returns_404_status_code_for_job_of_another_user(self, auth_client, user_factory):
+        job = ConfigJob.objects.create(owner=user_factory(), data={})
 
-        view.prune_records(watering_station.garden)
+        resp = auth_client.get(self.create_url(job.pk))
 
-        for record in old_records:
-            with pytest.raises(WateringStationRecord.DoesNotExist):
-                record.refresh_from_db()
+        assert resp.status_code == status.HTTP_404_NOT_FOUND
 
     @pytest.mark.django_db
-    def test_prune_records_doesnt_delete_records_that_are_newer_than_WS_RECORDS_NUM_HOURS(self, watering_station, watering_station_record_factory):
-        _, new_records = self.setup_ws_records(watering_station, watering_station_record_factory)
-        view = WateringStationAPIView()
+    def test_GET_returns_403_status_code_when_user_is_logged_out(self, client, user_factory):
+        job = ConfigJob.objects.create(owner=user_factory(), data={})
 
-        view.prune_records(watering_station.garden)
+        resp = client.get(self.create_url(job.pk))
 
-        for record in new_records:
-            record.refresh_from_db()  # shouldnt raise
+        assert resp.status_code == status.HTTP_403_FORBIDDEN
 
 
 @pytest.mark.integration
@@ -249,6 +684,67 @@ class TestGardenListView:
 
         assertions.assert_template_is_rendered(resp, 'garden_list.html')
 
+    @pytest.mark.django_db
+    @pytest.mark.parametrize('num_gardens, num_watering_stations', [(1, 1), (5, 4)], ids=['few', 'many'])
+    def test_GET_renders_in_a_fixed_number_of_queries(self, auth_client, auth_user, garden_factory, num_gardens,
+                                                      num_watering_stations, django_assert_num_queries):
+        garden_factory.create_batch(num_gardens, owner=auth_user, watering_stations=num_watering_stations)
+
+        # session, user, garden pks, gardens with their tokens and station counts, plant types
+        with django_assert_num_queries(5):
+            auth_client.get(self.url)
+
+    @pytest.mark.django_db
+    def test_GET_only_queries_session_and_user_when_garden_cards_are_cached(self, auth_client, auth_user,
+                                                                            garden_factory, django_assert_num_queries):
+        garden_factory.create_batch(3, owner=auth_user, watering_stations=2)
+        auth_client.get(self.url)
+
+        with django_assert_num_queries(2):
+            resp = auth_client.get(self.url)
+
+        assert len(resp.context['garden_cards']) == auth_user.gardens.count()
+
+    @pytest.mark.django_db
+    def test_GET_rerenders_card_of_garden_that_changed_since_it_was_cached(self, auth_client, auth_user_garden,
+                                                                          watering_station_factory):
+        auth_client.get(self.url)
+        auth_user_garden.name = 'renamed'
+        auth_user_garden.save()
+        watering_station_factory(garden=auth_user_garden, plant_type='tomato')
+
+        resp = auth_client.get(self.url)
+
+        card = self.get_garden_card(resp, auth_user_garden)
+        assert 'renamed' in card
+        assert 'tomato' in card
+
+    @pytest.mark.django_db
+    def test_GET_renders_cards_of_gardens_created_since_cards_were_cached(self, auth_client, auth_user,
+                                                                         new_garden_form_fields):
+        auth_client.get(self.url)
+        auth_client.post(self.url, data=new_garden_form_fields)
+
+        resp = auth_client.get(self.url)
+
+        assert self.get_garden_card(resp, auth_user.gardens.get(name=new_garden_form_fields['name'])) is not None
+
+    def get_garden_card(self, resp, garden):
+        return next((card for card in resp.context['garden_cards'] if f'"{garden.get_absolute_url()}"' in card), None)
+
+    @pytest.mark.django_db
+    def test_GET_renders_watering_station_counts_and_plant_types_of_each_garden(self, auth_client, auth_user, garden_factory):
+        garden = garden_factory(owner=auth_user, watering_stations=3)
+        garden.watering_stations.update(status=True, plant_type='basil')
+        garden.watering_stations.filter(pk=garden.watering_stations.first().pk).update(status=False, plant_type='')
+
+        resp = auth_client.get(self.url)
+
+        card = self.get_garden_card(resp, garden)
+        assert '<dd class="col-sm-8">3</dd>' in card
+        assert '<dd class="col-sm-8">2/3</dd>' in card
+        assert '<dd class="col-sm-8 text-capitalize">basil, basil</dd>' in card
+
     @pytest.mark.django_db
     def test_POST_with_valid_data_creates_new_garden_for_user_with_specified_num_watering_stations(self, auth_client, auth_user, new_garden_form_fields):
         prev_num_gardens = auth_user.gardens.all().count()
@@ -302,6 +798,61 @@ class TestGardenDetailView:
 
         assertions.assert_template_is_rendered(resp, 'garden_detail.html')
 
+    @pytest.mark.django_db
+    @pytest.mark.parametrize('num_watering_stations', [1, 8], ids=['few', 'many'])
+    def test_GET_renders_in_a_fixed_number_of_queries(self, auth_client, auth_user, garden_factory,
+                                                      num_watering_stations, django_assert_num_queries):
+        garden = garden_factory(owner=auth_user, watering_stations=num_watering_stations)
+
+        # session, user, garden with its token, watering stations for the table and the nav bar
+        with django_assert_num_queries(5):
+            auth_client.get(self.create_url(garden.pk))
+
+    @pytest.mark.django_db
+    def test_GET_only_queries_session_and_user_when_garden_fragments_are_cached(self, auth_client,
+                                                                                django_assert_num_queries):
+        expected = auth_client.get(self.url).context['garden_detail']
+
+        with django_assert_num_queries(2):
+            resp = auth_client.get(self.url)
+
+        assert resp.context['garden_detail'] == expected
+
+    @pytest.mark.django_db
+    def test_GET_rerenders_fragments_when_a_watering_station_changed_since_they_were_cached(
+            self, auth_client, watering_station_factory):
+        watering_station = watering_station_factory(garden=self.garden)
+        auth_client.get(self.url)
+        watering_station.plant_type = 'tomato'
+        watering_station.save()
+
+        resp = auth_client.get(self.url)
+
+        assert 'tomato' in resp.context['garden_detail']['watering_stations']
+
+    @pytest.mark.django_db
+    def test_GET_redirects_users_who_dont_own_the_garden_to_404_page_when_fragments_are_cached(self, auth_client,
+                                                                                              client, garden):
+        client.force_login(garden.owner)
+        client.get(self.create_url(garden.pk))
+
+        resp = auth_client.get(self.create_url(garden.pk))
+
+        assertions.assert_404_rendered(resp)
+
+    @pytest.mark.django_db
+    def test_GET_displays_overdue_garden_as_disconnected_without_modifying_it(self, auth_client):
+        self.garden.is_connected = True
+        self.garden.last_connection_time = datetime.now(pytz.UTC) - timedelta(minutes=10)
+        self.garden.update_frequency = timedelta(minutes=5)
+        self.garden.save()
+
+        resp = auth_client.get(self.url)
+
+        self.garden.refresh_from_db()
+        assert self.garden.is_connected == True
+        assert resp.context['garden'].get_is_connected_display() == GardenFormatter.DISCONNECTED_STR
+
     @pytest.mark.django_db
     def test_GET_redirects_users_who_dont_own_the_garden_to_404_page_not_found(self, auth_client, garden):
         url = self.create_url(garden.pk)
@@ -380,6 +931,32 @@ class TestGardenUpdateView:
         assertions.assert_redirect(resp, reverse('login'), self.url)
 
 
+@pytest.mark.integration
+class TestGardenEventsView:
+    @pytest.fixture(autouse=True)
+    def setup(self, auth_user_garden):
+        self.garden = auth_user_garden
+        self.url = reverse('garden-events', kwargs={'pk': self.garden.pk})
+
+    @pytest.mark.django_db
+    def test_view_has_correct_url(self):
+        assert self.url == f'/gardens/{self.garden.pk}/events/'
+
+    @pytest.mark.django_db
+    def test_GET_returns_204_status_code_so_event_source_stops_reconnecting_when_not_served_by_asgi(self, auth_client):
+        resp = auth_client.get(self.url)
+
+        assert resp.status_code == status.HTTP_204_NO_CONTENT
+
+    @pytest.mark.django_db
+    def test_GET_returns_404_status_code_when_garden_belongs_to_another_user(self, auth_client, garden_factory):
+        garden = garden_factory()
+
+        resp = auth_client.get(reverse('garden-events', kwargs={'pk': garden.pk}))
+
+        assert resp.status_code == status.HTTP_404_NOT_FOUND
+
+
 @pytest.mark.integration
 class TestGardenDeleteView:
     def create_url(self, pk):
@@ -578,6 +1155,48 @@ class TestWateringStationListView:
         for station in self.garden.watering_stations.all():
             assert station.status == data['status']
 
+    @pytest.mark.django_db
+    @pytest.mark.parametrize('num_watering_stations', [1, 20], ids=['1', '20'])
+    def test_PATCH_updates_watering_stations_in_a_fixed_number_of_queries(self, auth_client, watering_station_factory,
+                                                                          num_watering_stations,
+                                                                          django_assert_num_queries):
+        watering_station_factory.create_batch(num_watering_stations, garden=self.garden, status=False)
+
+        with django_assert_num_queries(4):
+            auth_client.post(self.url, data={'_method': 'patch', 'status': 'true'})
+
+        assert not self.garden.watering_stations.filter(status=False).exists()
+
+    @pytest.mark.django_db
+    def test_PATCH_only_updates_submitted_fields_and_status(self, auth_client, watering_station_factory):
+        watering_station_factory.create_batch(2, garden=self.garden, status=True, plant_type='Basil',
+                                              moisture_threshold=30)
+
+        auth_client.post(self.url, data={'_method': 'patch', 'moisture_threshold': '40'})
+
+        assert list(self.garden.watering_stations.values_list('status', 'plant_type', 'moisture_threshold')) == [
+            (False, 'Basil', 40), (False, 'Basil', 40)
+        ]
+
+    @pytest.mark.django_db
+    def test_PATCH_doesnt_update_watering_stations_when_data_is_invalid(self, auth_client, watering_station_factory):
+        watering_station_factory.create_batch(2, garden=self.garden, status=True, moisture_threshold=30)
+
+        auth_client.post(self.url, data={'_method': 'patch', 'moisture_threshold': '101', 'status': 'true'})
+
+        assert not self.garden.watering_stations.exclude(moisture_threshold=30).exists()
+
+    @pytest.mark.django_db
+    def test_PATCH_rerenders_cached_garden_detail_page(self, auth_client, watering_station_factory):
+        watering_station_factory(garden=self.garden, status=True)
+        auth_client.get(self.garden.get_absolute_url())
+
+        auth_client.post(self.url, data={'_method': 'patch'})
+
+        content = auth_client.get(self.garden.get_absolute_url()).content.decode()
+        assert WateringStationFormatter.INACTIVE_STATUS_STR in content
+        assert WateringStationFormatter.ACTIVE_STATUS_STR not in content
+
     @pytest.mark.django_db
     def test_PATCH_redirects_to_garden_detail_page(self, auth_client):
         data = {'status': False}
@@ -736,6 +1355,104 @@ class TestWateringStationRecordListView:
         assert len(json['data']) == len(expected_records)
         assert set(json['data']) == set(record.moisture_level for record in expected_records)
 
+    def create_records(self, start, interval, moisture_levels):
+        records = []
+        for i, moisture_level in enumerate(moisture_levels):
+            record = self.watering_station.records.create(moisture_level=moisture_level)
+            record.created = start + i * interval
+            record.save()
+            records.append(record)
+        return records
+
+    @pytest.mark.django_db
+    def test_GET_returns_records_within_the_requested_range(self, auth_client):
+        start = datetime(2021, 3, 1, tzinfo=pytz.UTC)
+        records = self.create_records(start, timedelta(minutes=10), range(10))
+
+        resp = auth_client.get(self.url, data={
+            'start': (start + timedelta(minutes=20)).isoformat(),
+            'end': (start + timedelta(minutes=50)).isoformat()
+        })
+
+        assert resp.json()['data'] == [record.moisture_level for record in records[2:5]]
+
+    @pytest.mark.django_db
+    def test_GET_with_bucket_returns_min_avg_and_max_per_bucket(self, auth_client):
+        start = floor_datetime(datetime.now(pytz.UTC) - timedelta(hours=3), timedelta(hours=1))
+        self.create_records(start, timedelta(minutes=20), [10, 20, 30, 40, 50, 60])
+
+        resp = auth_client.get(self.url, data={
+            'start': start.isoformat(),
+            'end': (start + timedelta(hours=2)).isoformat(),
+            'bucket': '1h'
+        })
+        json = resp.json()
+
+        assert [datetime.fromisoformat(label.replace('Z', '+00:00')) for label in json['labels']] == [
+            start, start + timedelta(hours=1)]
+        assert json['min'] == [10, 40]
+        assert json['data'] == [20, 50]
+        assert json['max'] == [30, 60]
+
+    @pytest.mark.django_db
+    def test_GET_with_bucket_reads_buckets_older_than_the_retention_period_from_rollups(self, auth_client):
+        start = datetime(2021, 3, 1, tzinfo=pytz.UTC)
+        self.create_records(start, timedelta(hours=8), [10, 20, 30, 40, 50, 60])
+        WateringStationRecordRollup.objects.compact(start, start + timedelta(days=2))
+        self.watering_station.records.all().delete()
+
+        resp = auth_client.get(self.url, data={
+            'start': start.isoformat(),
+            'end': (start + timedelta(days=2)).isoformat(),
+            'bucket': '1d'
+        })
+        json = resp.json()
+
+        assert [datetime.fromisoformat(label.replace('Z', '+00:00')) for label in json['labels']] == [
+            start, start + timedelta(days=1)]
+        assert json['min'] == [10, 40]
+        assert json['data'] == [20, 50]
+        assert json['max'] == [30, 60]
+
+    @pytest.mark.django_db
+    def test_GET_with_bucket_reads_bucket_that_the_retention_period_starts_in_from_records(self, auth_client,
+                                                                                           settings):
+        settings.WS_RECORDS_RETENTION = timedelta(seconds=1)
+        now = datetime.now(pytz.UTC)
+        today = floor_datetime(now, timedelta(days=1))
+        self.create_records(today, timedelta(seconds=0), [10])
+
+        resp = auth_client.get(self.url, data={
+            'start': (today - timedelta(days=1)).isoformat(),
+            'end': now.isoformat(),
+            'bucket': '1d'
+        })
+        json = resp.json()
+
+        assert [datetime.fromisoformat(label.replace('Z', '+00:00')) for label in json['labels']] == [today]
+        assert json['data'] == [10]
+
+    @pytest.mark.django_db
+    def test_GET_with_bucket_doesnt_instantiate_record_models(self, auth_client):
+        start = datetime(2021, 3, 1, tzinfo=pytz.UTC)
+        self.create_records(start, timedelta(minutes=1), range(5))
+
+        with patch.object(WateringStationRecord, '__init__', side_effect=AssertionError):
+            auth_client.get(self.url, data={'start': start.isoformat(), 'bucket': '1m'})
+            auth_client.get(self.url, data={'start': start.isoformat()})
+
+    @pytest.mark.django_db
+    @pytest.mark.parametrize('data', [
+        {'bucket': '2s'},
+        {'start': 'not a date'},
+        {'start': '2021-03-02T00:00:00', 'end': '2021-03-01T00:00:00'},
+    ], ids=['invalid_bucket', 'invalid_start', 'start_after_end'])
+    def test_GET_with_invalid_query_returns_400_status_code_with_errors(self, auth_client, data):
+        resp = auth_client.get(self.url, data=data)
+
+        assert resp.status_code == status.HTTP_400_BAD_REQUEST
+        assert resp.json()['errors']
+
     @pytest.mark.django_db
     def test_logged_out_user_is_redirected_to_login_page_when_accessing_this_view(self, client):
         resp = client.get(self.url)
@@ -864,6 +1581,28 @@ class TestTokenUpdateView:
         self.garden.refresh_from_db()
         assert self.garden.token.uuid != uuid
 
+    @pytest.mark.django_db
+    def test_POST_revokes_api_access_for_the_previous_api_key(self, auth_client, api_client, token_uuid):
+        self.garden.token.delete()
+        Token.objects.create(garden=self.garden, uuid=token_uuid)
+        api_client.credentials(HTTP_AUTHORIZATION='Token ' + token_uuid)
+        api_url = reverse('api-garden', kwargs={'name': self.garden.name})
+        assert api_client.get(api_url).status_code == status.HTTP_200_OK
+
+        auth_client.post(self.url)
+
+        assert api_client.get(api_url).status_code == status.HTTP_403_FORBIDDEN
+
+    @pytest.mark.django_db
+    def test_POST_issues_api_key_with_a_prefix_that_authenticates_the_garden(self, auth_client, api_client):
+        key = auth_client.post(self.url).json()['html']
+        api_client.credentials(HTTP_AUTHORIZATION='Token ' + key)
+
+        resp = api_client.get(reverse('api-garden', kwargs={'name': self.garden.name}))
+
+        assert Token.objects.get(garden=self.garden).prefix == Token.get_key_prefix(key) != ''
+        assert resp.status_code == status.HTTP_200_OK
+
     @pytest.mark.django_db
     def test_POST_returns_404_page_when_accessed_by_user_who_doesnt_own_the_garden(self, auth_client, garden):
         url = self.create_url(garden.pk)
@@ -873,9 +1612,9 @@ class TestTokenUpdateView:
         assertions.assert_404_rendered(resp)
 
     @pytest.mark.django_db
-    @patch('garden.views.secrets')
-    def test_POST_returns_json_response_with_success_true_and_new_api_token(self, mock_secrets, auth_client):
-        uuid = mock_secrets.token_hex.return_value = 'random hex'
+    @patch('garden.models.Token.generate_key')
+    def test_POST_returns_json_response_with_success_true_and_new_api_token(self, mock_generate_key, auth_client):
+        uuid = mock_generate_key.return_value = 'random hex'
 
         resp = auth_client.post(self.url)
 
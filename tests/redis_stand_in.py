@@ -0,0 +1,126 @@
+"""
+A minimal in-process stand-in for a Redis server that implements the commands used by autogarden.cache.RedisCache, so
+that the backend can be tested without running Redis.
+"""
+
+import socketserver
+import threading
+import time
+
+from autogarden.cache import INCR_SCRIPT
+
+
+class RedisStandInHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        self.db = 0
+        while True:
+            command = self.read_command()
+            if command is None:
+                return
+            self.wfile.write(self.server.stand_in.execute(self, command[0].decode().upper(), command[1:]))
+
+    def read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        args = []
+        for _ in range(int(line[1:])):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+
+def encode_reply(value) -> bytes:
+    if value is None:
+        return b'$-1\r\n'
+    if isinstance(value, int):
+        return b':%d\r\n' % value
+    if isinstance(value, bytes):
+        return b'$%d\r\n%s\r\n' % (len(value), value)
+    if isinstance(value, list):
+        return b'*%d\r\n' % len(value) + b''.join(encode_reply(item) for item in value)
+    return f'+{value}\r\n'.encode()
+
+
+class RedisStandIn:
+    def __init__(self, password=None):
+        self.password = password
+        self.dbs = {}
+        self.lock = threading.Lock()
+        self.server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), RedisStandInHandler)
+        self.server.daemon_threads = True
+        self.server.stand_in = self
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address
+        password = f':{self.password}@' if self.password else ''
+        return f'redis://{password}{host}:{port}/1'
+
+    def start(self) -> None:
+        threading.Thread(target=self.server.serve_forever, args=(0.01,), daemon=True).start()
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def get_data(self, db: int) -> dict:
+        data = self.dbs.setdefault(db, {})
+        now = time.monotonic()
+        for key in [key for key, (_, expires_at) in data.items() if expires_at is not None and expires_at <= now]:
+            del data[key]
+        return data
+
+    def execute(self, handler, name, args) -> bytes:
+        if name == 'AUTH':
+            return encode_reply('OK') if args[0].decode() == self.password else b'-ERR invalid password\r\n'
+        if name == 'SELECT':
+            handler.db = int(args[0])
+            return encode_reply('OK')
+
+        with self.lock:
+            data = self.get_data(handler.db)
+            if name == 'PING':
+                return encode_reply('PONG')
+            if name == 'GET':
+                return encode_reply(data.get(args[0], (None, None))[0])
+            if name == 'MGET':
+                return encode_reply([data.get(key, (None, None))[0] for key in args])
+            if name == 'SET':
+                key, value, options = args[0], args[1], [arg.decode().upper() for arg in args[2:]]
+                if 'NX' in options and key in data:
+                    return encode_reply(None)
+                expires_at = None
+                if 'PX' in options:
+                    expires_at = time.monotonic() + int(options[options.index('PX') + 1]) / 1000
+                data[key] = (value, expires_at)
+                return encode_reply('OK')
+            if name == 'DEL':
+                return encode_reply(sum(data.pop(key, None) is not None for key in args))
+            if name == 'EXISTS':
+                return encode_reply(sum(key in data for key in args))
+            if name == 'EVAL' and args[0].decode() == INCR_SCRIPT:
+                # the only script run by RedisCache, which runs INCRBY only if the key exists
+                if args[2] not in data:
+                    return encode_reply(None)
+                name, args = 'INCRBY', args[2:]
+            if name == 'INCRBY':
+                value, expires_at = data.get(args[0], (b'0', None))
+                if not value.lstrip(b'-').isdigit():
+                    return b'-ERR value is not an integer or out of range\r\n'
+                data[args[0]] = (str(int(value) + int(args[1])).encode(), expires_at)
+                return encode_reply(int(data[args[0]][0]))
+            if name == 'PEXPIRE':
+                if args[0] not in data:
+                    return encode_reply(0)
+                data[args[0]] = (data[args[0]][0], time.monotonic() + int(args[1]) / 1000)
+                return encode_reply(1)
+            if name == 'PERSIST':
+                if args[0] not in data or data[args[0]][1] is None:
+                    return encode_reply(0)
+                data[args[0]] = (data[args[0]][0], None)
+                return encode_reply(1)
+            if name == 'FLUSHDB':
+                data.clear()
+                return encode_reply('OK')
+        return f'-ERR unknown command {name}\r\n'.encode()
@@ -0,0 +1,23 @@
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+
+from autogarden.cache import parse_cache_url
+
+
+@pytest.mark.unit
+class TestParseCacheUrl:
+    @pytest.mark.parametrize('url, expected', [
+        ('locmem://', {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': ''}),
+        ('locmem://autogarden', {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'autogarden'}),
+        ('file:///var/tmp/autogarden',
+         {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': '/var/tmp/autogarden'}),
+        ('dummy://', {'BACKEND': 'django.core.cache.backends.dummy.DummyCache', 'LOCATION': ''}),
+        ('redis://:secret@localhost:6379/1',
+         {'BACKEND': 'autogarden.cache.RedisCache', 'LOCATION': 'redis://:secret@localhost:6379/1'}),
+    ], ids=['locmem', 'locmem-name', 'file', 'dummy', 'redis'])
+    def test_returns_cache_settings_for_the_url(self, url, expected):
+        assert parse_cache_url(url) == expected
+
+    def test_raises_improperly_configured_for_unsupported_scheme(self):
+        with pytest.raises(ImproperlyConfigured):
+            parse_cache_url('memcached://localhost:11211')
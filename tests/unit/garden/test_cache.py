@@ -0,0 +1,62 @@
+import pytest
+
+from garden.cache import (bump_garden_version, get_garden_config,
+                          get_garden_fragments, get_garden_versions,
+                          get_watering_station_configs,
+                          invalidate_garden_config,
+                          invalidate_watering_station_configs,
+                          set_garden_config, set_garden_fragment,
+                          set_watering_station_configs)
+
+
+@pytest.mark.unit
+class TestGardenFragmentCache:
+    def test_get_garden_versions_returns_the_same_version_until_it_is_bumped(self):
+        version = get_garden_versions([1])[1]
+
+        assert get_garden_versions([1]) == {1: version}
+        bump_garden_version(1)
+        assert get_garden_versions([1])[1] != version
+
+    def test_get_garden_fragments_only_returns_fragments_cached_for_the_current_version(self):
+        versions = get_garden_versions([1, 2])
+        set_garden_fragment('card', 1, versions[1], 'card 1', timeout=None)
+        set_garden_fragment('card', 2, versions[2], 'card 2', timeout=None)
+
+        bump_garden_version(2)
+
+        assert get_garden_fragments('card', get_garden_versions([1, 2])) == {1: 'card 1'}
+
+    def test_bump_garden_version_does_nothing_when_garden_has_no_version(self):
+        bump_garden_version(1)
+
+        assert get_garden_fragments('card', get_garden_versions([1])) == {}
+
+    def test_set_garden_fragment_limits_timeout_to_the_setting(self, settings, monkeypatch):
+        settings.GARDEN_FRAGMENT_CACHE_TIMEOUT = 10
+        timeouts = []
+        monkeypatch.setattr('garden.cache.cache.set', lambda key, value, timeout: timeouts.append(timeout))
+
+        set_garden_fragment('card', 1, 0, 'card', timeout=100)
+        set_garden_fragment('card', 1, 0, 'card', timeout=5)
+        set_garden_fragment('card', 1, 0, 'card', timeout=None)
+
+        assert timeouts == [10, 5, 10]
+
+
+@pytest.mark.unit
+class TestConfigCache:
+    def test_get_garden_config_returns_config_until_it_is_invalidated(self):
+        set_garden_config(1, ('etag', {'update_frequency': 5.0}))
+
+        assert get_garden_config(1) == ('etag', {'update_frequency': 5.0})
+        invalidate_garden_config(1)
+        assert get_garden_config(1) is None
+
+    def test_get_watering_station_configs_returns_configs_until_they_are_invalidated(self):
+        set_watering_station_configs(1, ('etag', [{'moisture_threshold': 50}]))
+
+        assert get_watering_station_configs(1) == ('etag', [{'moisture_threshold': 50}])
+        assert get_watering_station_configs(2) is None
+        invalidate_watering_station_configs(1)
+        assert get_watering_station_configs(1) is None
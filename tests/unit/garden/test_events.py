@@ -0,0 +1,66 @@
+import asyncio
+from unittest.mock import Mock
+
+import pytest
+
+from garden.events import SUBSCRIBER_QUEUE_SIZE, Broker, encode_event
+
+
+@pytest.mark.unit
+class TestBroker:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.broker = Broker()
+        self.loop = asyncio.new_event_loop()
+        yield
+        self.loop.close()
+
+    def run(self, coroutine):
+        return self.loop.run_until_complete(coroutine)
+
+    def test_encode_event_formats_data_as_json_server_sent_event(self):
+        assert encode_event('records', [{'moisture_level': 1.5}]) == b'event: records\ndata: [{"moisture_level": 1.5}]\n\n'
+
+    def test_publish_delivers_the_same_encoded_message_to_every_subscriber_of_the_garden(self):
+        get_data = Mock(return_value={'a': 1})
+
+        async def subscribe_and_publish():
+            with self.broker.subscribe(1) as queue1, self.broker.subscribe(1) as queue2:
+                with self.broker.subscribe(2) as other_queue:
+                    self.broker.publish(1, 'garden', get_data)
+                    return await queue1.get(), await queue2.get(), other_queue.empty()
+
+        message1, message2, other_queue_is_empty = self.run(subscribe_and_publish())
+
+        assert message1 is message2
+        assert message1 == encode_event('garden', {'a': 1})
+        assert other_queue_is_empty
+        get_data.assert_called_once()
+
+    def test_publish_doesnt_get_data_when_garden_has_no_subscribers(self):
+        get_data = Mock()
+
+        self.broker.publish(1, 'garden', get_data)
+
+        get_data.assert_not_called()
+
+    def test_subscribe_removes_subscriber_on_exit(self):
+        async def subscribe():
+            with self.broker.subscribe(1):
+                assert self.broker.has_subscribers(1)
+
+        self.run(subscribe())
+
+        assert not self.broker.has_subscribers(1)
+
+    def test_publish_drops_the_oldest_messages_of_a_subscriber_that_isnt_keeping_up(self):
+        async def subscribe_and_publish():
+            with self.broker.subscribe(1) as queue:
+                for i in range(SUBSCRIBER_QUEUE_SIZE + 1):
+                    self.broker.publish(1, 'garden', lambda: i)
+                await asyncio.sleep(0)
+                return [await queue.get() for _ in range(queue.qsize())]
+
+        messages = self.run(subscribe_and_publish())
+
+        assert messages == [encode_event('garden', i) for i in range(1, SUBSCRIBER_QUEUE_SIZE + 1)]
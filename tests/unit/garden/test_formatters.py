@@ -56,6 +56,43 @@ class TestModelFormatter:
 
         assert ret_val is mock_method
 
+    def test_display_methods_of_subclasses_are_installed_as_properties_when_the_class_is_created(self):
+        class Formatter(ModelFormatter):
+            def get_test_attribute_display(self):
+                return 'display'
+
+        assert isinstance(Formatter.__dict__['test_attribute'], property)
+        assert Formatter(Mock()).test_attribute == 'display'
+
+    def test_display_method_overridden_by_subclass_is_called(self):
+        class Formatter(ModelFormatter):
+            def get_test_attribute_display(self):
+                return 'display'
+
+        class SubFormatter(Formatter):
+            def get_test_attribute_display(self):
+                return 'overridden'
+
+        assert SubFormatter(Mock()).test_attribute == 'overridden'
+
+    def test_attribute_defined_by_subclass_is_retrieved_instead_of_display_method(self):
+        class Formatter(ModelFormatter):
+            test_attribute = 'attribute'
+
+            def get_test_attribute_display(self):
+                return 'display'
+
+        assert Formatter(Mock()).test_attribute == 'attribute'
+
+    def test_attribute_on_formatter_instance_variable_is_retrieved_if_display_method_raises_attribute_error(self):
+        class Formatter(ModelFormatter):
+            def get_test_attribute_display(self):
+                raise AttributeError()
+
+        mock_instance = Mock()
+
+        assert Formatter(mock_instance).test_attribute is mock_instance.test_attribute
+
 
 @pytest.mark.unit
 class TestGardenFormatter:
@@ -66,19 +103,54 @@ class TestGardenFormatter:
         indirect=['garden_factory'],
         ids=['connected', 'disconnected'])
     def test_get_is_connected_display_returns_correct_string(self, garden_factory, is_connected, expected):
-        formatter = GardenFormatter(garden_factory.build(is_connected=is_connected))
+        formatter = GardenFormatter(garden_factory.build(is_connected=is_connected, last_connection_time=datetime.now(pytz.UTC)))
 
         ret_val = formatter.get_is_connected_display()
 
         assert ret_val == expected
 
+    def test_get_is_connected_display_returns_disconnected_string_if_garden_is_overdue(self, garden_factory):
+        garden = garden_factory.build(is_connected=True, last_connection_time=datetime.now(pytz.UTC) - timedelta(minutes=10),
+                                      update_frequency=timedelta(minutes=5))
+        formatter = GardenFormatter(garden)
+
+        ret_val = formatter.get_is_connected_display()
+
+        assert ret_val == GardenFormatter.DISCONNECTED_STR
+
+    def test_get_cache_timeout_returns_seconds_until_garden_becomes_overdue(self, garden_factory):
+        now = datetime.now(pytz.UTC)
+        garden = garden_factory.build(last_connection_time=now - timedelta(minutes=2),
+                                      update_frequency=timedelta(minutes=5))
+
+        ret_val = GardenFormatter(garden).get_cache_timeout(now)
+
+        assert ret_val == 3 * 60
+
+    def test_get_cache_timeout_returns_seconds_until_days_since_last_connection_changes_if_garden_is_overdue(
+            self, garden_factory):
+        now = datetime.now(pytz.UTC)
+        garden = garden_factory.build(last_connection_time=now - timedelta(days=2, hours=1),
+                                      update_frequency=timedelta(minutes=5))
+
+        ret_val = GardenFormatter(garden).get_cache_timeout(now)
+
+        assert ret_val == 23 * 60 * 60
+
+    def test_get_cache_timeout_returns_none_if_garden_has_never_connected(self, garden_factory):
+        garden = garden_factory.build(last_connection_time=None)
+
+        ret_val = GardenFormatter(garden).get_cache_timeout()
+
+        assert ret_val is None
+
     @pytest.mark.parametrize('value, klass', [
         (True, GardenFormatter.CONNECTED_BADGE),
         (False, GardenFormatter.DISCONNECTED_BADGE)
     ],
         ids=['connected', 'disconnected'])
     def test_get_is_connected_badge_class_returns_correct_class(self, garden_factory, value, klass):
-        formatter = GardenFormatter(garden_factory.build(is_connected=value))
+        formatter = GardenFormatter(garden_factory.build(is_connected=value, last_connection_time=datetime.now(pytz.UTC)))
 
         ret_val = formatter.get_is_connected_badge_class()
 
@@ -109,7 +181,7 @@ class TestGardenFormatter:
     ],
         ids=['n/a', 'bad', 'poor_low', 'poor_high', 'ok_low', 'ok_high', 'good_low', 'good_high', 'excellent'])
     def test_get_connection_strength_display_returns_correct_message(self, garden_factory, value, message):
-        formatter = GardenFormatter(garden_factory.build(connection_strength=value))
+        formatter = GardenFormatter(garden_factory.build(connection_strength=value, last_connection_time=datetime.now(pytz.UTC)))
 
         ret_val = formatter.get_connection_strength_display()
 
@@ -128,7 +200,7 @@ class TestGardenFormatter:
     ],
         ids=['n/a', 'bad', 'poor_low', 'poor_high', 'ok_low', 'ok_high', 'good_low', 'good_high', 'excellent'])
     def test_get_connection_strength_badge_class_returns_correct_class(self, garden_factory, value, klass):
-        formatter = GardenFormatter(garden_factory.build(connection_strength=value))
+        formatter = GardenFormatter(garden_factory.build(connection_strength=value, last_connection_time=datetime.now(pytz.UTC)))
 
         ret_val = formatter.get_connection_strength_badge_class()
 
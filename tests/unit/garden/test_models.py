@@ -21,6 +21,56 @@ class TestGardenModel:
 
         assert getattr(garden, field) == get_default()
 
+    @pytest.mark.parametrize('minutes_since_last_connection, expected', [(10, True), (2, False)],
+                             ids=['overdue', 'not_overdue'])
+    def test_is_overdue_returns_whether_an_update_was_missed(self, garden_factory, minutes_since_last_connection, expected):
+        garden = garden_factory.build(
+            last_connection_time=datetime.now(pytz.UTC) - timedelta(minutes=minutes_since_last_connection),
+            update_frequency=timedelta(minutes=5)
+        )
+
+        ret_val = garden.is_overdue()
+
+        assert ret_val == expected
+
+    def test_is_overdue_returns_false_if_prev_connection_has_never_been_established(self, garden_factory):
+        garden = garden_factory.build(last_connection_time=None)
+
+        ret_val = garden.is_overdue()
+
+        assert ret_val == False
+
+    @pytest.mark.parametrize('is_connected, is_overdue, expected', [
+        (True, False, True),
+        (True, True, False),
+        (False, False, False),
+    ],
+        ids=['connected', 'overdue', 'disconnected'])
+    def test_get_is_connected_returns_false_if_garden_is_overdue(self, garden_factory, is_connected, is_overdue, expected):
+        minutes_since_last_connection = 10 if is_overdue else 2
+        garden = garden_factory.build(
+            is_connected=is_connected,
+            last_connection_time=datetime.now(pytz.UTC) - timedelta(minutes=minutes_since_last_connection),
+            update_frequency=timedelta(minutes=5)
+        )
+
+        ret_val = garden.get_is_connected()
+
+        assert ret_val == expected
+
+    @pytest.mark.parametrize('minutes_since_last_connection, expected', [(10, None), (2, -50)],
+                             ids=['overdue', 'not_overdue'])
+    def test_get_connection_strength_returns_none_if_garden_is_overdue(self, garden_factory, minutes_since_last_connection, expected):
+        garden = garden_factory.build(
+            connection_strength=-50,
+            last_connection_time=datetime.now(pytz.UTC) - timedelta(minutes=minutes_since_last_connection),
+            update_frequency=timedelta(minutes=5)
+        )
+
+        ret_val = garden.get_connection_strength()
+
+        assert ret_val == expected
+
     def test_calc_time_till_next_update_returns_expected_time_to_within_a_second(self, garden_factory):
         minutes = 10
         last_connection_time = datetime.now(pytz.UTC) - timedelta(minutes=minutes - 2)
@@ -115,6 +165,19 @@ class TestTokenModel:
 
         assert ret_val == 'March 15, 2021 1:35 PM'
 
+    def test_generate_key_returns_key_with_a_prefix(self):
+        key = models.Token.generate_key()
+
+        prefix, secret = key.split(models.Token.KEY_SEPARATOR)
+        assert models.Token.get_key_prefix(key) == prefix
+        assert len(prefix) == models.Token.PREFIX_LENGTH
+        assert key != models.Token.generate_key()
+
+    @pytest.mark.parametrize('key', ['0123456789abcdef0123', '0123.456789abcdef', ''],
+                             ids=['no-separator', 'short-prefix', 'empty'])
+    def test_get_key_prefix_returns_empty_string_for_keys_without_a_prefix(self, key):
+        assert models.Token.get_key_prefix(key) == ''
+
 
 @pytest.mark.unit
 class TestWateringStationRecord:
@@ -126,3 +189,25 @@ class TestWateringStationRecord:
         assert str(record.watering_station.garden) in ret_val
         assert str(record.watering_station.idx) in ret_val
         assert str(record.created) in ret_val
+
+
+@pytest.mark.unit
+class TestWateringStationRecordRollup:
+    @pytest.mark.parametrize('bucket_size, expected', [
+        (timedelta(days=2), models.WateringStationRecordRollup.DAY),
+        (timedelta(days=1), models.WateringStationRecordRollup.DAY),
+        (timedelta(hours=3), models.WateringStationRecordRollup.HOUR),
+        (timedelta(hours=1), models.WateringStationRecordRollup.HOUR),
+        (timedelta(minutes=15), None),
+        (timedelta(minutes=90), None),
+    ],
+        ids=['2d', '1d', '3h', '1h', '15m', '90m'])
+    def test_get_resolution_returns_coarsest_resolution_that_divides_bucket_size(self, bucket_size, expected):
+        ret_val = models.WateringStationRecordRollup.get_resolution(bucket_size)
+
+        assert ret_val == expected
+
+    def test_avg_moisture_level_returns_sum_divided_by_count(self):
+        rollup = models.WateringStationRecordRollup(sum_moisture_level=90, count=4)
+
+        assert rollup.avg_moisture_level == 22.5
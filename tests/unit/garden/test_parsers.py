@@ -0,0 +1,49 @@
+import struct
+from io import BytesIO
+
+import pytest
+from rest_framework.exceptions import ParseError
+
+from garden.parsers import CSVParser, MoistureLevelsParser
+
+
+@pytest.mark.unit
+class TestMoistureLevelsParser:
+    def test_parse_decodes_packed_little_endian_floats(self):
+        body = struct.pack('<3f', 12.5, 0, 100)
+
+        ret_val = MoistureLevelsParser().parse(BytesIO(body))
+
+        assert list(ret_val) == [12.5, 0, 100]
+
+    def test_parse_returns_empty_array_for_empty_body(self):
+        ret_val = MoistureLevelsParser().parse(BytesIO(b''))
+
+        assert len(ret_val) == 0
+
+    def test_parse_raises_parse_error_when_body_length_isnt_a_multiple_of_float_size(self):
+        body = struct.pack('<2f', 12.5, 50)[:-1]
+
+        with pytest.raises(ParseError):
+            MoistureLevelsParser().parse(BytesIO(body))
+
+
+@pytest.mark.unit
+class TestCSVParser:
+    def test_parse_returns_dict_of_each_rows_values_by_column(self):
+        body = b'name,num_watering_stations\nFront,2\nBack,3\n'
+
+        ret_val = CSVParser().parse(BytesIO(body))
+
+        assert ret_val == [{'name': 'Front', 'num_watering_stations': '2'}, {'name': 'Back', 'num_watering_stations': '3'}]
+
+    def test_parse_leaves_out_empty_and_missing_values(self):
+        body = b'name,update_frequency,num_watering_stations\nFront,,2\nBack\n'
+
+        ret_val = CSVParser().parse(BytesIO(body))
+
+        assert ret_val == [{'name': 'Front', 'num_watering_stations': '2'}, {'name': 'Back'}]
+
+    def test_parse_raises_parse_error_when_body_isnt_utf8(self):
+        with pytest.raises(ParseError):
+            CSVParser().parse(BytesIO('name\nGärten\n'.encode('latin-1')))
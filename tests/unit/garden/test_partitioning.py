@@ -0,0 +1,28 @@
+from datetime import date, datetime
+
+import pytest
+import pytz
+
+from garden import partitioning
+
+
+@pytest.mark.unit
+class TestPartitioning:
+    def test_get_partition_name_includes_table_name_and_day(self):
+        ret_val = partitioning.get_partition_name(date(2021, 3, 1))
+
+        assert ret_val == 'garden_wateringstationrecord_p20210301'
+
+    def test_partition_name_pattern_matches_partition_names_but_not_the_default_partition(self):
+        assert partitioning.PARTITION_NAME_PATTERN.search(partitioning.get_partition_name(date(2021, 3, 1)))
+        assert not partitioning.PARTITION_NAME_PATTERN.search(partitioning.get_default_partition_name())
+
+    def test_get_partition_bounds_returns_utc_start_and_end_of_day(self):
+        ret_val = partitioning.get_partition_bounds(date(2021, 3, 1))
+
+        assert ret_val == (datetime(2021, 3, 1, tzinfo=pytz.UTC), datetime(2021, 3, 2, tzinfo=pytz.UTC))
+
+    def test_is_enabled_returns_false_on_databases_other_than_postgresql(self, settings):
+        settings.WS_RECORDS_PARTITIONED = True
+
+        assert partitioning.is_enabled() == False
@@ -16,3 +16,11 @@ class TestTokenPermission:
         ret_val = TokenPermission().has_object_permission(request, mock_view, garden)
 
         assert ret_val == False
+
+    def test_has_object_permission_checks_garden_of_token_set_by_authentication(self, garden_factory, token_factory):
+        garden = garden_factory.build(pk=1)
+        request = HttpRequest()
+        request.auth = token_factory.build(garden=garden)
+
+        assert TokenPermission().has_object_permission(request, Mock(), garden)
+        assert not TokenPermission().has_object_permission(request, Mock(), garden_factory.build(pk=2))
@@ -1,7 +1,8 @@
-from datetime import timedelta
+from datetime import datetime, timedelta
 from unittest.mock import create_autospec, patch
 
 import pytest
+import pytz
 
 import garden.utils as utils
 from garden import models
@@ -75,3 +76,79 @@ class TestUtils:
         assert ret_val == mock_derive.return_value
         mock_derive.assert_called_once_with(mock_timedelta.return_value)
         mock_timedelta.assert_called_once_with(minutes=minutes, seconds=seconds)
+
+
+@pytest.mark.unit
+class TestMakeEtag:
+    def test_make_etag_returns_quoted_string(self):
+        ret_val = utils.make_etag(1, 'a')
+
+        assert ret_val.startswith('"') and ret_val.endswith('"')
+
+    def test_make_etag_returns_same_value_for_same_input(self):
+        assert utils.make_etag(timedelta(seconds=5), (1, True)) == utils.make_etag(timedelta(seconds=5), (1, True))
+
+    def test_make_etag_returns_different_value_for_different_input(self):
+        assert utils.make_etag(timedelta(seconds=5)) != utils.make_etag(timedelta(seconds=6))
+
+
+@pytest.mark.unit
+class TestCalcTimeTillNextUpdate:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.now = datetime(2021, 3, 1, 12, 0, 0, tzinfo=pytz.UTC)
+        self.update_frequency = timedelta(minutes=5)
+
+    @pytest.mark.parametrize('elapsed, expected', [
+        (timedelta(minutes=2), 180),
+        (timedelta(minutes=5), 0),
+        (timedelta(minutes=7), 180),
+        (timedelta(minutes=10), 0),
+        (timedelta(days=30, seconds=1), 299),
+        (timedelta(minutes=-1), 360),
+    ],
+        ids=['before_first_update', 'at_first_update', 'one_update_missed', 'at_second_update', 'long_offline',
+             'last_connection_in_future'])
+    def test_returns_seconds_until_next_expected_update(self, elapsed, expected):
+        ret_val = utils.calc_time_till_next_update(self.now - elapsed, self.update_frequency, self.now)
+
+        assert ret_val == expected
+
+    def test_returns_none_if_prev_connection_has_never_been_established(self):
+        ret_val = utils.calc_time_till_next_update(None, self.update_frequency, self.now)
+
+        assert ret_val is None
+
+    def test_calc_times_till_next_update_returns_time_for_each_row_keyed_by_pk(self):
+        rows = [
+            (1, self.now - timedelta(minutes=2), self.update_frequency),
+            (2, None, self.update_frequency),
+            (3, self.now - timedelta(hours=1, seconds=1), timedelta(seconds=5)),
+        ]
+
+        ret_val = utils.calc_times_till_next_update(rows, self.now)
+
+        assert ret_val == {1: 180, 2: None, 3: 4}
+
+
+@pytest.mark.unit
+class TestRoundDatetime:
+    @pytest.mark.parametrize('value, expected', [
+        (datetime(2021, 3, 1, 12, 30, tzinfo=pytz.UTC), datetime(2021, 3, 1, 12, tzinfo=pytz.UTC)),
+        (datetime(2021, 3, 1, 12, tzinfo=pytz.UTC), datetime(2021, 3, 1, 12, tzinfo=pytz.UTC)),
+    ],
+        ids=['between', 'on_boundary'])
+    def test_floor_datetime_rounds_down_to_multiple_of_interval(self, value, expected):
+        ret_val = utils.floor_datetime(value, timedelta(hours=1))
+
+        assert ret_val == expected
+
+    @pytest.mark.parametrize('value, expected', [
+        (datetime(2021, 3, 1, 12, 30, tzinfo=pytz.UTC), datetime(2021, 3, 1, 13, tzinfo=pytz.UTC)),
+        (datetime(2021, 3, 1, 12, tzinfo=pytz.UTC), datetime(2021, 3, 1, 12, tzinfo=pytz.UTC)),
+    ],
+        ids=['between', 'on_boundary'])
+    def test_ceil_datetime_rounds_up_to_multiple_of_interval(self, value, expected):
+        ret_val = utils.ceil_datetime(value, timedelta(hours=1))
+
+        assert ret_val == expected
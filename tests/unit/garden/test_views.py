@@ -6,7 +6,6 @@ from django.contrib.auth import get_user_model
 from django.http.request import HttpRequest
 from tests.assertions import assert_render_context_called_with
 
-from garden.formatters import GardenFormatter
 from garden.views import (GardenDetailView, GardenListView, GardenUpdateView,
                           WateringStationListView, WateringStationUpdateView)
 
@@ -20,30 +19,49 @@ def mock_auth_user():
 
 @pytest.mark.unit
 class TestGardenListView:
+    @patch('garden.views.set_garden_fragment')
+    @patch('garden.views.render_to_string')
     @patch('garden.views.render')
-    def test_GET_only_renders_requesting_users_gardens_in_template(self, mock_render, mock_auth_user):
+    @patch('garden.views.GardenFormatter')
+    def test_GET_only_renders_requesting_users_gardens_in_template(self, mock_formatter_class, mock_render,
+                                                                    mock_render_to_string, mock_set_garden_fragment,
+                                                                    mock_auth_user):
         request = HttpRequest()
         request.user = mock_auth_user
-        expected = [GardenFormatter(garden) for garden in mock_auth_user.gardens.all.return_value]
+        mock_auth_user.pk = 1
+        gardens = [Mock(pk=1), Mock(pk=2)]
+        mock_auth_user.gardens.values_list.return_value = [garden.pk for garden in gardens]
+        mock_auth_user.gardens.with_summary.return_value.filter.return_value = gardens
+        expected = [mock_render_to_string.return_value] * len(gardens)
 
         resp = GardenListView().get(request)
 
-        assert_render_context_called_with(mock_render, {'gardens': expected})
+        assert_render_context_called_with(mock_render, {'garden_cards': expected})
         assert resp == mock_render.return_value
 
 
 @pytest.mark.unit
 class TestGardenDetailView:
+    @patch('garden.views.set_garden_fragment')
+    @patch('garden.views.render_to_string')
     @patch('garden.views.render')
     @patch('garden.views.GardenFormatter')
-    def test_GET_passes_garden_formatter_as_context_to_render(self, mock_formatter_class, mock_render, mock_auth_user, rf):
+    def test_GET_passes_rendered_garden_fragments_as_context_to_render(self, mock_formatter_class, mock_render,
+                                                                       mock_render_to_string, mock_set_garden_fragment,
+                                                                       mock_auth_user, rf):
         pk = 0
         request = rf.get(f'/gardens/{pk}/')
         request.user = mock_auth_user
+        expected = {
+            'owner': mock_auth_user.gardens.select_related.return_value.get.return_value.owner_id,
+            'nav': mock_render_to_string.return_value,
+            'config': mock_render_to_string.return_value,
+            'watering_stations': mock_render_to_string.return_value,
+        }
 
         GardenDetailView().get(request, pk)
 
-        assert_render_context_called_with(mock_render, {'garden': mock_formatter_class.return_value})
+        assert_render_context_called_with(mock_render, {'garden_detail': expected})
 
 
 @pytest.mark.unit